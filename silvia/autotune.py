@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Relay autotune for the heater PID (Åström–Hägglund)
+
+Heats the boiler to the setpoint at full power, then switches the heater duty between
+bias + amplitude and bias - amplitude each time the reading crosses the setpoint, which
+settles into a steady oscillation. Its period and amplitude give the ultimate gain and
+period of the loop, and a tuning rule turns those into PID gains. The duty averaged over
+whole cycles is what holds the boiler at the setpoint, which gives the feed-forward term.
+
+The run is recorded as an AUTOTUNE session by the telemetry recorder and fitted from the
+recording with numpy. The result is saved as the heater profile TemperatureController
+loads at startup, so each machine is tuned once:
+
+    python autotune.py --mock                  # simulated boiler on a virtual clock, seconds
+    python autotune.py --port /dev/ttyACM0     # real machine, about 15 minutes from cold
+"""
+
+import argparse
+import json
+import math
+import sys
+from datetime import datetime
+from PyQt6.QtCore import QObject, pyqtSignal
+import config
+from serialcom.telemetry_codec import parse_line
+
+# Kp / Ku, Ti / Tu, Td / Tu. The PI rules suit the boiler best: the probe lags the water by
+# seconds, so a large derivative mostly brakes the warm-up early.
+TUNING_RULES = {
+    'ziegler-nichols': (0.6, 0.5, 0.125),
+    'ziegler-nichols-pi': (0.45, 0.83, 0.0),
+    'tyreus-luyben': (0.45, 2.2, 1 / 6.3),
+    'tyreus-luyben-pi': (0.31, 2.2, 0.0),
+    'pessen': (0.7, 0.4, 0.15),
+}
+DEFAULT_RULE = 'ziegler-nichols-pi'
+
+def load_profile(path=None):
+    """Heater profile saved by autotune, or None if there is none"""
+    path = config.HEATER_PROFILE if path is None else path
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def save_profile(profile, path=None):
+    path = config.HEATER_PROFILE if path is None else path
+    with open(path, 'w') as f:
+        json.dump(profile, f, indent=1)
+
+def fit_relay(times, temps, switches, setpoint, amplitude, hysteresis=0.0, rule=DEFAULT_RULE,
+              ambient=config.AMBIENT_TEMP):
+    """PID gains from a relay experiment
+
+    times/temps are the recorded samples, switches the (time, duty) of every relay switch
+    from the first one on. The first cycle is discarded as it still carries the warm-up.
+    """
+    import numpy as np
+    times = np.asarray(times, dtype=float)
+    temps = np.asarray(temps, dtype=float)
+    switch_times = np.array([t for t, _ in switches], dtype=float)
+    duties = np.array([duty for _, duty in switches], dtype=float)
+
+    # Switches alternate high/low; whole cycles run from one switch to high to the next
+    rises = switch_times[duties > duties.min()][1:]
+    if len(rises) < 3:
+        raise ValueError("not enough relay cycles to fit")
+    period = float(np.diff(rises).mean())
+
+    # Peak-to-peak of the reading within each whole cycle
+    bounds = np.searchsorted(times, rises)
+    peak_to_peak = (np.maximum.reduceat(temps, bounds[:-1]) - np.minimum.reduceat(temps, bounds[:-1]))
+    half_swing = float(peak_to_peak.mean()) / 2
+    if half_swing <= hysteresis:
+        raise ValueError("oscillation no larger than the relay hysteresis")
+    ultimate_gain = 4 * amplitude / (math.pi * math.sqrt(half_swing ** 2 - hysteresis ** 2))
+
+    # Time-weighted duty over the whole cycles is what holds the setpoint
+    in_cycles = (switch_times >= rises[0]) & (switch_times < rises[-1])
+    durations = np.diff(np.append(switch_times[in_cycles], rises[-1]))
+    holding_duty = float(np.average(duties[in_cycles], weights=durations))
+
+    kp_ratio, ti_ratio, td_ratio = TUNING_RULES[rule]
+    kp = kp_ratio * ultimate_gain
+    return {
+        'kp': round(kp, 3),
+        'ki': round(kp / (ti_ratio * period), 4),
+        'kd': round(kp * td_ratio * period, 3),
+        'feed_forward': round(holding_duty / max(1.0, setpoint - ambient), 4),
+        'ultimate_gain': round(ultimate_gain, 3),
+        'ultimate_period': round(period, 3),
+        'setpoint': setpoint,
+        'rule': rule,
+        'cycles': len(rises) - 1,
+    }
+
+class RelayAutotuner(QObject):
+    """Runs the relay experiment over any SerialManager backend"""
+    finished = pyqtSignal(dict)  # the fitted profile
+    failed = pyqtSignal(str)
+
+    def __init__(self, serial, recorder, clock, setpoint=93.0, amplitude=60, bias=None, hysteresis=0.2,
+                 cycles=5, timeout=3600, rule=DEFAULT_RULE):
+        super().__init__()
+        self.serial = serial
+        self.recorder = recorder
+        self.clock = clock
+        self.setpoint = setpoint
+        self.amplitude = amplitude
+        # Centre the relay on what should roughly hold the setpoint
+        self.bias = bias if bias is not None else config.HEATER_FEED_FORWARD * (setpoint - config.AMBIENT_TEMP)
+        self.bias = max(self.amplitude, min(255 - self.amplitude, self.bias))
+        self.hysteresis = hysteresis
+        self.cycles = cycles
+        self.timeout = timeout
+        self.rule = rule
+
+        self.done = False
+        self.duty = 255  # full power until the first crossing
+        self.switches = []
+        self._deadline = None
+
+    def start(self):
+        self.serial.lines_received.connect(self._handle_lines)
+        self.serial.samples_received.connect(self._handle_samples)
+        self.serial.send_command(f"SET_TEMP BREW {self.setpoint}")
+        self.serial.send_command("START_BREW")
+        self.recorder.begin_session("AUTOTUNE")
+        self._deadline = self.clock.now() + self.timeout
+
+    @property
+    def running(self):
+        """Started and neither finished nor failed yet"""
+        return self._deadline is not None and not self.done
+
+    def abort(self, reason):
+        """Stop the experiment from outside, e.g. when the link drops; reported through failed"""
+        self._fail(reason)
+
+    def _handle_lines(self, lines):
+        for line in lines:
+            if line.startswith("DATA:"):
+                self._handle_sample(parse_line(line))
+            elif line.startswith("ERROR"):
+                self._fail(line)
+
+    def _handle_samples(self, samples):
+        for sample in samples:
+            self._handle_sample(sample)
+
+    def _handle_sample(self, sample):
+        if self.done or sample is None:
+            return
+        t = sample.millis / 1000.0 if sample.millis else self.clock.now()
+        self.recorder.append(sample, timestamp=t)
+
+        high = self.bias + self.amplitude
+        low = self.bias - self.amplitude
+        if sample.temp > self.setpoint + self.hysteresis and self.duty != low:
+            self.duty = low
+            self.switches.append((t, low))
+        elif sample.temp < self.setpoint - self.hysteresis and self.duty == low:
+            self.duty = high
+            self.switches.append((t, high))
+        self.serial.send_command(f"SET_HEATER_PWM {int(round(self.duty))}")
+
+        # One extra cycle is thrown away with the warm-up; stop on the switch that closes the last
+        if len(self.switches) >= 2 * (self.cycles + 2):
+            self._finish()
+        elif self.clock.now() > self._deadline:
+            self._fail("Autotune timed out before the oscillation settled")
+
+    def _stop(self):
+        self.done = True
+        self.serial.send_command("STOP")
+        self.recorder.end_session()
+
+    def _finish(self):
+        self._stop()
+        try:
+            profile = fit_relay(*self._recorded(), self.switches, self.setpoint, self.amplitude,
+                                self.hysteresis, self.rule)
+        except ValueError as e:
+            self.failed.emit(f"Autotune fit failed: {e}")
+            return
+        profile['tuned_at'] = datetime.now().isoformat(timespec='seconds')
+        self.finished.emit(profile)
+
+    def _fail(self, reason):
+        if not self.done:
+            self._stop()
+            self.failed.emit(reason)
+
+    def _recorded(self):
+        """(times, temps) of this session, read back from the recording"""
+        from telemetry_recorder import TelemetryReader
+        session = self.recorder.sessions[-1]
+        reader = TelemetryReader(self.recorder.path)
+        records = reader.as_numpy(session['start'], session['stop'])
+        times, temps = records['timestamp'].copy(), records['temp'].astype(float)
+        del records  # the view pins the mmap
+        reader.close()
+        return times, temps
+
+def run_mock(setpoint=93.0, cycles=5, rule=DEFAULT_RULE, seed=None, log_dir="logs"):
+    """Autotune the simulated boiler on a virtual clock; returns (profile or None, error or None)"""
+    from serialcom.mock_serial_manager import SerialManager
+    from serialcom.sim_clock import VirtualClock
+    from telemetry_recorder import TelemetryRecorder
+    clock = VirtualClock()
+    serial = SerialManager(clock=clock, seed=seed)
+    recorder = TelemetryRecorder(log_dir)
+    tuner = RelayAutotuner(serial, recorder, clock, setpoint=setpoint, cycles=cycles, rule=rule)
+    results = []
+    tuner.finished.connect(lambda profile: results.append((profile, None)))
+    tuner.failed.connect(lambda reason: results.append((None, reason)))
+    serial.start()
+    tuner.start()
+    clock.run_until(tuner.timeout + 1, predicate=lambda: results)
+    serial.stop()
+    recorder.close()
+    return results[0] if results else (None, "Autotune did not finish")
+
+def main():
+    parser = argparse.ArgumentParser(description='Relay autotune for the heater PID')
+    parser.add_argument('--mock', action='store_true', help='Tune the simulated boiler (fast, virtual clock)')
+    parser.add_argument('--port', type=str, help='Serial port of the machine to tune')
+    parser.add_argument('--setpoint', type=float, default=config.DEFAULT_BREW_TEMP)
+    parser.add_argument('--cycles', type=int, default=5, help='relay cycles to fit over')
+    parser.add_argument('--rule', choices=sorted(TUNING_RULES), default=DEFAULT_RULE)
+    parser.add_argument('--output', type=str, default=config.HEATER_PROFILE, help='profile to write')
+    args = parser.parse_args()
+
+    if args.mock:
+        profile, error = run_mock(args.setpoint, args.cycles, args.rule)
+    else:
+        from PyQt6.QtCore import QCoreApplication
+        from serialcom.connection_manager import ConnectionManager
+        from serialcom.real_serial_manager import SerialManager
+        from serialcom.sim_clock import QtClock
+        from telemetry_recorder import TelemetryRecorder
+        app = QCoreApplication(sys.argv)
+        serial = SerialManager(port=args.port or config.SERIAL_PORT, baud_rate=config.SERIAL_BAUD,
+                               read_mode=config.SERIAL_READ_MODE, read_timeout=config.SERIAL_READ_TIMEOUT,
+                               batch_max_lines=config.SERIAL_BATCH_MAX_LINES,
+                               batch_max_latency_ms=config.SERIAL_BATCH_MAX_LATENCY_MS)
+        recorder = TelemetryRecorder()
+        tuner = RelayAutotuner(serial, recorder, QtClock(), setpoint=args.setpoint, cycles=args.cycles,
+                               rule=args.rule)
+        results = []
+        tuner.finished.connect(lambda profile: (results.append((profile, None)), app.quit()))
+        tuner.failed.connect(lambda reason: (results.append((None, reason)), app.quit()))
+        connection = ConnectionManager(serial, ready_timeout=config.CONNECT_READY_TIMEOUT,
+                                       probe_interval=config.CONNECT_PROBE_INTERVAL,
+                                       backoff_initial=config.CONNECT_BACKOFF_INITIAL,
+                                       backoff_max=config.CONNECT_BACKOFF_MAX)
+        def dropped(reason, retry_in):
+            # Relay cycles only make sense on one unbroken recording, so a dropped link ends the run
+            if tuner.running:
+                tuner.abort(f"Connection lost: {reason}")
+            else:
+                print(f"{reason}; retrying in {retry_in:g} s")
+        connection.connected.connect(tuner.start)
+        connection.disconnected.connect(dropped)
+        connection.start()
+        app.exec()
+        connection.stop()
+        recorder.close()
+        profile, error = results[0] if results else (None, "Autotune interrupted")
+
+    if profile is None:
+        print(error)
+        sys.exit(1)
+    profile['backend'] = "mock" if args.mock else "serial"
+    save_profile(profile, args.output)
+    print(json.dumps(profile, indent=1))
+    print(f"saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Replays a long synthetic shot through BrewScreen.receive_data
+
+Compares the previous list-backed curves (whole history converted on every sample) with the
+preallocated NumPy buffers. Per-sample cost is reported for the start and the end of the shot:
+with lists it grows with the shot length, with the buffers it should stay flat.
+Pass --frame-every N to include repaints, which then dominate the cost.
+
+Run from the silvia directory:
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.brew_screen_replay
+"""
+
+import argparse
+import math
+import time
+
+from PyQt6.QtWidgets import QApplication
+from gui.screens.brew_screen import BrewScreen
+from serialcom.telemetry_codec import TelemetrySample
+
+
+class _NullSerial:
+    def send_command(self, command):
+        pass
+
+
+class ListBrewScreen(BrewScreen):
+    """BrewScreen as it was: Python lists, full setData() on every sample, no downsampling"""
+
+    def __init__(self, serial, on_back):
+        super().__init__(serial, on_back)
+        self.plot_widget.setDownsampling(auto=False)
+        self.plot_widget.setClipToView(False)
+        self.data_time, self.data_weight, self.data_pressure = [], [], []
+
+    def append_point(self, t, weight, pressure):
+        self.data_time.append(t)
+        self.data_weight.append(weight)
+        self.data_pressure.append(pressure)
+        self.weight_curve.setData(self.data_time, self.data_weight)
+        self.pressure_curve.setData(self.data_time, self.data_pressure)
+
+
+def synthetic_shot(count):
+    """Preinfusion ramp, 9 bar plateau and a steadily rising weight"""
+    samples = []
+    for i in range(count):
+        x = i / count
+        pressure = min(9.0, 20.0 * x) + 0.2 * math.sin(i / 7.0)
+        weight = max(0.0, 45.0 * (x - 0.1))
+        samples.append(TelemetrySample("BREWING", 93.0, pressure, weight, 80, True, True, i // 4, i * 250))
+    return samples
+
+
+def replay(app, screen_class, samples, frame_every):
+    screen = screen_class(_NullSerial(), on_back=lambda: None)
+    screen.resize(600, 360)
+    screen.show()
+    screen.start_brew()
+    screen.start_time = time.time() - 1.0  # stamp points from the first sample
+    app.processEvents()
+
+    window = max(1, len(samples) // 10)
+    costs = []
+    start = time.perf_counter()
+    for i, sample in enumerate(samples):
+        t0 = time.perf_counter()
+        screen.receive_data(sample)
+        if frame_every and i % frame_every == 0:
+            app.processEvents()  # let the plot repaint as it would between serial batches
+        costs.append(time.perf_counter() - t0)
+    total = time.perf_counter() - start
+    screen.close()
+    app.processEvents()
+
+    first = sum(costs[:window]) / window * 1e3
+    last = sum(costs[-window:]) / window * 1e3
+    return total, first, last
+
+
+def main():
+    parser = argparse.ArgumentParser(description='BrewScreen long-shot replay benchmark')
+    parser.add_argument('--samples', type=int, default=6000, help='samples in the shot (6000 = 25 min at 4 Hz)')
+    parser.add_argument('--frame-every', type=int, default=0,
+                        help='also repaint every N samples (default 0: time the data path only)')
+    args = parser.parse_args()
+
+    app = QApplication([])
+    samples = synthetic_shot(args.samples)
+
+    print(f"{'curves':<14}{'total s':>10}{'first 10% ms/sample':>22}{'last 10% ms/sample':>21}")
+    for name, screen_class in (("python lists", ListBrewScreen), ("numpy buffers", BrewScreen)):
+        total, first, last = replay(app, screen_class, samples, args.frame_every)
+        print(f"{name:<14}{total:>10.2f}{first:>22.3f}{last:>21.3f}")
+
+
+if __name__ == "__main__":
+    main()
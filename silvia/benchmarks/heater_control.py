@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Closed-loop heater benchmark on the simulated machine
+
+Runs the mock's boiler model on a VirtualClock, either under the firmware's fixed PWM steps
+or under the host TemperatureController sending SET_HEATER_PWM with every sample (with the
+config.py gains, and with an autotune.py profile if one is given), through
+a cold start to the brew setpoint and then a shot. For each it reports overshoot, settle
+time (from START_BREW until the reading stays within the band), steady-state error and the
+worst droop while the shot draws cold water into the boiler.
+
+Run from the silvia directory:
+    python -m benchmarks.heater_control
+    python -m benchmarks.heater_control --target 93 --heatup 600 --seed 3
+    python -m benchmarks.heater_control --profile heater_profile.json
+"""
+
+import argparse
+
+import config
+from serialcom.mock_serial_manager import SerialManager
+from serialcom.sim_clock import VirtualClock
+from serialcom.telemetry_codec import parse_line
+from temperature_controller import TemperatureController
+
+
+def step_response(times, temps, target, band=0.5):
+    """Overshoot (°C above target), settle time (s from times[0]) and mean |error| after settling"""
+    overshoot = max(0.0, max(temps) - target)
+    settled_at = None
+    for t, temp in zip(times, temps):
+        if abs(temp - target) > band:
+            settled_at = None
+        elif settled_at is None:
+            settled_at = t
+    settle_time = None if settled_at is None else settled_at - times[0]
+    after = [abs(temp - target) for t, temp in zip(times, temps) if settled_at is not None and t >= settled_at]
+    steady_error = sum(after) / len(after) if after else None
+    return {'overshoot': overshoot, 'settle_time': settle_time, 'steady_error': steady_error}
+
+
+def run_heatup(controller="pid", target=93.0, heatup=600.0, shot=30.0, seed=1, band=0.5, profile_path=""):
+    """Cold start to target then a shot; returns the step response and the droop during the shot
+
+    The PID uses the config.py gains unless profile_path names an autotune profile.
+    """
+    clock = VirtualClock()
+    serial = SerialManager(clock=clock, seed=seed)
+    temp_controller = TemperatureController(profile_path)
+    temp_controller.set_brew_target(target)
+    if controller != "firmware":
+        temp_controller.heaterDutyChanged.connect(lambda duty: serial.send_command(f"SET_HEATER_PWM {duty}"))
+
+    trace = []
+    def handle(lines):
+        for line in lines:
+            sample = parse_line(line)
+            if sample is None:
+                continue
+            trace.append((clock.now(), sample.temp))
+            temp_controller.update_temperature(sample.temp, sample.millis / 1000.0)
+    serial.lines_received.connect(handle)
+    serial.start()
+
+    serial.send_command(f"SET_TEMP BREW {target}")
+    serial.send_command("START_BREW")
+    temp_controller.set_mode("BREW")
+    clock.advance(heatup)
+    heatup_trace = list(trace)
+
+    serial.send_command("BEGIN_BREW")
+    clock.advance(shot)
+    serial.stop()
+    shot_temps = [temp for t, temp in trace[len(heatup_trace):]]
+
+    result = step_response([t for t, _ in heatup_trace], [temp for _, temp in heatup_trace], target, band)
+    result['shot_droop'] = max(0.0, target - min(shot_temps))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Heater control on the simulated boiler')
+    parser.add_argument('--target', type=float, default=config.DEFAULT_BREW_TEMP)
+    parser.add_argument('--heatup', type=float, default=600.0, help='simulated seconds before the shot')
+    parser.add_argument('--shot', type=float, default=30.0, help='simulated seconds of shot')
+    parser.add_argument('--band', type=float, default=0.5, help='settled within this many °C of the target')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--profile', type=str, default=None, help='also run the PID with this autotune profile')
+    args = parser.parse_args()
+
+    print(f"target {args.target}°C, settle band ±{args.band}°C, {args.heatup:g} s heat-up then a {args.shot:g} s shot")
+    print(f"{'controller':<12}{'overshoot °C':>14}{'settle s':>10}{'steady |err| °C':>17}{'shot droop °C':>15}")
+    runs = [("firmware", ""), ("pid", "")]
+    if args.profile:
+        runs.append(("autotuned", args.profile))
+    for controller, profile_path in runs:
+        r = run_heatup(controller, args.target, args.heatup, args.shot, args.seed, args.band, profile_path)
+        settle = f"{r['settle_time']:.1f}" if r['settle_time'] is not None else "never"
+        steady = f"{r['steady_error']:.2f}" if r['steady_error'] is not None else "-"
+        print(f"{controller:<12}{r['overshoot']:>14.2f}{settle:>10}{steady:>17}{r['shot_droop']:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
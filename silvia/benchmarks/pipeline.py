@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+End-to-end telemetry pipeline benchmark for CoffeeController
+
+A fake Teensy writes DATA lines into a pty at increasing rates; the real SerialManager reads
+them and a headless CoffeeController handles them. Each line carries a sequence number in its
+millis field, so every stage can be attributed to the line that went through it:
+
+    read       byte written to the pty -> batch delivered on the GUI thread
+    parse      parse_line()
+    safety     SafetyManager.check_temperature()
+    log        TelemetryRecorder.append()
+    emit       change-only signal emission to QML
+    end_to_end byte written -> controller done with the sample
+
+A rate is saturated when lines are lost or left unhandled, throughput falls below 95% of the
+offered rate, or end-to-end p99 exceeds the latency budget. Results are printed and written
+as JSON so runs can be compared over time.
+
+Run from the silvia directory:
+    python -m benchmarks.pipeline
+    python -m benchmarks.pipeline --rates 100 1000 5000 --duration 3 --output results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import pty
+import sys
+import tempfile
+import threading
+import time
+import tty
+from datetime import datetime
+
+from PyQt6.QtCore import QCoreApplication, QEventLoop, QTimer
+
+import config
+import qml_backend
+from qml_backend import CoffeeController
+from serialcom.telemetry_codec import parse_line
+from serialcom.real_serial_manager import SerialManager
+
+STAGES = ('read', 'parse', 'safety', 'log', 'emit', 'end_to_end')
+
+
+class LineSource(threading.Thread):
+    """Writes DATA lines into a pty master at a fixed rate, sequence number in the millis field"""
+
+    def __init__(self, master_fd, rate, count, first_seq):
+        super().__init__(daemon=True)
+        self.master_fd = master_fd
+        self.interval = 1.0 / rate
+        self.count = count
+        self.first_seq = first_seq
+        self.sent_at = {}
+
+    def run(self):
+        next_send = time.perf_counter()
+        for seq in range(self.first_seq, self.first_seq + self.count):
+            line = f"DATA:1,92.{seq % 10},0.{seq % 7}0,0.{seq % 5},0,0,1,0,{seq}\n".encode('utf-8')
+            self.sent_at[seq] = time.perf_counter()
+            os.write(self.master_fd, line)
+            next_send += self.interval
+            delay = next_send - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+
+def drain(fd):
+    """Read what the controller writes so the pty never fills up, answering its PINGs so the link stays up"""
+    pending = b""
+    try:
+        while True:
+            chunk = os.read(fd, 4096)
+            if not chunk:
+                break
+            *lines, pending = (pending + chunk).split(b"\n")
+            for line in lines:
+                if line.startswith(b"PING"):
+                    os.write(fd, line.replace(b"PING", b"PONG", 1) + b"\n")
+    except OSError:
+        pass
+
+
+class InstrumentedController(CoffeeController):
+    """CoffeeController reading from the benchmark pty, timestamping each stage per line"""
+
+    def __init__(self, port):
+        self.port = port
+        self.read_at = {}
+        self.done_at = {}
+        self.durations = {stage: {} for stage in ('parse', 'safety', 'log', 'emit')}
+        self._current_seq = None
+        super().__init__()
+        self.start()
+
+        self.safety.check_temperature = self._timed('safety', self.safety.check_temperature)
+        self.recorder.append = self._timed('log', self.recorder.append)
+        # The controller calls the module-level parse_line
+        qml_backend.parse_line = self._timed('parse', parse_line)
+
+    def _create_serial_manager(self):
+        return SerialManager(port=self.port, baud_rate=config.SERIAL_BAUD,
+                             read_mode=config.SERIAL_READ_MODE, read_timeout=config.SERIAL_READ_TIMEOUT,
+                             batch_max_lines=config.SERIAL_BATCH_MAX_LINES,
+                             batch_max_latency_ms=config.SERIAL_BATCH_MAX_LATENCY_MS)
+
+    def _timed(self, stage, fn):
+        durations = self.durations[stage]
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            result = fn(*args, **kwargs)
+            if self._current_seq is not None:
+                durations[self._current_seq] = durations.get(self._current_seq, 0.0) + time.perf_counter() - start
+            return result
+        return wrapper
+
+    def _handle_serial_batch(self, lines):
+        now = time.perf_counter()
+        for line in lines:
+            seq = line.rsplit(',', 1)[-1]
+            if seq.isdigit():
+                self.read_at[int(seq)] = now
+        super()._handle_serial_batch(lines)
+
+    def _handle_serial_data(self, line):
+        seq = line.rsplit(',', 1)[-1]
+        self._current_seq = int(seq) if line.startswith("DATA:") and seq.isdigit() else None
+        super()._handle_serial_data(line)
+
+    def _handle_telemetry(self, sample):
+        super()._handle_telemetry(sample)
+        self.done_at[sample.millis] = time.perf_counter()
+
+    def _emit_if_changed(self, signal, key, value, deadband=0):
+        start = time.perf_counter()
+        super()._emit_if_changed(signal, key, value, deadband)
+        if self._current_seq is not None:
+            emit = self.durations['emit']
+            emit[self._current_seq] = emit.get(self._current_seq, 0.0) + time.perf_counter() - start
+
+
+def percentiles(values_ms):
+    if not values_ms:
+        return {'p50_ms': None, 'p99_ms': None, 'max_ms': None}
+    values_ms = sorted(values_ms)
+    return {
+        'p50_ms': round(values_ms[len(values_ms) // 2], 4),
+        'p99_ms': round(values_ms[max(0, int(len(values_ms) * 0.99) - 1)], 4),
+        'max_ms': round(values_ms[-1], 4),
+    }
+
+
+def run_rate(app, controller, master_fd, rate, duration, first_seq, drain_timeout):
+    count = max(1, int(rate * duration))
+    source = LineSource(master_fd, rate, count, first_seq)
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    source.start()
+
+    # Keep the GUI thread's event loop turning until every line is handled or we give up;
+    # block for events rather than spin so the CPU figure means something
+    tick = QTimer()
+    tick.start(20)
+    last_seq = first_seq + count - 1
+    deadline = None
+    while last_seq not in controller.done_at:
+        app.processEvents(QEventLoop.ProcessEventsFlag.WaitForMoreEvents)
+        if deadline is None and not source.is_alive():
+            deadline = time.perf_counter() + drain_timeout
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+    tick.stop()
+    source.join()
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    seqs = range(first_seq, first_seq + count)
+    handled = [seq for seq in seqs if seq in controller.done_at]
+    stages = {}
+    stages['read'] = percentiles([(controller.read_at[s] - source.sent_at[s]) * 1e3
+                                  for s in handled if s in controller.read_at])
+    for stage in ('parse', 'safety', 'log', 'emit'):
+        durations = controller.durations[stage]
+        stages[stage] = percentiles([durations[s] * 1e3 for s in handled if s in durations])
+    stages['end_to_end'] = percentiles([(controller.done_at[s] - source.sent_at[s]) * 1e3 for s in handled])
+
+    span = (max(controller.done_at[s] for s in handled) - source.sent_at[first_seq]) if handled else wall
+    return {
+        'offered_lines_per_s': rate,
+        'sent': count,
+        'handled': len(handled),
+        'achieved_lines_per_s': round(len(handled) / span, 1) if span > 0 else None,
+        'cpu_percent': round(100.0 * cpu / wall, 1),
+        'stages': stages,
+    }
+
+
+def is_saturated(result, latency_budget_ms):
+    if result['handled'] < result['sent']:
+        return True
+    if result['achieved_lines_per_s'] < 0.95 * result['offered_lines_per_s']:
+        return True
+    return result['stages']['end_to_end']['p99_ms'] > latency_budget_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CoffeeController telemetry pipeline benchmark')
+    parser.add_argument('--rates', type=int, nargs='+',
+                        default=[50, 100, 250, 500, 1000, 2000, 5000, 10000, 20000],
+                        help='offered line rates to step through, lines/s')
+    parser.add_argument('--duration', type=float, default=2.0, help='seconds per rate')
+    parser.add_argument('--latency-budget', type=float, default=250.0,
+                        help='end-to-end p99 above this (ms) counts as saturated (default: one telemetry interval)')
+    parser.add_argument('--drain-timeout', type=float, default=5.0, help='seconds to wait for a backlog to clear')
+    parser.add_argument('--keep-going', action='store_true', help='run every rate, not just up to saturation')
+    parser.add_argument('--output', type=str, default=None,
+                        help='JSON results file (default: benchmarks/results/pipeline_<timestamp>.json)')
+    args = parser.parse_args()
+
+    app = QCoreApplication(sys.argv)
+
+    master_fd, slave_fd = pty.openpty()
+    tty.setraw(slave_fd)
+
+    # Keep the controller's log and recorder files out of the working tree
+    workdir = tempfile.mkdtemp(prefix="silvia_pipeline_")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        controller = InstrumentedController(os.ttyname(slave_fd))
+    finally:
+        os.chdir(cwd)
+    threading.Thread(target=drain, args=(master_fd,), daemon=True).start()
+
+    # Announce the board as its setup() does, and wait for the controller to take the link up
+    os.write(master_fd, b"READY\n")
+    deadline = time.perf_counter() + 5.0
+    while not controller.connected and time.perf_counter() < deadline:
+        app.processEvents(QEventLoop.ProcessEventsFlag.WaitForMoreEvents, 20)
+    if not controller.connected:
+        sys.exit("Controller did not connect to the benchmark pty")
+
+    results = []
+    saturation = None
+    first_seq = 1
+    print(f"{'offered/s':>10}{'handled':>12}{'achieved/s':>12}{'cpu %':>8}  "
+          + "".join(f"{stage + ' p50/p99 ms':>24}" for stage in STAGES))
+    for rate in args.rates:
+        result = run_rate(app, controller, master_fd, rate, args.duration, first_seq, args.drain_timeout)
+        first_seq += result['sent']
+        result['saturated'] = is_saturated(result, args.latency_budget)
+        results.append(result)
+
+        cells = "".join(f"{stage['p50_ms'] or 0:>12.3f}/{stage['p99_ms'] or 0:<11.3f}"
+                        for stage in (result['stages'][name] for name in STAGES))
+        print(f"{rate:>10}{result['handled']:>6}/{result['sent']:<5}{result['achieved_lines_per_s'] or 0:>12.0f}"
+              f"{result['cpu_percent']:>8.1f}  {cells}{'  SATURATED' if result['saturated'] else ''}")
+
+        if result['saturated'] and saturation is None:
+            saturation = rate
+            if not args.keep_going:
+                break
+
+    sustained = [r['offered_lines_per_s'] for r in results if not r['saturated']]
+    summary = {
+        'benchmark': 'pipeline',
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {
+            'serial_read_mode': config.SERIAL_READ_MODE,
+            'serial_batch_max_lines': config.SERIAL_BATCH_MAX_LINES,
+            'serial_batch_max_latency_ms': config.SERIAL_BATCH_MAX_LATENCY_MS,
+            'duration_s': args.duration,
+            'latency_budget_ms': args.latency_budget,
+        },
+        'max_sustained_lines_per_s': max(sustained) if sustained else None,
+        'saturation_lines_per_s': saturation,
+        'rates': results,
+    }
+    print(f"\nmax sustained: {summary['max_sustained_lines_per_s']} lines/s, "
+          f"saturated at: {saturation or 'not reached'}")
+
+    output = args.output
+    if output is None:
+        results_dir = os.path.join(os.path.dirname(__file__), "results")
+        os.makedirs(results_dir, exist_ok=True)
+        output = os.path.join(results_dir, f"pipeline_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(output, 'w') as f:
+        json.dump(summary, f, indent=1)
+    print(f"results written to {output}")
+
+    controller._shutdown()
+    os.close(master_fd)
+    os.close(slave_fd)
+
+
+if __name__ == "__main__":
+    main()
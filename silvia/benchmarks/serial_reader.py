@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Serial reader latency/CPU benchmark against a pty-based fake Teensy
+
+Run from the silvia directory:
+    python -m benchmarks.serial_reader
+"""
+
+import argparse
+import os
+import pty
+import statistics
+import threading
+import time
+import tty
+
+import serial
+from PyQt6.QtCore import Qt
+from serialcom.real_serial_manager import SerialReaderThread
+
+
+class FakeTeensy(threading.Thread):
+    """Writes DATA lines into a pty master at a fixed rate, tagging each with a sequence number"""
+
+    def __init__(self, master_fd, interval, count):
+        super().__init__(daemon=True)
+        self.master_fd = master_fd
+        self.interval = interval
+        self.count = count
+        self.sent_at = {}
+
+    def run(self):
+        next_send = time.perf_counter()
+        for seq in range(self.count):
+            line = f"DATA:3,93.0,9.00,18.5,80,1,1,12,{seq}\n".encode('utf-8')
+            self.sent_at[seq] = time.perf_counter()
+            os.write(self.master_fd, line)
+            next_send += self.interval
+            delay = next_send - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+
+def run_mode(mode, interval, count):
+    master_fd, slave_fd = pty.openpty()
+    tty.setraw(slave_fd)
+    port = serial.Serial(os.ttyname(slave_fd), baudrate=115200, timeout=1)
+
+    received_at = {}
+
+    def on_lines(lines):
+        now = time.perf_counter()
+        for line in lines:
+            received_at[int(line.rsplit(',', 1)[1])] = now
+
+    reader = SerialReaderThread(port, mode=mode)
+    # Direct connection so timestamps are taken in the reader thread, not after an event loop hop
+    reader.lines_received.connect(on_lines, Qt.ConnectionType.DirectConnection)
+    reader.start()
+    time.sleep(0.2)
+
+    teensy = FakeTeensy(master_fd, interval, count)
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    teensy.start()
+    teensy.join()
+    time.sleep(0.1)
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    reader.stop()
+    port.close()
+    os.close(master_fd)
+    os.close(slave_fd)
+
+    latencies = sorted((received_at[seq] - sent) * 1000.0
+                       for seq, sent in teensy.sent_at.items() if seq in received_at)
+    return {
+        'mode': mode,
+        'received': len(latencies),
+        'sent': count,
+        'p50_ms': statistics.median(latencies) if latencies else float('nan'),
+        'p99_ms': latencies[int(len(latencies) * 0.99) - 1] if latencies else float('nan'),
+        'max_ms': latencies[-1] if latencies else float('nan'),
+        'cpu_percent': 100.0 * cpu / wall,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serial reader latency/CPU benchmark')
+    parser.add_argument('--interval', type=float, default=0.25, help='Seconds between lines (default: TELEMETRY_INTERVAL)')
+    parser.add_argument('--count', type=int, default=40, help='Lines to send per mode')
+    args = parser.parse_args()
+
+    print(f"{'mode':<10}{'recv':>8}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}{'cpu %':>8}")
+    for mode in ("polling", "blocking"):
+        r = run_mode(mode, args.interval, args.count)
+        print(f"{r['mode']:<10}{r['received']:>4}/{r['sent']:<3}{r['p50_ms']:>10.3f}{r['p99_ms']:>10.3f}"
+              f"{r['max_ms']:>10.3f}{r['cpu_percent']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+DATA line parsing micro-benchmark: previous inline parser vs serialcom.telemetry_codec
+
+parse_line() is what the live path runs, and is about level with the old inline code, whose
+cost was already the split() and the number conversions; the codec is about the typed sample,
+not speed. parse_many() is only used on whole captures.
+
+Run from the silvia directory:
+    python -m benchmarks.telemetry_parse
+"""
+
+import argparse
+import random
+import time
+
+from serialcom.telemetry_codec import parse_line, parse_many
+
+
+def legacy_parse(line):
+    """The parsing steps CoffeeController._handle_serial_data used to do inline"""
+    data_part = line[5:]
+    parts = data_part.split(',')
+    if len(parts) >= 7:
+        state_num = int(parts[0])
+        temp = float(parts[1])
+        pressure = float(parts[2])
+        weight = float(parts[3])
+        pump_percent = int(parts[4])
+        valve = int(parts[5])
+        heater = int(parts[6])
+        brew_time = int(parts[7]) if len(parts) > 7 else 0
+        state_names = ["IDLE", "HEATING_BREW", "HEATING_STEAM", "BREWING", "STEAMING", "FLUSHING"]
+        state = state_names[state_num] if state_num < len(state_names) else "UNKNOWN"
+        return state, temp, pressure, weight, pump_percent, valve, heater, brew_time
+
+
+def synthetic_lines(count, seed=1):
+    rng = random.Random(seed)
+    return [f"DATA:{rng.randint(0, 5)},{rng.uniform(20, 140):.1f},{rng.uniform(0, 12):.2f},"
+            f"{rng.uniform(-1, 50):.1f},{rng.randint(0, 100)},{rng.randint(0, 1)},{rng.randint(0, 1)},{rng.randint(0, 60)}"
+            for _ in range(count)]
+
+
+def best_times(repeats, candidates):
+    """Best wall time per candidate; candidates are interleaved so machine noise hits them all alike"""
+    best = {name: float('inf') for name, _ in candidates}
+    for _ in range(repeats):
+        for name, fn in candidates:
+            start = time.perf_counter()
+            fn()
+            best[name] = min(best[name], time.perf_counter() - start)
+    return [(name, best[name]) for name, _ in candidates]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='DATA line parsing micro-benchmark')
+    parser.add_argument('--lines', type=int, default=100000)
+    parser.add_argument('--repeats', type=int, default=9)
+    args = parser.parse_args()
+
+    lines = synthetic_lines(args.lines)
+    results = best_times(args.repeats, [
+        ("legacy inline", lambda: [legacy_parse(line) for line in lines]),
+        ("parse_line", lambda: [parse_line(line) for line in lines]),
+        ("parse_many", lambda: parse_many(lines)),
+    ])
+
+    baseline = results[0][1]
+    print(f"{'parser':<16}{'lines/s':>14}{'speedup':>10}")
+    for name, elapsed in results:
+        print(f"{name:<16}{args.lines / elapsed:>14,.0f}{baseline / elapsed:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
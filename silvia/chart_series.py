@@ -0,0 +1,141 @@
+from array import array
+from collections import deque
+from PyQt6.QtCore import QAbstractListModel, QModelIndex, Qt, pyqtSignal, pyqtSlot, pyqtProperty
+
+class RingSeries(QAbstractListModel):
+    """Fixed-capacity (time, value) series for the QML charts
+
+    Points live in preallocated arrays used as a ring buffer, so a long shot never grows memory.
+    Min/max are kept incrementally with monotonic deques, O(1) amortised per append, so the
+    charts never rescan the history to find their scale.
+    """
+    TimeRole = Qt.ItemDataRole.UserRole + 1
+    ValueRole = Qt.ItemDataRole.UserRole + 2
+
+    appended = pyqtSignal(int)  # logical row of the new point
+    cleared = pyqtSignal()
+    countChanged = pyqtSignal()
+    rangeChanged = pyqtSignal()
+
+    def __init__(self, capacity=1200, parent=None):
+        super().__init__(parent)
+        self._capacity = capacity
+        self._times = array('d', bytes(8 * capacity))
+        self._values = array('d', bytes(8 * capacity))
+        self._head = 0  # physical slot of the oldest point
+        self._count = 0
+        self._total = 0  # points appended since the last clear, also the sequence number of the next one
+
+        # (sequence, value) pairs with values kept monotonic, front is the current extreme
+        self._max_window = deque()
+        self._min_window = deque()
+
+    # --- QAbstractListModel ---------------------------------------------------------------
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._count
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < self._count:
+            return None
+        slot = (self._head + index.row()) % self._capacity
+        if role == self.TimeRole:
+            return self._times[slot]
+        if role in (self.ValueRole, Qt.ItemDataRole.DisplayRole):
+            return self._values[slot]
+        return None
+
+    def roleNames(self):
+        return {self.TimeRole: b'time', self.ValueRole: b'value'}
+
+    # --- Writing --------------------------------------------------------------------------
+
+    def append(self, time, value):
+        if self._count == self._capacity:
+            self._evict_oldest()
+
+        slot = (self._head + self._count) % self._capacity
+        row = self._count
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._times[slot] = time
+        self._values[slot] = value
+        self._count += 1
+        self.endInsertRows()
+
+        seq = self._total
+        self._total += 1
+        old_min, old_max = self.minValue, self.maxValue
+        while self._max_window and self._max_window[-1][1] <= value:
+            self._max_window.pop()
+        self._max_window.append((seq, value))
+        while self._min_window and self._min_window[-1][1] >= value:
+            self._min_window.pop()
+        self._min_window.append((seq, value))
+
+        self.countChanged.emit()
+        if (old_min, old_max) != (self.minValue, self.maxValue):
+            self.rangeChanged.emit()
+        self.appended.emit(row)
+
+    @pyqtSlot()
+    def clear(self):
+        self.beginResetModel()
+        self._head = 0
+        self._count = 0
+        self._total = 0
+        self._max_window.clear()
+        self._min_window.clear()
+        self.endResetModel()
+        self.countChanged.emit()
+        self.rangeChanged.emit()
+        self.cleared.emit()
+
+    def _evict_oldest(self):
+        evicted_seq = self._total - self._count
+        self.beginRemoveRows(QModelIndex(), 0, 0)
+        self._head = (self._head + 1) % self._capacity
+        self._count -= 1
+        self.endRemoveRows()
+        if self._max_window and self._max_window[0][0] == evicted_seq:
+            self._max_window.popleft()
+        if self._min_window and self._min_window[0][0] == evicted_seq:
+            self._min_window.popleft()
+
+    # --- QML access -----------------------------------------------------------------------
+
+    @pyqtSlot(int, result=float)
+    def timeAt(self, row):
+        return self._times[(self._head + row) % self._capacity]
+
+    @pyqtSlot(int, result=float)
+    def valueAt(self, row):
+        return self._values[(self._head + row) % self._capacity]
+
+    @pyqtProperty(int, notify=countChanged)
+    def count(self):
+        return self._count
+
+    @pyqtProperty(int, constant=True)
+    def capacity(self):
+        return self._capacity
+
+    @pyqtProperty(int, notify=countChanged)
+    def total(self):
+        """Points appended since the last clear; exceeds count once old points were evicted"""
+        return self._total
+
+    @pyqtProperty(float, notify=countChanged)
+    def firstTime(self):
+        return self._times[self._head] if self._count else 0.0
+
+    @pyqtProperty(float, notify=countChanged)
+    def lastTime(self):
+        return self._times[(self._head + self._count - 1) % self._capacity] if self._count else 0.0
+
+    @pyqtProperty(float, notify=rangeChanged)
+    def minValue(self):
+        return self._min_window[0][1] if self._min_window else 0.0
+
+    @pyqtProperty(float, notify=rangeChanged)
+    def maxValue(self):
+        return self._max_window[0][1] if self._max_window else 0.0
@@ -2,8 +2,29 @@
 
 # Serial Communication Settings
 USE_MOCK_SERIAL = True  # Set to False when connecting to real hardware
+MOCK_SEED = None  # seed for the mock's simulated sensor noise; None for a different run every time
+SERIAL_REPLAY_FILE = None  # play back a logs/silvia_*.log or logs/telemetry_*.bin instead of connecting
+SERIAL_REPLAY_SPEED = 1.0  # 1.0 original timing, 2.0 twice as fast, 0 as fast as possible
+SERIAL_REPLAY_LOOP = False  # start the recording over when it ends
 SERIAL_PORT = None  # Auto-detect if None, or specify like "COM3" on Windows
 SERIAL_BAUD = 115200
+SERIAL_READ_MODE = "blocking"  # "blocking" (chunked reads) or "polling" (legacy 10 ms in_waiting loop)
+SERIAL_READ_TIMEOUT = 0.1  # seconds a blocking read waits before re-checking for shutdown
+SERIAL_BATCH_MAX_LINES = 32  # lines_received flushes once this many lines are pending...
+SERIAL_BATCH_MAX_LATENCY_MS = 20  # ...or once the oldest pending line is this old
+TELEMETRY_PROTOCOL = "ascii"  # "ascii" (DATA: lines) or "binary" (CRC-checked frames, negotiated with PROTO BIN)
+COMMAND_TIMEOUT = 1.0  # seconds to wait for the reply to a command before reporting it lost
+CONNECT_READY_TIMEOUT = 5.0  # seconds after opening the port to hear READY (or a PONG) before retrying
+CONNECT_PROBE_INTERVAL = 1.0  # PING while waiting, for a board that did not reset on open
+CONNECT_BACKOFF_INITIAL = 1.0  # seconds before the first retry, doubling with each failure...
+CONNECT_BACKOFF_MAX = 30.0  # ...up to this
+CONNECT_HOTPLUG_INTERVAL = 0.5  # seconds between /dev/serial/by-id checks while waiting, to retry as soon as a board is plugged in
+PORT_RESCAN_INTERVAL = 5.0  # minimum seconds between full port enumerations where there is no /dev/serial/by-id to watch
+LINK_PING_INTERVAL = 5.0  # seconds between watchdog PINGs
+LINK_RTT_WINDOW = 24  # PING round trips kept for p50/p95/max (two minutes at the PING interval)
+LINK_DEGRADED_RTT_MS = 250.0  # link reported degraded while the p95 round trip is above this...
+LINK_LOST_MISSED = 3  # ...or a PING went unanswered, and lost after this many in a row
+LINK_LOG_EVERY = 12  # PINGs between LINK lines in the log
 
 # Temperature Settings
 DEFAULT_BREW_TEMP = 93.0
@@ -13,12 +34,34 @@ MAX_BREW_TEMP = 110.0
 MIN_STEAM_TEMP = 110.0
 MAX_STEAM_TEMP = 150.0
 
+# Heater control: a PID on the host, stepped per sample, sends its duty with SET_HEATER_PWM.
+# With host control off the firmware's fixed PWM steps run the heater on their own.
+HEATER_HOST_CONTROL = True
+HEATER_PID_KP = 80.0  # PWM per °C
+HEATER_PID_KI = 0.5  # PWM per °C·s
+HEATER_PID_KD = 50.0  # PWM per °C/s
+HEATER_PID_DERIVATIVE_FILTER = 1.0  # s
+HEATER_FEED_FORWARD = 0.2  # PWM per °C of setpoint above ambient, what holds the boiler against its losses
+AMBIENT_TEMP = 22.0  # °C
+HEATER_PROFILE = "heater_profile.json"  # gains from autotune.py, used over the values above when present
+
 # Safety Settings
 MAX_BREW_TIME = 300  # seconds
 MAX_STEAM_TIME = 600  # seconds
 COMM_TIMEOUT = 10.0  # seconds
 
+# Logging Settings
+LOG_QUEUE_SIZE = 10000  # records buffered for the log writer thread before new ones are dropped
+LOG_FLUSH_INTERVAL = 1.0  # seconds between log file flushes (errors are flushed immediately)
+
 # UI Settings
 WINDOW_WIDTH = 800
 WINDOW_HEIGHT = 480
-FULLSCREEN = False  # Set to True for touchscreen deployment
\ No newline at end of file
+CHART_CAPACITY = 1200  # points kept per live chart (MAX_BREW_TIME at the 250 ms telemetry rate)
+CHART_MAX_FPS = 20  # upper bound on live chart repaints per second
+FULLSCREEN = False  # Set to True for touchscreen deployment
+
+# Telemetry to QML: readings closer than this to the last value sent are not re-emitted
+EMIT_DEADBAND_TEMP = 0.1  # °C
+EMIT_DEADBAND_PRESSURE = 0.05  # bar
+EMIT_DEADBAND_WEIGHT = 0.1  # g
\ No newline at end of file
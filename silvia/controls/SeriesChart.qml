@@ -0,0 +1,150 @@
+import QtQuick
+
+// Line chart over a RingSeries model from the backend.
+// Only the segments appended since the last paint are drawn; the full history is redrawn
+// only when the scale has to grow, the series was cleared or wrapped, or the canvas resized.
+// With a scheduler set, repaints happen on its capped frame signal instead of on every append.
+Canvas {
+    id: chart
+
+    property var series
+    property var scheduler: null
+    property color lineColor: "#27ae60"
+    property string unit: ""
+    property real currentValue: 0
+
+    property real maxValue: 1
+    property real maxTime: 10
+    property int drawnTotal: 0          // series.total when we last painted
+    property bool fullRedraw: true
+    property real markerTime: 0         // last point painted, so the marker moves with the frames
+    property real markerValue: 0
+
+    function xFor(t) { return (t / maxTime) * width }
+    function yFor(v) { return height - (v / maxValue) * height }
+
+    function rescale() {
+        var grew = false
+        if (series.maxValue > maxValue) {
+            maxValue = Math.max(series.maxValue * 1.1, 1)
+            grew = true
+        }
+        if (series.lastTime > maxTime) {
+            maxTime = Math.max(series.lastTime * 1.1, 10)
+            grew = true
+        }
+        return grew
+    }
+
+    // Nothing new on screen since the last paint
+    function upToDate() {
+        return !fullRedraw && series && series.total === drawnTotal
+    }
+
+    function invalidate() {
+        if (scheduler)
+            scheduler.markDirty()
+        else
+            requestPaint()
+    }
+
+    onWidthChanged: { fullRedraw = true; invalidate() }
+    onHeightChanged: { fullRedraw = true; invalidate() }
+    // Appends while hidden were skipped, catch up when shown again
+    onVisibleChanged: if (visible && !upToDate()) requestPaint()
+
+    onPaint: {
+        if (!series)
+            return
+        var started = Date.now()
+        var ctx = getContext("2d")
+        var count = series.count
+        var newPoints = series.total - drawnTotal
+
+        // Evicted points shift every row, so a wrapped ring needs a full redraw as well
+        if (rescale() || newPoints < 0 || (count === series.capacity && newPoints > 0))
+            fullRedraw = true
+
+        var from
+        if (fullRedraw) {
+            ctx.clearRect(0, 0, width, height)
+
+            // Draw grid
+            ctx.strokeStyle = "#7f8c8d"
+            ctx.lineWidth = 0.5
+            for (var i = 0; i <= 5; i++) {
+                var y = (height / 5) * i
+                ctx.beginPath()
+                ctx.moveTo(0, y)
+                ctx.lineTo(width, y)
+                ctx.stroke()
+            }
+            from = 0
+            fullRedraw = false
+        } else {
+            // Continue the line from the last point already on the canvas
+            from = Math.max(count - newPoints - 1, 0)
+        }
+
+        if (count - from > 1) {
+            ctx.strokeStyle = lineColor
+            ctx.lineWidth = 2
+            ctx.beginPath()
+            ctx.moveTo(xFor(series.timeAt(from)), yFor(series.valueAt(from)))
+            for (var j = from + 1; j < count; j++)
+                ctx.lineTo(xFor(series.timeAt(j)), yFor(series.valueAt(j)))
+            ctx.stroke()
+        }
+        drawnTotal = series.total
+        if (count > 0) {
+            markerTime = series.timeAt(count - 1)
+            markerValue = series.valueAt(count - 1)
+        }
+        if (scheduler)
+            scheduler.reportFrame(Date.now() - started)
+    }
+
+    Connections {
+        target: chart.series
+        function onAppended() {
+            if (!chart.scheduler)
+                chart.requestPaint()
+        }
+        function onCleared() {
+            chart.maxValue = 1
+            chart.maxTime = 10
+            chart.drawnTotal = 0
+            chart.fullRedraw = true
+            chart.invalidate()
+        }
+    }
+
+    Connections {
+        target: chart.scheduler
+        function onFrame() {
+            if (chart.visible && !chart.upToDate())
+                chart.requestPaint()
+        }
+    }
+
+    // Current point, moved rather than painted so old markers never need erasing
+    Rectangle {
+        visible: chart.drawnTotal > 0
+        width: 6
+        height: 6
+        radius: 3
+        color: chart.lineColor
+        x: chart.xFor(chart.markerTime) - 3
+        y: chart.yFor(chart.markerValue) - 3
+    }
+
+    // Current value
+    Text {
+        x: 5
+        y: 0
+        text: chart.currentValue.toFixed(1) + " " + chart.unit
+        color: "white"
+        font.family: "Arial"
+        font.pixelSize: 20
+    }
+}
@@ -1,63 +1,166 @@
 import logging
+import logging.handlers
 import os
+import queue
+import time
 from datetime import datetime
 from PyQt6.QtCore import QObject
+import config
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Never blocks the caller: records that do not fit in the queue are counted and dropped"""
+
+    def __init__(self, record_queue):
+        super().__init__(record_queue)
+        self.queued = 0
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Leave message formatting to the writer thread; our args are plain numbers and strings
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+            self.queued += 1
+        except queue.Full:
+            self.dropped += 1
+
+class _PeriodicFlushFileHandler(logging.FileHandler):
+    """Buffers writes and flushes at most every flush_interval, except for errors"""
+
+    def __init__(self, filename, flush_interval):
+        super().__init__(filename)
+        self.flush_interval = flush_interval
+        self._last_flush = time.monotonic()
+
+    def emit(self, record):
+        super().emit(record)
+        if record.levelno >= logging.ERROR:
+            self.flush_now()
+
+    def flush(self):
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush_now()
+
+    def flush_now(self):
+        self._last_flush = time.monotonic()
+        super().flush()
+
+class _FlushingQueueListener(logging.handlers.QueueListener):
+    """Writer thread that also flushes its handlers whenever the queue goes quiet"""
+
+    def __init__(self, record_queue, *handlers, flush_interval=1.0):
+        super().__init__(record_queue, *handlers, respect_handler_level=True)
+        self.flush_interval = flush_interval
+
+    def dequeue(self, block):
+        while True:
+            try:
+                return self.queue.get(block, timeout=self.flush_interval)
+            except queue.Empty:
+                for handler in self.handlers:
+                    getattr(handler, 'flush_now', handler.flush)()
+
+    def enqueue_sentinel(self):
+        # Block rather than drop: the sentinel must arrive so stop() drains everything queued before it
+        self.queue.put(self._sentinel)
 
 class DataLogger(QObject):
     def __init__(self):
         super().__init__()
-        
+
         # Create logs directory
         log_dir = "logs"
         os.makedirs(log_dir, exist_ok=True)
-        
+
         # Setup main logger
         self.logger = logging.getLogger('silvia_coffee')
         self.logger.setLevel(logging.INFO)
-        
+
         # File handler with timestamp
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         log_file = os.path.join(log_dir, f"silvia_{timestamp}.log")
-        
-        file_handler = logging.FileHandler(log_file)
+
+        file_handler = _PeriodicFlushFileHandler(log_file, config.LOG_FLUSH_INTERVAL)
         file_handler.setLevel(logging.INFO)
-        
+
         # Console handler for debugging
         console_handler = logging.StreamHandler()
         console_handler.setLevel(logging.WARNING)
-        
+
         # Formatter
         formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
         file_handler.setFormatter(formatter)
         console_handler.setFormatter(formatter)
-        
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(console_handler)
-        
+
+        # Callers only enqueue; formatting and disk I/O happen on the listener thread
+        self.queue = queue.Queue(maxsize=config.LOG_QUEUE_SIZE)
+        self.queue_handler = _DroppingQueueHandler(self.queue)
+        self.listener = _FlushingQueueListener(self.queue, file_handler, console_handler,
+                                               flush_interval=config.LOG_FLUSH_INTERVAL)
+        self.listener.start()
+        self.stopped = False
+
+        self.logger.addHandler(self.queue_handler)
+
         self.logger.info("=== Silvia Coffee Machine Started ===")
-        
+
     def log_sensor_data(self, temp, pressure, weight, state, pump_pwm):
-        self.logger.info(f"SENSORS: T={temp}°C P={pressure}bar W={weight}g S={state} PWM={pump_pwm}")
-        
+        self.logger.info("SENSORS: T=%s°C P=%sbar W=%sg S=%s PWM=%s", temp, pressure, weight, state, pump_pwm)
+
     def log_command(self, command):
-        self.logger.info(f"CMD_SENT: {command}")
-        
+        self.logger.info("CMD_SENT: %s", command)
+
     def log_response(self, response):
-        self.logger.info(f"CMD_RECV: {response}")
-        
+        self.logger.info("CMD_RECV: %s", response)
+
     def log_error(self, error_msg):
-        self.logger.error(f"ERROR: {error_msg}")
-        
+        self.logger.error("ERROR: %s", error_msg)
+
     def log_warning(self, warning_msg):
-        self.logger.warning(f"WARNING: {warning_msg}")
-        
+        self.logger.warning("WARNING: %s", warning_msg)
+
     def log_safety_event(self, event):
-        self.logger.critical(f"SAFETY: {event}")
-        
+        self.logger.critical("SAFETY: %s", event)
+
     def log_brew_session(self, duration, final_weight, max_pressure):
-        self.logger.info(f"BREW_COMPLETE: Duration={duration}s Weight={final_weight}g MaxPressure={max_pressure}bar")
-        
+        self.logger.info("BREW_COMPLETE: Duration=%ss Weight=%sg MaxPressure=%sbar", duration, final_weight, max_pressure)
+
+    def log_chart_stats(self, stats):
+        self.logger.info("CHART: fps=%s paint_avg=%sms paint_max=%sms frames=%s requests=%s",
+                         stats['fps'], stats['paint_ms_avg'], stats['paint_ms_max'],
+                         stats['frames'], stats['requests'])
+
+    def log_link_stats(self, stats):
+        self.logger.info("LINK: health=%s rtt_p50=%sms rtt_p95=%sms rtt_max=%sms pongs=%s missed=%s histogram=%s",
+                         stats['health'], stats['rtt_p50_ms'], stats['rtt_p95_ms'], stats['rtt_max_ms'],
+                         stats['pongs'], stats['missed'],
+                         " ".join(f"<={edge}:{count}" for edge, count in stats['histogram'].items()))
+
+    def log_emit_stats(self, emitted, suppressed):
+        total = emitted + suppressed
+        self.logger.info("QML_SIGNALS: emitted=%s suppressed=%s (%.0f%% saved)",
+                         emitted, suppressed, 100.0 * suppressed / total if total else 0.0)
+
+    def get_stats(self):
+        """Records handed to the writer thread, dropped because the queue was full, and still waiting"""
+        return {
+            'queued': self.queue_handler.queued,
+            'dropped': self.queue_handler.dropped,
+            'pending': self.queue.qsize(),
+        }
+
     def shutdown(self):
-        self.logger.info("=== Silvia Coffee Machine Shutdown ===")
-        for handler in self.logger.handlers:
-            handler.close()
\ No newline at end of file
+        if self.stopped:
+            return
+        self.stopped = True
+        stats = self.get_stats()
+        self.logger.info("=== Silvia Coffee Machine Shutdown === (queued=%s dropped=%s)",
+                         stats['queued'], stats['dropped'])
+        self.logger.removeHandler(self.queue_handler)
+
+        # Drains every record queued so far, then joins the writer thread
+        self.listener.stop()
+        for handler in self.listener.handlers:
+            handler.close()
@@ -10,6 +10,7 @@ from gui.screens.steam_screen import SteamScreen
 from gui.screens.flush_screen import FlushScreen
 
 from gui.screens.settings_screen import SettingsScreen
+from gui.telemetry_hub import TelemetryHub
 
 
 
@@ -51,6 +52,11 @@ class MainWindow(QMainWindow):
         # Pass temperature settings to screens
         self.settings_screen.set_initial_temps(self.brew_temp, self.steam_temp)
         
+        # Serial input is parsed once here and delivered to the visible screen only
+        self.telemetry = TelemetryHub(self.serial, self.stack)
+        for screen in (self.home_screen, self.brew_screen, self.steam_screen, self.flush_screen):
+            self.telemetry.add_screen(screen)
+        
         # Connect HomeScreen button to switch to BrewScreen
         self.home_screen.brew_btn.clicked.connect(self.show_brew_screen)
         self.home_screen.steam_button.clicked.connect(self.show_steam_screen)
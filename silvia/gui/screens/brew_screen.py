@@ -119,8 +119,12 @@
 from PyQt6.QtWidgets import QWidget, QLabel, QPushButton, QVBoxLayout, QHBoxLayout
 from PyQt6.QtCore import QTimer
 import time
+import numpy as np
 import pyqtgraph as pg
 
+# Initial plot buffer size in samples; doubled whenever a shot outgrows it
+PLOT_BUFFER_SIZE = 1024
+
 class BrewScreen(QWidget):
     def __init__(self, serial, on_back):
         super().__init__()
@@ -151,24 +155,21 @@ class BrewScreen(QWidget):
         self.plot_widget.setYRange(0, 16)
         self.plot_widget.setLabel('left', 'Sensor Values')
         self.plot_widget.setLabel('bottom', 'Time', units='s')
-        self.weight_curve = self.plot_widget.plot(pen='g', name="Weight")
-        self.pressure_curve = self.plot_widget.plot(pen='r', name="Pressure")
+        # Only draw what is on screen, decimated to roughly one point per pixel column
+        self.plot_widget.setDownsampling(auto=True, mode='peak')
+        self.plot_widget.setClipToView(True)
+        self.weight_curve = self.plot_widget.plot(pen='g', name="Weight", skipFiniteCheck=True)
+        self.pressure_curve = self.plot_widget.plot(pen='r', name="Pressure", skipFiniteCheck=True)
 
         self.start_time = None
         self.timer = QTimer()
         self.timer.timeout.connect(self.update_time)
 
-        self.sim_timer = QTimer()  # Used if mocking data
-        self.sim_timer.timeout.connect(lambda: self.receive_data("WEIGHT:20.5g PRESSURE:8.2bar"))
-
-        self.data_time = []
-        self.data_weight = []
-        self.data_pressure = []
-
-        # 🔌 Connect to incoming serial data (real or mock)
-        # self.serial.data_received.connect(self.receive_data)
-        self.serial.line_received.connect(self.receive_data)
+        # Rows are time, weight, pressure; the curves are handed views of the first data_count columns
+        self.data = np.empty((3, PLOT_BUFFER_SIZE))
+        self.data_count = 0
 
+        # Telemetry arrives from the TelemetryHub through receive_data()
 
         # Layout
         info_layout = QVBoxLayout()
@@ -193,19 +194,17 @@ class BrewScreen(QWidget):
         
         # Step 2: Start brewing sequence
         self.start_time = time.time()
-        self.data_time.clear()
-        self.data_weight.clear()
-        self.data_pressure.clear()
+        self.data_count = 0
+        self.weight_curve.setData()
+        self.pressure_curve.setData()
         
         # Step 3: Turn on valve and start pump
         self.serial.send_command("BEGIN_BREW")
         self.timer.start(1000)
-        self.sim_timer.start(1000)  # Simulate data if using mock serial
 
     def stop_brew(self):
         self.serial.send_command("STOP_BREW")
         self.timer.stop()
-        self.sim_timer.stop()
         self.timer_label.setText("Time: 00:00")
 
     def update_time(self):
@@ -215,35 +214,26 @@ class BrewScreen(QWidget):
             seconds = elapsed % 60
             self.timer_label.setText(f"Time: {minutes:02}:{seconds:02}")
 
-    def receive_data(self, line):
-        parts = line.split()
-        temp, pwm = 92, 75  # Simulated fixed values for now
-        weight = pressure = None
-
-        for part in parts:
-            if part.startswith("WEIGHT:"):
-                try:
-                    weight = float(part.split(":")[1].replace("g", ""))
-                except:
-                    pass
-            elif part.startswith("PRESSURE:"):
-                try:
-                    pressure = float(part.split(":")[1].replace("bar", ""))
-                except:
-                    pass
-
-        self.temp_label.setText(f"Temperature: {temp} °C")
-        self.pump_label.setText(f"Pump Power: {pwm} %")
-
-        if weight is not None:
-            self.weight_label.setText(f"Weight: {weight:.1f} g")
-        if pressure is not None:
-            self.pressure_label.setText(f"Pressure: {pressure:.1f} bar")
-
-        if self.start_time and weight is not None and pressure is not None:
-            t = time.time() - self.start_time
-            self.data_time.append(t)
-            self.data_weight.append(weight)
-            self.data_pressure.append(pressure)
-            self.weight_curve.setData(self.data_time, self.data_weight)
-            self.pressure_curve.setData(self.data_time, self.data_pressure)
+    def receive_data(self, sample):
+        # Called by the TelemetryHub while this screen is visible
+        self.temp_label.setText(f"Temperature: {sample.temp:.1f} °C")
+        self.pump_label.setText(f"Pump Power: {sample.pump} %")
+        self.weight_label.setText(f"Weight: {sample.weight:.1f} g")
+        self.pressure_label.setText(f"Pressure: {sample.pressure:.1f} bar")
+
+        if self.start_time:
+            self.append_point(time.time() - self.start_time, sample.weight, sample.pressure)
+
+    def append_point(self, t, weight, pressure):
+        n = self.data_count
+        if n == self.data.shape[1]:
+            grown = np.empty((3, 2 * n))
+            grown[:, :n] = self.data
+            self.data = grown
+        self.data[:, n] = (t, weight, pressure)
+        self.data_count = n + 1
+
+        # Views, not copies: pyqtgraph uses float64 arrays as given
+        t_view = self.data[0, :n + 1]
+        self.weight_curve.setData(t_view, self.data[1, :n + 1])
+        self.pressure_curve.setData(t_view, self.data[2, :n + 1])
@@ -67,8 +67,6 @@ class FlushScreen(QWidget):
         self.timer.timeout.connect(self.update_timer)
         self.start_time = None
 
-        self.serial.line_received.connect(self.receive_data)
-
         layout = QVBoxLayout()
         layout.addWidget(self.temp_label)
         layout.addWidget(self.timer_label)
@@ -97,10 +95,6 @@ class FlushScreen(QWidget):
             seconds = elapsed % 60
             self.timer_label.setText(f"Time: {minutes:02}:{seconds:02}")
 
-    def receive_data(self, line: str):
-        if "TEMP:" in line:
-            try:
-                temp = float(line.split("TEMP:")[1].split("°")[0])
-                self.temp_label.setText(f"Temperature: {temp:.1f} °C")
-            except:
-                pass
+    def receive_data(self, sample):
+        # Called by the TelemetryHub while this screen is visible
+        self.temp_label.setText(f"Temperature: {sample.temp:.1f} °C")
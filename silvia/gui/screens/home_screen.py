@@ -34,17 +34,8 @@ class HomeScreen(QWidget):
         layout.addWidget(self.stop_button)
 
 
-        # Connect to serial data for temperature display
-        self.serial.line_received.connect(self.receive_data)
-        
         self.setLayout(layout)
         
-    def receive_data(self, line: str):
-        if line.startswith("STATUS"):
-            parts = line.split()
-            if len(parts) >= 3:
-                try:
-                    temp = float(parts[2])
-                    self.temp_gauge.setText(f"Temp: {temp:.1f} °C")
-                except:
-                    pass
+    def receive_data(self, sample):
+        # Called by the TelemetryHub while this screen is visible
+        self.temp_gauge.setText(f"Temp: {sample.temp:.1f} °C")
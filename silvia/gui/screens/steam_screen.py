@@ -33,8 +33,6 @@ class SteamScreen(QWidget):
         layout.addWidget(self.back_button)
 
         self.setLayout(layout)
-        
-        self.serial.line_received.connect(self.receive_data)
 
         self.start_button.clicked.connect(self.start_steam)
         self.stop_button.clicked.connect(self.stop_steam)
@@ -48,19 +46,15 @@ class SteamScreen(QWidget):
         self.serial.send_command("STOP_STEAM")
         self.status_label.setText("Cooling down...")
         
-    def receive_data(self, line: str):
-        if line.startswith("STATUS"):
-            parts = line.split()
-            if len(parts) >= 3:
-                try:
-                    temp = float(parts[2])
-                    self.temp_label.setText(f"Current: {temp:.1f} °C")
-                    
-                    if temp >= self.steam_temp_target - 2:
-                        self.status_label.setText("Ready for steaming!")
-                    elif "HEATING" in parts[1]:
-                        self.status_label.setText("Heating...")
-                except:
-                    pass
-        elif "READY STEAM" in line:
+    def receive_data(self, sample):
+        # Called by the TelemetryHub while this screen is visible
+        self.temp_label.setText(f"Current: {sample.temp:.1f} °C")
+        
+        if sample.temp >= self.steam_temp_target - 2:
+            self.status_label.setText("Ready for steaming!")
+        elif "HEATING" in sample.state:
+            self.status_label.setText("Heating...")
+            
+    def receive_message(self, line: str):
+        if "READY STEAM" in line:
             self.status_label.setText("Steam temperature reached!")
@@ -0,0 +1,58 @@
+from PyQt6.QtCore import QObject
+from serialcom.telemetry_codec import parse_line, parse_status
+
+class TelemetryHub(QObject):
+    """Parses serial input once and hands it to whichever screen is showing
+
+    Screens register with add_screen() and implement receive_data(sample), called with a
+    TelemetrySample, and optionally receive_message(line) for non-telemetry lines such as
+    OK:/ERROR: replies. Hidden screens get nothing while hidden; when one is shown it is
+    handed the latest sample so its readouts are current.
+    """
+
+    def __init__(self, serial, stack):
+        super().__init__()
+        self.stack = stack
+        self.screens = []
+        self.latest = None
+        self.parse_errors = 0
+
+        serial.lines_received.connect(self.handle_lines)
+        serial.samples_received.connect(self.handle_samples)
+        stack.currentChanged.connect(self._on_screen_changed)
+
+    def add_screen(self, screen):
+        self.screens.append(screen)
+
+    def handle_lines(self, lines):
+        samples = []
+        screen = self._visible_screen()
+        for line in lines:
+            try:
+                sample = parse_line(line) or parse_status(line)
+            except (ValueError, IndexError):
+                self.parse_errors += 1
+                continue
+            if sample:
+                samples.append(sample)
+            elif screen is not None and hasattr(screen, 'receive_message'):
+                screen.receive_message(line)
+        if samples:
+            self.handle_samples(samples)
+
+    def handle_samples(self, samples):
+        self.latest = samples[-1]
+        screen = self._visible_screen()
+        if screen is None:
+            return
+        for sample in samples:
+            screen.receive_data(sample)
+
+    def _visible_screen(self):
+        screen = self.stack.currentWidget()
+        return screen if screen in self.screens else None
+
+    def _on_screen_changed(self, index):
+        screen = self._visible_screen()
+        if screen is not None and self.latest is not None:
+            screen.receive_data(self.latest)
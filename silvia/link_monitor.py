@@ -0,0 +1,102 @@
+import math
+from collections import deque
+from PyQt6.QtCore import QObject, pyqtSignal, pyqtProperty
+
+# Upper bucket edges (ms) for the RTT histogram in the logs; the last bucket is open
+RTT_BUCKETS_MS = (5, 10, 20, 50, 100, 250, 500, 1000)
+
+class LinkMonitor(QObject):
+    """Serial link health from the PING/PONG watchdog
+
+    Keeps the round-trip times of the last `window` pongs for p50/p95/max and a histogram.
+    The link is "degraded" while the latest ping went unanswered or the recent p95 is over
+    degraded_rtt_ms, and "lost" after lost_after pings in a row got no pong.
+    """
+    statsChanged = pyqtSignal()
+    healthChanged = pyqtSignal(str)  # "ok", "degraded" or "lost"
+
+    def __init__(self, window=24, degraded_rtt_ms=250.0, lost_after=3, parent=None):
+        super().__init__(parent)
+        self.degraded_rtt_ms = degraded_rtt_ms
+        self.lost_after = lost_after
+        self._rtts = deque(maxlen=window)
+        self._health = "ok"
+        self.pongs = 0
+        self.missed = 0         # pings that timed out, all told
+        self.missed_streak = 0  # pings in a row without a pong
+
+    def record_pong(self, rtt_ms):
+        self._rtts.append(rtt_ms)
+        self.pongs += 1
+        self.missed_streak = 0
+        self._update()
+
+    def record_missed(self):
+        self.missed += 1
+        self.missed_streak += 1
+        self._update()
+
+    def reset(self):
+        """Start over after a reconnect; the old link's timings say nothing about the new one"""
+        self._rtts.clear()
+        self.missed_streak = 0
+        self._update()
+
+    def _update(self):
+        if self.missed_streak >= self.lost_after:
+            health = "lost"
+        elif self.missed_streak or self.rttP95Ms > self.degraded_rtt_ms:
+            health = "degraded"
+        else:
+            health = "ok"
+        changed = health != self._health
+        self._health = health
+        self.statsChanged.emit()
+        if changed:
+            self.healthChanged.emit(health)
+
+    def _percentile(self, fraction):
+        if not self._rtts:
+            return 0.0
+        # Nearest rank, so with a full window one outlier in twenty is the max but not the p95
+        ordered = sorted(self._rtts)
+        return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+    @pyqtProperty(str, notify=statsChanged)
+    def health(self):
+        return self._health
+
+    @pyqtProperty(float, notify=statsChanged)
+    def rttP50Ms(self):
+        return self._percentile(0.5)
+
+    @pyqtProperty(float, notify=statsChanged)
+    def rttP95Ms(self):
+        return self._percentile(0.95)
+
+    @pyqtProperty(float, notify=statsChanged)
+    def rttMaxMs(self):
+        return max(self._rtts) if self._rtts else 0.0
+
+    @pyqtProperty(int, notify=statsChanged)
+    def missedPongs(self):
+        return self.missed
+
+    def histogram(self):
+        """Counts per RTT_BUCKETS_MS bucket over the window, keyed by upper edge ("inf" for the rest)"""
+        counts = dict.fromkeys([str(edge) for edge in RTT_BUCKETS_MS] + ["inf"], 0)
+        for rtt in self._rtts:
+            edge = next((edge for edge in RTT_BUCKETS_MS if rtt <= edge), None)
+            counts["inf" if edge is None else str(edge)] += 1
+        return counts
+
+    def get_stats(self):
+        return {
+            'health': self._health,
+            'rtt_p50_ms': round(self.rttP50Ms, 1),
+            'rtt_p95_ms': round(self.rttP95Ms, 1),
+            'rtt_max_ms': round(self.rttMaxMs, 1),
+            'pongs': self.pongs,
+            'missed': self.missed,
+            'histogram': self.histogram(),
+        }
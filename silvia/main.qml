@@ -74,11 +74,15 @@ ApplicationWindow {
         width: 100
         height: 30
         radius: 15
-        color: connected ? "#27ae60" : "#e74c3c"
+        // Slow or missed PONGs show amber
+        property bool degraded: connected && controller.linkMonitor.health === "degraded"
+        color: !connected ? "#e74c3c" : degraded ? "#f39c12" : "#27ae60"
         
         Text {
             anchors.centerIn: parent
-            text: connectionStatus.connected ? "CONNECTED" : "DISCONNECTED"
+            text: !connectionStatus.connected ? (controller.connectionState === "DISCONNECTED" ? "DISCONNECTED" : "CONNECTING")
+                  : connectionStatus.degraded ? "DEGRADED"
+                  : "CONNECTED"
             color: "white"
             font.pixelSize: 10
             font.bold: true
@@ -458,14 +462,8 @@ ApplicationWindow {
                                 text: "BREW NOW"
                                 Material.background: window.currentState === "HEATING_BREW" ? "#27ae60" : "#7f8c8d"
                                 enabled: connectionStatus.connected && window.currentState === "HEATING_BREW"
-                                onClicked: {
-                                    // Clear charts when starting new brew
-                                    coffeeChart.dataPoints = []
-                                    pressureChart.dataPoints = []
-                                    coffeeChart.requestPaint()
-                                    pressureChart.requestPaint()
-                                    controller.beginBrew()
-                                }
+                                // Charts are cleared by the controller when the shot starts
+                                onClicked: controller.beginBrew()
                             }
                             Button {
                                 Layout.fillHeight: true
@@ -504,99 +502,15 @@ ApplicationWindow {
                                 anchors.horizontalCenter: parent.horizontalCenter
                             }
                             
-                            Canvas {
+                            SeriesChart {
                                 id: coffeeChart
                                 width: parent.width
                                 height: parent.height - 20
-                                
-                                property var dataPoints: []
-                                property real maxWeight: 1
-                                property real maxTime: 10
-                                
-                                function updateScale() {
-                                    if (dataPoints.length > 0) {
-                                        var maxW = 1
-                                        var maxT = 10
-                                        for (var i = 0; i < dataPoints.length; i++) {
-                                            if (dataPoints[i].weight > maxW) maxW = dataPoints[i].weight
-                                            if (dataPoints[i].time > maxT) maxT = dataPoints[i].time
-                                        }
-                                        maxWeight = Math.max(maxW * 1.1, 1)
-                                        maxTime = Math.max(maxT * 1.1, 10)
-                                    }
-                                }
-                                
-                                onPaint: {
-                                    var ctx = getContext("2d")
-                                    ctx.clearRect(0, 0, width, height)
-                                    
-                                    // Draw grid
-                                    ctx.strokeStyle = "#7f8c8d"
-                                    ctx.lineWidth = 0.5
-                                    for (var i = 0; i <= 5; i++) {
-                                        var y = (height / 5) * i
-                                        ctx.beginPath()
-                                        ctx.moveTo(0, y)
-                                        ctx.lineTo(width, y)
-                                        ctx.stroke()
-                                    }
-                                    
-                                    // Draw current weight value
-                                    ctx.fillStyle = "white"
-                                    ctx.font = "20px Arial"
-                                    ctx.fillText(window.currentWeight.toFixed(1) + " g", 5, 15)
-                                    
-                                    // Draw data line
-                                    if (dataPoints.length > 0) {
-                                        ctx.strokeStyle = "#27ae60"
-                                        ctx.lineWidth = 2
-                                        ctx.beginPath()
-                                        
-                                        for (var j = 0; j < dataPoints.length; j++) {
-                                            var x = (dataPoints[j].time / maxTime) * width
-                                            var y = height - (dataPoints[j].weight / maxWeight) * height
-                                            
-                                            if (j === 0) {
-                                                ctx.moveTo(x, y)
-                                            } else {
-                                                ctx.lineTo(x, y)
-                                            }
-                                        }
-                                        ctx.stroke()
-                                        
-                                        // Draw current point
-                                        if (dataPoints.length > 0) {
-                                            var lastPoint = dataPoints[dataPoints.length - 1]
-                                            var lastX = (lastPoint.time / maxTime) * width
-                                            var lastY = height - (lastPoint.weight / maxWeight) * height
-                                            ctx.fillStyle = "#27ae60"
-                                            ctx.beginPath()
-                                            ctx.arc(lastX, lastY, 3, 0, 2 * Math.PI)
-                                            ctx.fill()
-                                        }
-                                    }
-                                }
-                                
-                                Timer {
-                                    interval: 500
-                                    running: window.brewTime !== "00:00"
-                                    repeat: true
-                                    onTriggered: {
-                                        var timeSeconds = parseInt(window.brewTime.split(":")[0]) * 60 + parseInt(window.brewTime.split(":")[1])
-                                        if (timeSeconds > 0) {
-                                            coffeeChart.dataPoints.push({time: timeSeconds, weight: window.currentWeight})
-                                            coffeeChart.updateScale()
-                                            coffeeChart.requestPaint()
-                                        }
-                                    }
-                                }
-                                
-                                Connections {
-                                    target: window
-                                    function onCurrentWeightChanged() {
-                                        coffeeChart.requestPaint()
-                                    }
-                                }
+                                series: controller.weightSeries
+                                scheduler: controller.repaintScheduler
+                                lineColor: "#27ae60"
+                                unit: "g"
+                                currentValue: window.currentWeight
                             }
                         }
                     }
@@ -621,99 +535,15 @@ ApplicationWindow {
                                 anchors.horizontalCenter: parent.horizontalCenter
                             }
                             
-                            Canvas {
+                            SeriesChart {
                                 id: pressureChart
                                 width: parent.width
                                 height: parent.height - 20
-                                
-                                property var dataPoints: []
-                                property real maxPressure: 1
-                                property real maxTime: 10
-                                
-                                function updateScale() {
-                                    if (dataPoints.length > 0) {
-                                        var maxP = 1
-                                        var maxT = 10
-                                        for (var i = 0; i < dataPoints.length; i++) {
-                                            if (dataPoints[i].pressure > maxP) maxP = dataPoints[i].pressure
-                                            if (dataPoints[i].time > maxT) maxT = dataPoints[i].time
-                                        }
-                                        maxPressure = Math.max(maxP * 1.1, 1)
-                                        maxTime = Math.max(maxT * 1.1, 10)
-                                    }
-                                }
-                                
-                                onPaint: {
-                                    var ctx = getContext("2d")
-                                    ctx.clearRect(0, 0, width, height)
-                                    
-                                    // Draw grid
-                                    ctx.strokeStyle = "#7f8c8d"
-                                    ctx.lineWidth = 0.5
-                                    for (var i = 0; i <= 5; i++) {
-                                        var y = (height / 5) * i
-                                        ctx.beginPath()
-                                        ctx.moveTo(0, y)
-                                        ctx.lineTo(width, y)
-                                        ctx.stroke()
-                                    }
-                                    
-                                    // Draw current pressure value
-                                    ctx.fillStyle = "white"
-                                    ctx.font = "20px Arial"
-                                    ctx.fillText(window.currentPressure.toFixed(1) + " bar", 5, 15)
-                                    
-                                    // Draw data line
-                                    if (dataPoints.length > 0) {
-                                        ctx.strokeStyle = "#e74c3c"
-                                        ctx.lineWidth = 2
-                                        ctx.beginPath()
-                                        
-                                        for (var j = 0; j < dataPoints.length; j++) {
-                                            var x = (dataPoints[j].time / maxTime) * width
-                                            var y = height - (dataPoints[j].pressure / maxPressure) * height
-                                            
-                                            if (j === 0) {
-                                                ctx.moveTo(x, y)
-                                            } else {
-                                                ctx.lineTo(x, y)
-                                            }
-                                        }
-                                        ctx.stroke()
-                                        
-                                        // Draw current point
-                                        if (dataPoints.length > 0) {
-                                            var lastPoint = dataPoints[dataPoints.length - 1]
-                                            var lastX = (lastPoint.time / maxTime) * width
-                                            var lastY = height - (lastPoint.pressure / maxPressure) * height
-                                            ctx.fillStyle = "#e74c3c"
-                                            ctx.beginPath()
-                                            ctx.arc(lastX, lastY, 3, 0, 2 * Math.PI)
-                                            ctx.fill()
-                                        }
-                                    }
-                                }
-                                
-                                Timer {
-                                    interval: 500
-                                    running: window.brewTime !== "00:00"
-                                    repeat: true
-                                    onTriggered: {
-                                        var timeSeconds = parseInt(window.brewTime.split(":")[0]) * 60 + parseInt(window.brewTime.split(":")[1])
-                                        if (timeSeconds > 0) {
-                                            pressureChart.dataPoints.push({time: timeSeconds, pressure: window.currentPressure})
-                                            pressureChart.updateScale()
-                                            pressureChart.requestPaint()
-                                        }
-                                    }
-                                }
-                                
-                                Connections {
-                                    target: window
-                                    function onCurrentPressureChanged() {
-                                        pressureChart.requestPaint()
-                                    }
-                                }
+                                series: controller.pressureSeries
+                                scheduler: controller.repaintScheduler
+                                lineColor: "#e74c3c"
+                                unit: "bar"
+                                currentValue: window.currentPressure
                             }
                         }
                     }
@@ -0,0 +1,54 @@
+class PIDController:
+    """PID for the boiler heater, stepped once per telemetry sample
+
+    Works on the samples' own timestamps, so it is independent of how lines are batched.
+    The derivative acts on the measurement rather than the error, so a setpoint change does
+    not kick the output, and is low-pass filtered against sensor noise. The integral is kept
+    in output units and only grows while the output is not saturated in the same direction
+    (conditional integration), so the long full-power warm-up does not wind it up.
+    """
+
+    def __init__(self, kp, ki, kd, output_min=0.0, output_max=255.0, derivative_filter=1.0, max_dt=2.0):
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+        self.output_min = output_min
+        self.output_max = output_max
+        self.derivative_filter = derivative_filter  # s, time constant of the derivative low-pass
+        self.max_dt = max_dt  # s, a longer gap between samples restarts the derivative and integral steps
+        self.reset()
+
+    def reset(self):
+        self.integral = 0.0
+        self.derivative = 0.0  # filtered rate of change of the measurement, units per second
+        self.output = 0.0
+        self._last_time = None
+        self._last_measurement = None
+
+    def update(self, setpoint, measurement, t, feed_forward=0.0):
+        """Output for a measurement taken at time t (seconds), with an optional feed-forward term"""
+        dt = None
+        if self._last_time is not None:
+            dt = t - self._last_time
+            if dt <= 0:
+                return self.output  # same or older sample
+            if dt > self.max_dt:
+                dt = None
+                self.derivative = 0.0
+
+        error = setpoint - measurement
+        if dt is not None:
+            rate = (measurement - self._last_measurement) / dt
+            self.derivative += dt / (self.derivative_filter + dt) * (rate - self.derivative)
+        unclamped = self.kp * error - self.kd * self.derivative + feed_forward
+
+        if dt is not None:
+            integral = self.integral + self.ki * error * dt
+            output = unclamped + integral
+            if not (output > self.output_max and error > 0) and not (output < self.output_min and error < 0):
+                self.integral = min(self.output_max, max(self.output_min - self.output_max, integral))
+
+        self._last_time = t
+        self._last_measurement = measurement
+        self.output = min(self.output_max, max(self.output_min, unclamped + self.integral))
+        return self.output
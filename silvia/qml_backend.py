@@ -1,16 +1,13 @@
-from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot, QTimer
+from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot, pyqtProperty, QTimer
 import config
-from safety_manager import SafetyManager
-from data_logger import DataLogger
-from temperature_controller import TemperatureController
+import time
+from chart_series import RingSeries
+from repaint_scheduler import RepaintScheduler
+from link_monitor import LinkMonitor
+from serialcom.telemetry_codec import parse_line, parse_status
+from serialcom.sim_clock import QtClock
 import atexit
 
-# Import appropriate serial manager based on configuration
-if config.USE_MOCK_SERIAL:
-    from serialcom.mock_serial_manager import SerialManager
-else:
-    from serialcom.real_serial_manager import SerialManager
-
 class CoffeeController(QObject):
     # Signals to QML
     temperatureChanged = pyqtSignal(float)
@@ -18,28 +15,76 @@ class CoffeeController(QObject):
     weightChanged = pyqtSignal(float)
     stateChanged = pyqtSignal(str)
     brewTimeChanged = pyqtSignal(str)
+    brewElapsedChanged = pyqtSignal()
     errorOccurred = pyqtSignal(str)
     warningIssued = pyqtSignal(str)
     connectionStatusChanged = pyqtSignal(bool)
+    connectionStateChanged = pyqtSignal()
     heatingStatusChanged = pyqtSignal(bool)
+    commandAcknowledged = pyqtSignal(str, float)  # command, round trip in ms
     
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, clock=None):
         super().__init__(parent)
+        # Deadlines, timeouts and the watchdog run on this; a VirtualClock drives the mock in soak tests
+        self.clock = clock or QtClock()
         
-        # Initialize components
-        self.logger = DataLogger()
-        self.safety = SafetyManager()
-        self.temp_controller = TemperatureController()
+        # Only what QML binds to is built here; start() brings up the rest once the window is up
+        self._weight_series = RingSeries(config.CHART_CAPACITY, self)
+        self._pressure_series = RingSeries(config.CHART_CAPACITY, self)
+        self._repaint = RepaintScheduler(config.CHART_MAX_FPS, self)
+        self._repaint.watch(self._weight_series)
+        self._repaint.watch(self._pressure_series)
         
-        # Serial communication
-        if config.USE_MOCK_SERIAL:
-            self.serial = SerialManager()
-        else:
-            self.serial = SerialManager(port=config.SERIAL_PORT, baud_rate=config.SERIAL_BAUD)
-        self.serial.line_received.connect(self._handle_serial_data)
+        # PING round trips and link health, from the connection watchdog
+        self.link = LinkMonitor(config.LINK_RTT_WINDOW, config.LINK_DEGRADED_RTT_MS, config.LINK_LOST_MISSED, self)
+        self.link.healthChanged.connect(self._handle_link_health)
+        
+        self.logger = None
+        self.recorder = None
+        self.safety = None
+        self.temp_controller = None
+        self.serial = None
+        self.commands = None
+        self.connection = None
         self.connected = False
         self._current_state = "IDLE"
         
+        # Last value emitted per telemetry signal, for change-only emission
+        self._last_emitted = {}
+        self.emitted_count = 0
+        self.suppressed_count = 0
+        
+        # Brew timer, on the monotonic clock so wall-clock adjustments cannot skew shot time
+        self._brew_start_time = None
+        self._brew_start_millis = None  # firmware millis at the start of the shot
+        self._timer = QTimer()
+        self._timer.timeout.connect(self._update_brew_time)
+        self._connection_timer = None
+        
+        # Register shutdown handler
+        atexit.register(self._shutdown)
+        
+    def start(self, profile=None):
+        """Bring up logging, safety, heater control and the serial link; does nothing if already up
+
+        run_silvia.py calls this once the window has drawn its first frame. Slots that work
+        without a connection call it too, in case they run first. profile, a StartupProfile,
+        gets a mark per subsystem.
+        """
+        if self.logger is not None:
+            return
+        mark = profile.mark if profile is not None else lambda phase: None
+        from data_logger import DataLogger
+        from telemetry_recorder import TelemetryRecorder
+        self.logger = DataLogger()
+        self.recorder = TelemetryRecorder()
+        mark("logger + recorder")
+        
+        from safety_manager import SafetyManager
+        from temperature_controller import TemperatureController
+        self.safety = SafetyManager(self.clock)
+        self.temp_controller = TemperatureController()
+        
         # Connect safety signals
         self.safety.emergencyStop.connect(self._emergency_stop)
         self.safety.warningIssued.connect(self._handle_warning)
@@ -47,32 +92,104 @@ class CoffeeController(QObject):
         # Connect temperature controller
         self.temp_controller.heaterStateChanged.connect(self._handle_heater_change)
         self.temp_controller.targetReached.connect(self._handle_target_reached)
+        self.temp_controller.heaterDutyChanged.connect(self._send_heater_duty)
+        mark("safety + heater control")
         
-        # Brew timer
-        self._brew_start_time = None
-        self._timer = QTimer()
-        self._timer.timeout.connect(self._update_brew_time)
+        # Serial communication
+        from serialcom.command_channel import CommandChannel
+        from serialcom.connection_manager import ConnectionManager
+        self.serial = self._create_serial_manager()
+        self.serial.lines_received.connect(self._handle_serial_batch)
+        self.serial.samples_received.connect(self._handle_serial_samples)
+        
+        # Tags commands and matches the firmware's replies to them
+        self.commands = CommandChannel(self.serial, self.clock, timeout=config.COMMAND_TIMEOUT)
+        self.commands.acknowledged.connect(self._handle_command_acknowledged)
+        self.commands.failed.connect(self._handle_command_failed)
         
         # Connection watchdog
-        self._connection_timer = QTimer()
-        self._connection_timer.timeout.connect(self._check_connection)
-        self._connection_timer.start(5000)  # Check every 5 seconds
+        self._connection_timer = self.clock.call_every(config.LINK_PING_INTERVAL, self._check_connection)
         
-        # Register shutdown handler
-        atexit.register(self._shutdown)
+        # Opens the port off the GUI thread, waits for READY and retries with backoff
+        self.connection = ConnectionManager(self.serial, self.clock, ready_timeout=config.CONNECT_READY_TIMEOUT,
+                                            probe_interval=config.CONNECT_PROBE_INTERVAL,
+                                            backoff_initial=config.CONNECT_BACKOFF_INITIAL,
+                                            backoff_max=config.CONNECT_BACKOFF_MAX,
+                                            hotplug_interval=config.CONNECT_HOTPLUG_INTERVAL)
+        self.connection.stateChanged.connect(self._handle_connection_state)
+        self.connection.connected.connect(self._handle_connected)
+        self.connection.disconnected.connect(self._handle_disconnected)
+        # A dead port (e.g. cable pulled) reconnects at once instead of waiting out the PING watchdog
+        if hasattr(self.serial, 'read_error'):
+            self.serial.read_error.connect(lambda error: self.connection.lost(f"read error: {error}"))
+        self.logger.log_command("System started")
+        self.connection.start()
+        mark("serial backend")
         
-        try:
-            self.serial.start()
-            self.connected = True
-            self.connectionStatusChanged.emit(True)
-            self.logger.log_command("System started")
-        except Exception as e:
-            self.logger.log_error(f"Failed to start serial: {e}")
-            self.connected = False
-            self.connectionStatusChanged.emit(False)
+    @pyqtProperty(QObject, constant=True)
+    def weightSeries(self):
+        return self._weight_series
+        
+    @pyqtProperty(QObject, constant=True)
+    def pressureSeries(self):
+        return self._pressure_series
+        
+    @pyqtProperty(QObject, constant=True)
+    def repaintScheduler(self):
+        return self._repaint
+        
+    @pyqtProperty(str, notify=connectionStateChanged)
+    def connectionState(self):
+        """DISCONNECTED, OPENING, WAITING_READY or CONNECTED"""
+        # OPENING until start() runs, which is straight after the first frame
+        return self.connection.state if self.connection is not None else "OPENING"
+
+    @pyqtProperty(QObject, constant=True)
+    def linkMonitor(self):
+        return self.link
+
+    @pyqtProperty(int, notify=brewElapsedChanged)
+    def brewElapsedMs(self):
+        """Milliseconds since the shot began, 0 when not brewing"""
+        if self._brew_start_time is None:
+            return 0
+        return int((time.monotonic() - self._brew_start_time) * 1000)
+        
+    def _create_serial_manager(self):
+        # Imported here so the choice follows config as set by run_silvia.py's flags
+        if config.SERIAL_REPLAY_FILE:
+            from serialcom.replay_serial_manager import SerialManager
+            return SerialManager(config.SERIAL_REPLAY_FILE, speed=config.SERIAL_REPLAY_SPEED,
+                                 loop=config.SERIAL_REPLAY_LOOP,
+                                 batch_max_lines=config.SERIAL_BATCH_MAX_LINES,
+                                 batch_max_latency_ms=config.SERIAL_BATCH_MAX_LATENCY_MS, clock=self.clock)
+        if config.USE_MOCK_SERIAL:
+            from serialcom.mock_serial_manager import SerialManager
+            return SerialManager(batch_max_lines=config.SERIAL_BATCH_MAX_LINES,
+                                 batch_max_latency_ms=config.SERIAL_BATCH_MAX_LATENCY_MS,
+                                 seed=config.MOCK_SEED, clock=self.clock)
+        from serialcom.real_serial_manager import SerialManager
+        from serialcom.port_discovery import PortDiscovery
+        return SerialManager(port=config.SERIAL_PORT, baud_rate=config.SERIAL_BAUD,
+                             read_mode=config.SERIAL_READ_MODE, read_timeout=config.SERIAL_READ_TIMEOUT,
+                             batch_max_lines=config.SERIAL_BATCH_MAX_LINES,
+                             batch_max_latency_ms=config.SERIAL_BATCH_MAX_LATENCY_MS,
+                             discovery=PortDiscovery(rescan_interval=config.PORT_RESCAN_INTERVAL))
+        
+    def _negotiate_protocol(self):
+        """Ask the firmware for tagged replies, and for binary telemetry frames if configured
+
+        Both are refused by firmware that predates them, which then gets plain commands and
+        ASCII DATA.
+        """
+        self.commands.negotiate()
+        if config.TELEMETRY_PROTOCOL == "binary":
+            self.commands.send("PROTO BIN")
+            self.logger.log_command("PROTO BIN")
         
     @pyqtSlot(float, float)
     def setTemperatures(self, brew_temp, steam_temp):
+        self.start()
         # Apply safety limits
         brew_temp = max(60, min(110, brew_temp))
         steam_temp = max(110, min(150, steam_temp))
@@ -81,8 +198,8 @@ class CoffeeController(QObject):
         self.temp_controller.set_steam_target(steam_temp)
         
         if self.connected:
-            self.serial.send_command(f"SET_TEMP BREW {brew_temp}")
-            self.serial.send_command(f"SET_TEMP STEAM {steam_temp}")
+            self.commands.send(f"SET_TEMP BREW {brew_temp}")
+            self.commands.send(f"SET_TEMP STEAM {steam_temp}")
             self.logger.log_command(f"SET_TEMP BREW {brew_temp} STEAM {steam_temp}")
         else:
             self.logger.log_error("Cannot set temperature - not connected")
@@ -101,7 +218,7 @@ class CoffeeController(QObject):
         self.temp_controller.set_mode("BREW")
         self.safety.start_brew_timer()
         
-        self.serial.send_command("START_BREW")
+        self.commands.send("START_BREW")
         self.logger.log_command("START_BREW")
         
     @pyqtSlot()
@@ -111,33 +228,40 @@ class CoffeeController(QObject):
             self.errorOccurred.emit("Cannot begin brew - not connected")
             return
             
-        self.serial.send_command("TARE_SCALES")
-        self.serial.send_command("BEGIN_BREW")
+        self.commands.send("TARE_SCALES")
+        self.commands.send("BEGIN_BREW")
+        self.recorder.begin_session("BREW")
+        self._weight_series.clear()
+        self._pressure_series.clear()
         
-        import time
-        self._brew_start_time = time.time()
+        self._brew_start_time = time.monotonic()
+        self._brew_start_millis = None
         self._timer.start(1000)
         
         self.logger.log_command("BEGIN_BREW")
         
     @pyqtSlot()
     def stopBrew(self):
+        self.start()
         if self.connected:
-            self.serial.send_command("STOP")
+            self.commands.send("STOP")
             self.logger.log_command("STOP")
             
         self.temp_controller.set_mode("IDLE")
         self.safety.stop_brew_timer()
         self._timer.stop()
+        self.recorder.end_session()
         
         # Log brew session if we have data
-        if self._brew_start_time:
-            import time
-            duration = int(time.time() - self._brew_start_time)
+        if self._brew_start_time is not None:
+            duration = int(time.monotonic() - self._brew_start_time)
             self.logger.log_brew_session(duration, 0, 0)  # TODO: Add actual weight/pressure
+            self.logger.log_chart_stats(self._repaint.get_stats())
+            self.logger.log_emit_stats(self.emitted_count, self.suppressed_count)
             
         self._brew_start_time = None
         self.brewTimeChanged.emit("00:00")
+        self.brewElapsedChanged.emit()
         
     @pyqtSlot()
     def startSteam(self):
@@ -148,17 +272,20 @@ class CoffeeController(QObject):
         self.temp_controller.set_mode("STEAM")
         self.safety.start_steam_timer()
         
-        self.serial.send_command("START_STEAM")
+        self.commands.send("START_STEAM")
         self.logger.log_command("START_STEAM")
+        self.recorder.begin_session("STEAM")
         
     @pyqtSlot()
     def stopSteam(self):
+        self.start()
         if self.connected:
-            self.serial.send_command("STOP")
+            self.commands.send("STOP")
             self.logger.log_command("STOP")
             
         self.temp_controller.set_mode("IDLE")
         self.safety.stop_steam_timer()
+        self.recorder.end_session()
         
     @pyqtSlot()
     def startFlush(self):
@@ -166,98 +293,115 @@ class CoffeeController(QObject):
             self.errorOccurred.emit("Cannot start flush - not connected")
             return
             
-        self.serial.send_command("START_FLUSH")
+        self.commands.send("START_FLUSH")
         self.logger.log_command("START_FLUSH")
+        self.recorder.begin_session("FLUSH")
         
     @pyqtSlot()
     def stopFlush(self):
+        self.start()
         if self.connected:
-            self.serial.send_command("STOP")
+            self.commands.send("STOP")
             self.logger.log_command("STOP")
+        self.recorder.end_session()
         
-    def _handle_serial_data(self, line):
+    def _handle_serial_batch(self, lines):
+        """Consume a whole batch of lines from the serial manager in one slot call"""
         self.safety.update_data_timestamp()
-        self.logger.log_response(line)
-        
+        for line in lines:
+            self._handle_serial_data(self.commands.match(line))
+            
+    def _handle_serial_samples(self, samples):
+        """Consume telemetry already decoded from binary frames"""
+        self.safety.update_data_timestamp()
+        for sample in samples:
+            try:
+                self._handle_telemetry(sample)
+            except Exception as e:
+                self.logger.log_error(f"Failed to handle binary telemetry: {sample} - {e}")
+            
+    def _handle_serial_data(self, line):
         if line.startswith("DATA:"):
-            # Parse Arduino DATA format: DATA:state,temp,pressure,weight,pump%,valve,heater,brewTime
+            # Parse Arduino DATA format: DATA:state,temp,pressure,weight,pump%,valve,heater,brewTime,millis
+            # Samples go to the binary telemetry recorder, not the text log
             try:
-                data_part = line[5:]  # Remove "DATA:"
-                parts = data_part.split(',')
-                if len(parts) >= 7:
-                    state_num = int(parts[0])
-                    temp = float(parts[1])
-                    pressure = float(parts[2])
-                    weight = float(parts[3])
-                    pump_percent = int(parts[4])
-                    valve = int(parts[5])
-                    heater = int(parts[6])
-                    brew_time = int(parts[7]) if len(parts) > 7 else 0
-                    
-                    # Convert state number to string
-                    state_names = ["IDLE", "HEATING_BREW", "HEATING_STEAM", "BREWING", "STEAMING", "FLUSHING"]
-                    state = state_names[state_num] if state_num < len(state_names) else "UNKNOWN"
-                    
-                    # Store current state for validation
-                    self._current_state = state
-                    
-                    # Safety check temperature
-                    if not self.safety.check_temperature(temp):
-                        return
-                        
-                    # Update temperature controller
-                    self.temp_controller.update_temperature(temp)
-                    
-                    # Log sensor data
-                    self.logger.log_sensor_data(temp, pressure, weight, state, pump_percent)
-                    
-                    # Emit to QML
-                    self.stateChanged.emit(state)
-                    self.temperatureChanged.emit(temp)
-                    self.pressureChanged.emit(pressure)
-                    self.weightChanged.emit(weight)
-                    
+                self._handle_telemetry(parse_line(line))
             except Exception as e:
                 self.logger.log_error(f"Failed to parse DATA: {line} - {e}")
-        elif line.startswith("STATUS"):
+            return
+            
+        self.logger.log_response(line)
+        
+        if line.startswith("STATUS"):
             # Handle legacy STATUS format for compatibility
-            parts = line.split()
-            if len(parts) >= 6:
-                try:
-                    state = parts[1]
-                    temp = float(parts[2])
-                    pressure = float(parts[3])
-                    weight = float(parts[4])
-                    pump_pwm = int(parts[5]) if len(parts) > 5 else 0
-                    
-                    # Safety check temperature
-                    if not self.safety.check_temperature(temp):
-                        return
-                        
-                    # Update temperature controller
-                    self.temp_controller.update_temperature(temp)
-                    
-                    # Log sensor data
-                    self.logger.log_sensor_data(temp, pressure, weight, state, pump_pwm)
-                    
-                    # Emit to QML
-                    self.stateChanged.emit(state)
-                    self.temperatureChanged.emit(temp)
-                    self.pressureChanged.emit(pressure)
-                    self.weightChanged.emit(weight)
-                    
-                except Exception as e:
-                    self.logger.log_error(f"Failed to parse status: {line} - {e}")
+            try:
+                sample = parse_status(line)
+                if sample:
+                    self._handle_telemetry(sample)
+            except Exception as e:
+                self.logger.log_error(f"Failed to parse status: {line} - {e}")
         elif line.startswith("ERROR"):
             self.logger.log_error(line)
             self.errorOccurred.emit(line)
         elif line.startswith("READY") or line.startswith("PONG"):
             self.logger.log_command(f"Received: {line}")
                     
+    def _handle_telemetry(self, sample):
+        # Store current state for validation
+        self._current_state = sample.state
+        
+        # Safety checks, against the firmware's sample time when it sends one so trends are not
+        # skewed by batching
+        timestamp = sample.millis / 1000.0 if sample.millis else None
+        self.safety.check_pressure(sample.pressure, timestamp)
+        if not self.safety.check_temperature(sample.temp, timestamp):
+            return
+            
+        # Update temperature controller
+        self.temp_controller.update_temperature(sample.temp, timestamp)
+        
+        # Record sensor data
+        self.recorder.append(sample)
+        
+        # Emit to QML, only when a value moved past its deadband
+        self._emit_if_changed(self.stateChanged, 'state', sample.state)
+        self._emit_if_changed(self.temperatureChanged, 'temp', sample.temp, config.EMIT_DEADBAND_TEMP)
+        self._emit_if_changed(self.pressureChanged, 'pressure', sample.pressure, config.EMIT_DEADBAND_PRESSURE)
+        self._emit_if_changed(self.weightChanged, 'weight', sample.weight, config.EMIT_DEADBAND_WEIGHT)
+        
+        # Chart samples only while a shot is running
+        if self._brew_start_time is not None:
+            elapsed = self._shot_time(sample)
+            self._weight_series.append(elapsed, sample.weight)
+            self._pressure_series.append(elapsed, sample.pressure)
+            self.brewElapsedChanged.emit()
+            
+    def _emit_if_changed(self, signal, key, value, deadband=0):
+        """Emit unless value is within deadband of the last value emitted for this channel"""
+        last = self._last_emitted.get(key)
+        # The deadbands are one step of the wire resolution, and 93.1 - 93.0 comes out just under 0.1
+        if last is not None and (value == last if not deadband else abs(value - last) < deadband - 1e-9):
+            self.suppressed_count += 1
+            return
+        self._last_emitted[key] = value
+        self.emitted_count += 1
+        signal.emit(value)
+        
+    def _shot_time(self, sample):
+        """Seconds into the shot at which the firmware took this sample"""
+        elapsed = time.monotonic() - self._brew_start_time
+        if not sample.millis:
+            # Firmware without a sample timestamp: fall back to arrival time
+            return elapsed
+        if self._brew_start_millis is None:
+            # Anchor the firmware clock to the first sample of the shot
+            self._brew_start_millis = (sample.millis - int(elapsed * 1000)) & 0xFFFFFFFF
+        return ((sample.millis - self._brew_start_millis) & 0xFFFFFFFF) / 1000.0
+                    
     def _update_brew_time(self):
-        if self._brew_start_time:
-            import time
-            elapsed = int(time.time() - self._brew_start_time)
+        if self._brew_start_time is not None:
+            self.brewElapsedChanged.emit()
+            elapsed = int(time.monotonic() - self._brew_start_time)
             minutes = elapsed // 60
             seconds = elapsed % 60
             self.brewTimeChanged.emit(f"{minutes:02}:{seconds:02}")
@@ -269,12 +413,13 @@ class CoffeeController(QObject):
         
         # Stop all operations
         if self.connected:
-            self.serial.send_command("ABORT")
+            self.commands.send("ABORT")
             
         self.temp_controller.set_mode("IDLE")
         self.safety.stop_brew_timer()
         self.safety.stop_steam_timer()
         self._timer.stop()
+        self.recorder.end_session()
         
     def _handle_warning(self, warning):
         self.logger.log_warning(warning)
@@ -282,42 +427,76 @@ class CoffeeController(QObject):
         
     def _handle_heater_change(self, heating):
         self.heatingStatusChanged.emit(heating)
-        # Arduino controls heater internally based on temperature
+        # The duty itself goes out in _send_heater_duty; should it stop arriving for
+        # HOST_HEATER_TIMEOUT ms, the firmware falls back to its own PWM steps
+            
+    def _send_heater_duty(self, duty):
+        # Once per sample, which also keeps the firmware's fallback watchdog from taking over.
+        # Firmware without tags predates SET_HEATER_PWM too, and would answer every one with an
+        # untagged ERROR that reads as the reply to whatever command is waiting
+        if config.HEATER_HOST_CONTROL and self.connected and self.commands.tagged:
+            self.commands.send(f"SET_HEATER_PWM {duty}", expect_reply=False)
+            
+    def _handle_command_acknowledged(self, result):
+        self.commandAcknowledged.emit(result.command, result.rtt_ms)
+        
+    def _handle_command_failed(self, result):
+        # ERROR replies are reported as they arrive and lost PONGs by the link monitor;
+        # only other lost replies need a word here
+        if not result.reply.startswith("ERROR") and result.command != "PING":
+            self.logger.log_warning(f"No reply to {result.command}: {result.reply} after {result.rtt_ms:.0f} ms")
             
     def _handle_target_reached(self, mode):
         self.logger.log_command(f"Target temperature reached for {mode}")
         
     def _check_connection(self):
-        if self.connected and self.serial:
+        if self.connected:
             try:
-                self.serial.send_command("PING")
-                self.connectionStatusChanged.emit(True)
-                # Could add timeout check here if no PONG received
+                # A PONG later than the ping interval would overlap the next PING, so give up on it first
+                self.commands.send("PING", self._handle_pong, timeout=config.LINK_PING_INTERVAL * 0.9)
             except Exception as e:
-                self.connected = False
-                self.connectionStatusChanged.emit(False)
-                self.logger.log_error(f"Connection lost: {e}")
-                self._attempt_reconnection()
+                self.connection.lost(f"PING failed: {e}")
                 
-    def _attempt_reconnection(self):
-        """Try to reconnect after connection loss"""
-        try:
-            self.logger.log_command("Attempting reconnection...")
-            if self.serial:
-                self.serial.stop()
-            if config.USE_MOCK_SERIAL:
-                self.serial = SerialManager()
-            else:
-                self.serial = SerialManager(port=config.SERIAL_PORT, baud_rate=config.SERIAL_BAUD)
-            self.serial.line_received.connect(self._handle_serial_data)
-            if self.serial.start():
-                self.connected = True
-                self.connectionStatusChanged.emit(True)
-                self.logger.log_command("Reconnection successful")
-            else:
-                self.logger.log_error("Reconnection failed")
-        except Exception as e:
-            self.logger.log_error(f"Reconnection error: {e}")
+    def _handle_pong(self, result):
+        if result.ok:
+            self.link.record_pong(result.rtt_ms)
+        elif result.reply == "timeout":
+            self.link.record_missed()
+        else:
+            return  # refused or cut off by a reconnect: says nothing about the round trip
+        if (self.link.pongs + self.link.missed) % config.LINK_LOG_EVERY == 0:
+            self.logger.log_link_stats(self.link.get_stats())
+            
+    def _handle_link_health(self, health):
+        stats = self.link.get_stats()
+        message = (f"Link {health}: rtt p50={stats['rtt_p50_ms']}ms p95={stats['rtt_p95_ms']}ms, "
+                   f"{self.link.missed_streak} PING(s) unanswered")
+        if health == "ok":
+            self.logger.log_command(message)
+        else:
+            self.logger.log_warning(message)
+        # "degraded" leaves the link up; QML shows it from linkMonitor.health
+        if health == "lost":
+            self.connection.lost(f"{self.link.missed_streak} PINGs unanswered")
+                
+    def _handle_connection_state(self, state):
+        self.connectionStateChanged.emit()
+        
+    def _handle_connected(self):
+        self.link.reset()
+        self.connected = True
+        self._last_emitted.clear()  # resend every value after the gap
+        self.connectionStatusChanged.emit(True)
+        self.logger.log_command("Connected")
+        self._negotiate_protocol()
+        
+    def _handle_disconnected(self, reason, retry_in):
+        was_connected = self.connected
+        self.connected = False
+        self.commands.reset(reason="disconnected")
+        if was_connected:
+            self.connectionStatusChanged.emit(False)
+        self.logger.log_error(f"Connection failed: {reason}; retrying in {retry_in:g} s")
                 
     def _shutdown(self):
         """Clean shutdown procedure"""
@@ -326,18 +505,26 @@ class CoffeeController(QObject):
                 self.logger.log_command("Initiating shutdown")
             
             # Stop all operations
-            if hasattr(self, 'connected') and self.connected and hasattr(self, 'serial') and self.serial:
-                self.serial.send_command("ABORT")
-                self.serial.stop()
+            if hasattr(self, 'connected') and self.connected:
+                self.commands.send("ABORT", expect_reply=False)
+            if hasattr(self, 'connection') and self.connection:
+                self.connection.stop()
                 
             if hasattr(self, 'temp_controller') and self.temp_controller:
                 self.temp_controller.set_mode("IDLE")
             if hasattr(self, '_timer') and self._timer:
                 self._timer.stop()
             if hasattr(self, '_connection_timer') and self._connection_timer:
-                self._connection_timer.stop()
+                self._connection_timer.cancel()
+            if hasattr(self, 'safety') and self.safety:
+                self.safety.stop()
             
+            if hasattr(self, 'recorder') and self.recorder:
+                self.recorder.close()
             if hasattr(self, 'logger') and self.logger:
+                self.logger.log_emit_stats(self.emitted_count, self.suppressed_count)
+                if hasattr(self, 'link') and self.link:
+                    self.logger.log_link_stats(self.link.get_stats())
                 self.logger.shutdown()
         except RuntimeError:
             # Qt objects already deleted, ignore
@@ -346,4 +533,5 @@ class CoffeeController(QObject):
     @pyqtSlot()
     def emergencyStop(self):
         """Manual emergency stop from UI"""
+        self.start()
         self._emergency_stop("Manual emergency stop")
\ No newline at end of file
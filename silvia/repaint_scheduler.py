@@ -0,0 +1,87 @@
+import time
+from collections import deque
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal, pyqtSlot, pyqtProperty
+
+class RepaintScheduler(QObject):
+    """Coalesces chart repaint requests into at most max_fps frames per second
+
+    Sources call markDirty() (series appends are wired up with watch()); the scheduler emits
+    frame() once per interval while something is dirty and stays idle otherwise. Charts report
+    how long each paint took through reportFrame() so the cap can be tuned on the target display.
+    """
+    frame = pyqtSignal()
+    statsChanged = pyqtSignal()
+
+    def __init__(self, max_fps=20, parent=None, stats_window=120):
+        super().__init__(parent)
+        self._interval = 1.0 / max_fps
+        self._dirty = False
+        self._last_frame = 0.0
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._emit_frame)
+
+        self.requests = 0  # markDirty() calls
+        self.frames = 0    # frames actually emitted
+        self._paint_times = deque(maxlen=stats_window)     # ms per reported paint
+        self._frame_intervals = deque(maxlen=stats_window)  # s between emitted frames
+        self._last_stats_emit = 0.0
+
+    def watch(self, series):
+        """Repaint whenever a RingSeries gains a point or is cleared"""
+        series.appended.connect(self.markDirty)
+        series.cleared.connect(self.markDirty)
+
+    @pyqtSlot()
+    def markDirty(self):
+        self.requests += 1
+        self._dirty = True
+        if self._timer.isActive():
+            return
+        wait = self._last_frame + self._interval - time.monotonic()
+        self._timer.start(max(0, int(wait * 1000)))
+
+    def _emit_frame(self):
+        if not self._dirty:
+            return
+        self._dirty = False
+        now = time.monotonic()
+        if self._last_frame and now - self._last_frame < 1.0:
+            self._frame_intervals.append(now - self._last_frame)
+        self._last_frame = now
+        self.frames += 1
+        self.frame.emit()
+
+    @pyqtSlot(float)
+    def reportFrame(self, paint_ms):
+        self._paint_times.append(paint_ms)
+        now = time.monotonic()
+        if now - self._last_stats_emit >= 1.0:
+            self._last_stats_emit = now
+            self.statsChanged.emit()
+
+    @pyqtProperty(float, notify=statsChanged)
+    def frameTimeMs(self):
+        """Mean paint time over the recent window"""
+        return sum(self._paint_times) / len(self._paint_times) if self._paint_times else 0.0
+
+    @pyqtProperty(float, notify=statsChanged)
+    def frameTimeMaxMs(self):
+        return max(self._paint_times) if self._paint_times else 0.0
+
+    @pyqtProperty(float, notify=statsChanged)
+    def fps(self):
+        """Frame rate actually delivered while charts were updating"""
+        if not self._frame_intervals:
+            return 0.0
+        return len(self._frame_intervals) / sum(self._frame_intervals)
+
+    def get_stats(self):
+        return {
+            'requests': self.requests,
+            'frames': self.frames,
+            'fps': round(self.fps, 1),
+            'paint_ms_avg': round(self.frameTimeMs, 2),
+            'paint_ms_max': round(self.frameTimeMaxMs, 2),
+        }
@@ -4,22 +4,30 @@ Silvia Coffee Machine Startup Script
 Handles both mock and real hardware modes
 """
 
+import time
+_started = time.perf_counter()
+
 import sys
 import os
 import argparse
-from PyQt6.QtGui import QGuiApplication
-from PyQt6.QtQml import qmlRegisterType, QQmlApplicationEngine
-from PyQt6.QtCore import QUrl
-from qml_backend import CoffeeController
 import config
+from startup_profile import StartupProfile
 
 def main():
     parser = argparse.ArgumentParser(description='Silvia Coffee Machine Controller')
     parser.add_argument('--mock', action='store_true', help='Use mock serial communication')
     parser.add_argument('--port', type=str, help='Serial port (e.g., COM3 on Windows, /dev/ttyUSB0 on Linux)')
     parser.add_argument('--fullscreen', action='store_true', help='Run in fullscreen mode')
+    parser.add_argument('--replay', type=str, metavar='FILE',
+                        help='Replay a recorded session (logs/silvia_*.log or logs/telemetry_*.bin)')
+    parser.add_argument('--replay-speed', type=float, default=None,
+                        help='Replay speed: 1 = original timing (default), 2 = twice as fast, 0 = as fast as possible')
+    parser.add_argument('--replay-loop', action='store_true', help='Restart the replay when it ends')
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='Print how long each startup phase takes, up to the first frame and the link coming up')
     
     args = parser.parse_args()
+    profile = StartupProfile(args.profile_startup, _started)
     
     # Override config based on command line arguments
     if args.mock:
@@ -29,16 +37,37 @@ def main():
         config.USE_MOCK_SERIAL = False
     if args.fullscreen:
         config.FULLSCREEN = True
+    if args.replay:
+        config.SERIAL_REPLAY_FILE = args.replay
+    if args.replay_speed is not None:
+        config.SERIAL_REPLAY_SPEED = args.replay_speed
+    if args.replay_loop:
+        config.SERIAL_REPLAY_LOOP = True
     
     print(f"Starting Silvia Coffee Machine...")
-    print(f"Mock Serial: {config.USE_MOCK_SERIAL}")
-    if not config.USE_MOCK_SERIAL:
-        print(f"Serial Port: {config.SERIAL_PORT or 'Auto-detect'}")
+    if config.SERIAL_REPLAY_FILE:
+        speed = config.SERIAL_REPLAY_SPEED
+        print(f"Replaying: {config.SERIAL_REPLAY_FILE} ({'as fast as possible' if speed <= 0 else f'{speed}x'})")
+    else:
+        print(f"Mock Serial: {config.USE_MOCK_SERIAL}")
+        if not config.USE_MOCK_SERIAL:
+            print(f"Serial Port: {config.SERIAL_PORT or 'Auto-detect'}")
+    
+    profile.mark("arguments + config")
+    
+    # Imported after the flags are applied, as the backend reads config when it starts
+    from PyQt6.QtGui import QGuiApplication
+    from PyQt6.QtQml import qmlRegisterType, QQmlApplicationEngine
+    from PyQt6.QtCore import QUrl, QTimer
+    profile.mark("Qt imports")
+    from qml_backend import CoffeeController
+    profile.mark("backend import")
     
     app = QGuiApplication(sys.argv)
     
     # Register the backend with QML
     qmlRegisterType(CoffeeController, "CoffeeController", 1, 0, "CoffeeController")
+    profile.mark("application")
     
     # Create QML engine
     engine = QQmlApplicationEngine()
@@ -48,12 +77,31 @@ def main():
     if not engine.rootObjects():
         print("Failed to load QML file")
         sys.exit(-1)
+    profile.mark("QML load")
+    
+    root = engine.rootObjects()[0]
+    controller = root.findChild(CoffeeController)
     
     # Set fullscreen if requested
     if config.FULLSCREEN:
-        root = engine.rootObjects()[0]
         root.showFullScreen()
     
+    # Logging, safety, heater control and the serial link come up once the window has been drawn
+    def link_up():
+        controller.connection.connected.disconnect(link_up)
+        profile.mark("link up (READY)")
+        profile.report()
+    def start_controller():
+        controller.start(profile)
+        profile.report()
+        if args.profile_startup:
+            controller.connection.connected.connect(link_up)
+    def first_frame():
+        root.frameSwapped.disconnect(first_frame)
+        profile.mark("first frame")
+        QTimer.singleShot(0, start_controller)
+    root.frameSwapped.connect(first_frame)
+    
     print("Silvia Coffee Machine started successfully!")
     sys.exit(app.exec())
 
@@ -1,60 +1,168 @@
-from PyQt6.QtCore import QObject, pyqtSignal, QTimer
-import time
+from PyQt6.QtCore import QObject, pyqtSignal
+from serialcom.sim_clock import QtClock
+from trend_estimator import TrendEstimator
+
+# Trip conditions; each has its own deadline and its own latch
+COMM_TIMEOUT = "comm_timeout"
+BREW_TIMEOUT = "brew_timeout"
+STEAM_TIMEOUT = "steam_timeout"
+OVERHEAT = "overheat"
+HIGH_TEMP = "high_temp"
+HIGH_PRESSURE = "high_pressure"
+TEMP_RISING = "temp_rising"
+PRESSURE_RISING = "pressure_rising"
 
 class SafetyManager(QObject):
     emergencyStop = pyqtSignal(str)  # reason
     warningIssued = pyqtSignal(str)  # warning message
-    
-    def __init__(self):
+
+    def __init__(self, clock=None):
         super().__init__()
         self.max_temp = 160.0  # Absolute max temperature
+        self.warning_margin = 10.0  # warn this far below max_temp; overheat clears below it
         self.max_brew_time = 300  # 5 minutes max brew
         self.max_steam_time = 600  # 10 minutes max steam
         self.comm_timeout = 10.0  # 10 seconds without data
-        
-        self.last_data_time = time.time()
+        # Pressure is only warned on: a choked puck against the pump's stall pressure is a bad
+        # shot, not a hazard, and the OPV (where fitted) is what limits it
+        self.pressure_warn_limit = 13.0  # bar, above the OPV setting of a stock machine
+
+        # Trends over the last few samples let a limit trip before the reading gets there;
+        # the boiler probe lags the water by seconds, so the trend is the earlier warning
+        self.temp_trend = TrendEstimator(window=12)  # 3 s of telemetry at 4 Hz
+        self.pressure_trend = TrendEstimator(window=6)
+        self.temp_trip_horizon = 2.0  # trip if the trend reaches max_temp within this many seconds
+        self.temp_warn_horizon = 10.0
+        self.pressure_warn_horizon = 0.5  # short, as a normal ramp is steep
+
+        # Deadlines run on one-shot calls, so a condition trips when it falls due rather
+        # than on the next poll; pass a VirtualClock to step them in tests
+        self.clock = clock or QtClock()
+        self._deadlines = {}  # condition -> time it trips unless rearmed or disarmed
+        self._calls = {}      # condition -> (pending call, time it fires)
+
+        # Latched trips and issued warnings; each is reported once until its condition clears
+        self.tripped = {}
+        self._warned = set()
+
+        self.last_data_time = self.clock.now()
         self.brew_start_time = None
         self.steam_start_time = None
-        
-        # Safety check timer
-        self.safety_timer = QTimer()
-        self.safety_timer.timeout.connect(self._safety_check)
-        self.safety_timer.start(1000)  # Check every second
-        
+        self._arm(COMM_TIMEOUT, self.last_data_time + self.comm_timeout)
+
     def update_data_timestamp(self):
-        self.last_data_time = time.time()
-        
+        # Runs for every batch, so only move the deadline; the pending call catches up lazily
+        self.last_data_time = self.clock.now()
+        self.tripped.pop(COMM_TIMEOUT, None)
+        self._arm(COMM_TIMEOUT, self.last_data_time + self.comm_timeout)
+
     def start_brew_timer(self):
-        self.brew_start_time = time.time()
-        
+        self.brew_start_time = self.clock.now()
+        self.tripped.pop(BREW_TIMEOUT, None)
+        self._arm(BREW_TIMEOUT, self.brew_start_time + self.max_brew_time)
+
     def start_steam_timer(self):
-        self.steam_start_time = time.time()
-        
+        self.steam_start_time = self.clock.now()
+        self.tripped.pop(STEAM_TIMEOUT, None)
+        self._arm(STEAM_TIMEOUT, self.steam_start_time + self.max_steam_time)
+
     def stop_brew_timer(self):
         self.brew_start_time = None
-        
+        self._disarm(BREW_TIMEOUT)
+
     def stop_steam_timer(self):
         self.steam_start_time = None
-        
-    def check_temperature(self, temp):
+        self._disarm(STEAM_TIMEOUT)
+
+    def check_temperature(self, temp, timestamp=None):
+        """Check a reading taken at timestamp (seconds, defaults to now); False if over the limit"""
+        self.temp_trend.add(self.clock.now() if timestamp is None else timestamp, temp)
         if temp > self.max_temp:
-            self.emergencyStop.emit(f"OVERHEAT: {temp}°C > {self.max_temp}°C")
+            self._trip(OVERHEAT, f"OVERHEAT: {temp}°C > {self.max_temp}°C")
             return False
-        elif temp > self.max_temp - 10:
-            self.warningIssued.emit(f"High temperature warning: {temp}°C")
+
+        projected = self.temp_trend.projected(self.temp_trip_horizon)
+        if projected is not None and projected > self.max_temp:
+            self._trip(OVERHEAT, f"OVERHEAT PREDICTED: {temp}°C rising {self.temp_trend.slope():.1f}°C/s, "
+                                 f"{self.max_temp}°C within {self.temp_trip_horizon:g}s")
+            return True
+
+        rising = self.temp_trend.projected(self.temp_warn_horizon)
+        if rising is not None and rising > self.max_temp:
+            self._warn(TEMP_RISING, f"Temperature rising fast: {temp}°C at {self.temp_trend.slope():.1f}°C/s")
+        else:
+            self._warned.discard(TEMP_RISING)
+
+        if temp > self.max_temp - self.warning_margin:
+            self._warn(HIGH_TEMP, f"High temperature warning: {temp}°C")
+        elif rising is None or rising <= self.max_temp:
+            # Back below the warning band and not heading up to the limit: report again next time
+            self.tripped.pop(OVERHEAT, None)
+            self._warned.discard(HIGH_TEMP)
         return True
-        
-    def _safety_check(self):
-        current_time = time.time()
-        
-        # Check communication timeout
-        if current_time - self.last_data_time > self.comm_timeout:
-            self.emergencyStop.emit("Communication timeout - no data from hardware")
-            
-        # Check brew timeout
-        if self.brew_start_time and (current_time - self.brew_start_time) > self.max_brew_time:
-            self.emergencyStop.emit("Brew timeout - maximum brew time exceeded")
-            
-        # Check steam timeout
-        if self.steam_start_time and (current_time - self.steam_start_time) > self.max_steam_time:
-            self.emergencyStop.emit("Steam timeout - maximum steam time exceeded")
\ No newline at end of file
+
+    def check_pressure(self, pressure, timestamp=None):
+        """Check a reading taken at timestamp (seconds, defaults to now); warns, never trips"""
+        self.pressure_trend.add(self.clock.now() if timestamp is None else timestamp, pressure)
+        if pressure > self.pressure_warn_limit:
+            self._warn(HIGH_PRESSURE, f"High pressure warning: {pressure} bar")
+        else:
+            self._warned.discard(HIGH_PRESSURE)
+
+        projected = self.pressure_trend.projected(self.pressure_warn_horizon)
+        if projected is not None and projected > self.pressure_warn_limit:
+            self._warn(PRESSURE_RISING, f"Pressure rising fast: {pressure} bar at "
+                                        f"{self.pressure_trend.slope():.1f} bar/s")
+        else:
+            self._warned.discard(PRESSURE_RISING)
+
+    def stop(self):
+        for condition in list(self._calls):
+            self._disarm(condition)
+        self._deadlines.clear()
+
+    def _arm(self, condition, due):
+        self._deadlines[condition] = due
+        pending = self._calls.get(condition)
+        if pending is not None:
+            if pending[1] <= due:
+                return  # fires first and rearms for the rest
+            pending[0].cancel()
+        delay = max(0.0, due - self.clock.now())
+        call = self.clock.call_later(delay, lambda: self._deadline_reached(condition))
+        self._calls[condition] = (call, due)
+
+    def _disarm(self, condition):
+        self._deadlines.pop(condition, None)
+        pending = self._calls.pop(condition, None)
+        if pending is not None:
+            pending[0].cancel()
+
+    def _deadline_reached(self, condition):
+        self._calls.pop(condition, None)
+        due = self._deadlines.get(condition)
+        if due is None:
+            return
+        if due > self.clock.now():
+            self._arm(condition, due)  # rearmed since this call was scheduled
+            return
+        del self._deadlines[condition]
+
+        if condition == COMM_TIMEOUT:
+            self._trip(condition, "Communication timeout - no data from hardware")
+        elif condition == BREW_TIMEOUT:
+            self._trip(condition, "Brew timeout - maximum brew time exceeded")
+        elif condition == STEAM_TIMEOUT:
+            self._trip(condition, "Steam timeout - maximum steam time exceeded")
+
+    def _trip(self, condition, reason):
+        if condition in self.tripped:
+            return
+        self.tripped[condition] = reason
+        self.emergencyStop.emit(reason)
+
+    def _warn(self, condition, message):
+        if condition in self._warned:
+            return
+        self._warned.add(condition)
+        self.warningIssued.emit(message)
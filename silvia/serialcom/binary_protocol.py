@@ -0,0 +1,143 @@
+"""
+Binary telemetry framing, enabled on the firmware with the "PROTO BIN" command.
+
+Frame layout (little-endian, 21 bytes):
+    sync      2s  0xAA 0x55
+    seq       H   wraps at 65536, gaps mean dropped frames
+    millis    I   firmware millis() when the frame was sent
+    state     B   SystemState enum
+    temp      h   0.1 °C
+    pressure  H   0.01 bar
+    weight    h   0.1 g
+    pump      B   percent
+    flags     B   bit 0 valve open, bit 1 heater on
+    brew_time H   seconds
+    crc       H   CRC-16/CCITT-FALSE over seq..brew_time
+
+ASCII responses (OK:..., PONG, ERROR:...) keep flowing on the same stream. A message that
+starts with the sync bytes is a frame, anything else runs to the next newline.
+"""
+
+import struct
+from binascii import crc_hqx
+from serialcom.telemetry_codec import STATE_NAMES, TelemetrySample
+
+SYNC = b'\xAA\x55'
+_BODY = struct.Struct('<HIBhHhBBH')
+FRAME_SIZE = len(SYNC) + _BODY.size + 2
+
+FLAG_VALVE = 0x01
+FLAG_HEATER = 0x02
+
+# Longest ASCII line we will buffer while waiting for a newline
+MAX_LINE_LENGTH = 1024
+
+
+def crc16(data):
+    """CRC-16/CCITT-FALSE (poly 0x1021, init 0xFFFF), matching crc16() in the firmware"""
+    return crc_hqx(data, 0xFFFF)
+
+
+def encode_frame(seq, millis, state, temp, pressure, weight, pump, valve, heater, brew_time):
+    body = _BODY.pack(
+        seq & 0xFFFF,
+        millis & 0xFFFFFFFF,
+        state,
+        int(round(temp * 10)),
+        int(round(pressure * 100)),
+        int(round(weight * 10)),
+        pump,
+        (FLAG_VALVE if valve else 0) | (FLAG_HEATER if heater else 0),
+        brew_time)
+    return SYNC + body + crc16(body).to_bytes(2, 'little')
+
+
+def decode_frame(frame):
+    """Decode one complete frame into (seq, TelemetrySample), or None if the CRC does not match"""
+    body = frame[2:2 + _BODY.size]
+    if crc16(body) != int.from_bytes(frame[2 + _BODY.size:FRAME_SIZE], 'little'):
+        return None
+    seq, millis, state, temp, pressure, weight, pump, flags, brew_time = _BODY.unpack(body)
+    sample = TelemetrySample(
+        STATE_NAMES[state] if state < len(STATE_NAMES) else "UNKNOWN",
+        temp / 10.0,
+        pressure / 100.0,
+        weight / 10.0,
+        pump,
+        bool(flags & FLAG_VALVE),
+        bool(flags & FLAG_HEATER),
+        brew_time,
+        millis)
+    return seq, sample
+
+
+class StreamDecoder:
+    """Splits a serial byte stream into ASCII lines and binary telemetry frames"""
+
+    def __init__(self):
+        self.buffer = b''
+        self.last_seq = None
+        self.frames = 0
+        self.crc_errors = 0
+        self.dropped_frames = 0
+
+    def feed(self, data):
+        """Consume bytes, returning (lines, samples) for every complete message"""
+        buf = self.buffer + data if self.buffer else data
+        lines = []
+        samples = []
+        pos = 0
+        end = len(buf)
+        while pos < end:
+            if buf[pos] == 0xAA:
+                if end - pos < 2:
+                    break
+                if buf[pos + 1] == 0x55:
+                    if end - pos < FRAME_SIZE:
+                        break
+                    decoded = decode_frame(buf[pos:pos + FRAME_SIZE])
+                    if decoded is None:
+                        self.crc_errors += 1
+                        pos = self._resync(buf, pos + 1)
+                        continue
+                    seq, sample = decoded
+                    self._track_sequence(seq)
+                    samples.append(sample)
+                    pos += FRAME_SIZE
+                    continue
+
+            newline = buf.find(b'\n', pos)
+            if newline == -1:
+                if end - pos > MAX_LINE_LENGTH:
+                    pos = self._resync(buf, pos + 1)
+                    continue
+                break
+            line = buf[pos:newline].decode('utf-8', errors='replace').strip()
+            if line:
+                lines.append(line)
+            pos = newline + 1
+
+        self.buffer = buf[pos:]
+        return lines, samples
+
+    def reset(self):
+        self.buffer = b''
+        self.last_seq = None
+
+    def _track_sequence(self, seq):
+        self.frames += 1
+        if self.last_seq is not None:
+            self.dropped_frames += (seq - self.last_seq - 1) & 0xFFFF
+        self.last_seq = seq
+
+    @staticmethod
+    def _resync(buf, start):
+        """Skip to the next sync after a corrupt frame or runaway line
+
+        Frame payloads can contain newline bytes, so only a sync is a safe place to restart.
+        """
+        sync = buf.find(SYNC, start)
+        if sync != -1:
+            return sync
+        # Keep a trailing half sync so a frame split across reads is not lost
+        return len(buf) - 1 if buf.endswith(b'\xAA') else len(buf)
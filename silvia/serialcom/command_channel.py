@@ -0,0 +1,150 @@
+"""
+Request/response layer over any SerialManager backend
+
+Once the firmware has agreed to "PROTO TAGS" (see negotiate()), commands that expect a reply
+are tagged " #<id>"; the firmware echoes the tag on its reply, so each OK/ERROR/PONG is
+matched to the command that caused it and the round trip is timed. Firmware from before
+tagging matches commands exactly and would refuse a tagged one, so until then, or for good
+if it refuses, commands go untagged and each untagged OK/ERROR/PONG is
+taken as the reply to the oldest command still waiting, which holds as long as the firmware
+answers in order. A command with no reply within its timeout fails.
+
+Commands sent without expecting a reply (the per-sample SET_HEATER_PWM) go untagged.
+The writing itself happens in the backend; the real one does it off the GUI thread.
+"""
+
+from collections import deque, namedtuple
+from PyQt6.QtCore import QObject, pyqtSignal
+from serialcom.sim_clock import QtClock
+
+CommandResult = namedtuple('CommandResult', 'id command ok reply rtt_ms')
+
+# Lines that answer a command, as opposed to telemetry and status
+REPLY_PREFIXES = ("OK", "ERROR", "PONG")
+
+def split_tag(line):
+    """(line without its tag, id) for a tagged reply, (line, None) otherwise"""
+    head, sep, tag = line.rpartition(' #')
+    if sep and tag.isdigit():
+        return head, int(tag)
+    return line, None
+
+class _Pending:
+    __slots__ = ('id', 'command', 'sent_at', 'callback', 'timeout_call')
+
+    def __init__(self, command_id, command, sent_at, callback):
+        self.id = command_id
+        self.command = command
+        self.sent_at = sent_at
+        self.callback = callback
+        self.timeout_call = None
+
+class CommandChannel(QObject):
+    acknowledged = pyqtSignal(object)  # CommandResult for every command that got an OK/PONG/STATUS reply
+    failed = pyqtSignal(object)        # CommandResult for ERROR replies, timeouts and resets
+
+    MAX_ID = 65535
+
+    def __init__(self, serial, clock=None, timeout=1.0):
+        super().__init__()
+        self.serial = serial
+        self.clock = clock or QtClock()
+        self.timeout = timeout
+        self.pending = {}
+        self.tagged = False  # set once the firmware has agreed to echo tags
+        self._untagged = deque()  # ids of commands sent untagged, oldest first
+        self._next_id = 1
+        self.sent_count = 0
+        self.acknowledged_count = 0
+        self.failed_count = 0
+
+    def send(self, command, callback=None, timeout=None, expect_reply=True):
+        """Send a command; callback(CommandResult) runs once it is answered, refused or times out
+
+        Returns the command's id, or None for a command sent without expecting a reply.
+        """
+        if not expect_reply:
+            self.serial.send_command(command)
+            return None
+
+        command_id = self._next_id
+        self._next_id = command_id % self.MAX_ID + 1
+        pending = _Pending(command_id, command, self.clock.now(), callback)
+        stale = self.pending.pop(command_id, None)
+        if stale is not None:
+            self._resolve(stale, False, "id reused before a reply")
+        self.pending[command_id] = pending
+        pending.timeout_call = self.clock.call_later(self.timeout if timeout is None else timeout,
+                                                     lambda: self._timed_out(command_id, pending))
+        self.sent_count += 1
+        if self.tagged:
+            self.serial.send_command(f"{command} #{command_id}")
+        else:
+            self._untagged.append(command_id)
+            self.serial.send_command(command)
+        return command_id
+
+    def negotiate(self):
+        """Ask the firmware to echo tags, after connecting; commands go untagged until it agrees"""
+        self.tagged = False
+        self.send("PROTO TAGS", self._tags_answered)
+
+    def match(self, line):
+        """Resolve the command a reply answers; returns the line without its tag"""
+        if ' #' not in line:
+            if self._untagged and line.startswith(REPLY_PREFIXES):
+                self._match_untagged(line)
+            return line
+        line, command_id = split_tag(line)
+        pending = self.pending.pop(command_id, None) if command_id is not None else None
+        if pending is not None:
+            pending.timeout_call.cancel()
+            self._resolve(pending, not line.startswith("ERROR"), line)
+        return line
+
+    def reset(self, serial=None, reason="connection reset"):
+        """Fail everything in flight, e.g. on reconnect, optionally switching backend"""
+        if serial is not None:
+            self.serial = serial
+        self.tagged = False  # the next firmware may not tag; negotiate() again once connected
+        self._untagged.clear()
+        pending, self.pending = self.pending, {}
+        for command in pending.values():
+            command.timeout_call.cancel()
+            self._resolve(command, False, reason)
+
+    def get_stats(self):
+        return {
+            'sent': self.sent_count,
+            'acknowledged': self.acknowledged_count,
+            'failed': self.failed_count,
+            'in_flight': len(self.pending),
+        }
+
+    def _tags_answered(self, result):
+        self.tagged = result.ok
+
+    def _match_untagged(self, line):
+        while self._untagged:
+            pending = self.pending.pop(self._untagged.popleft(), None)
+            if pending is not None:
+                pending.timeout_call.cancel()
+                self._resolve(pending, not line.startswith("ERROR"), line)
+                return
+
+    def _timed_out(self, command_id, pending):
+        if self.pending.get(command_id) is pending:
+            del self.pending[command_id]
+            self._resolve(pending, False, "timeout")
+
+    def _resolve(self, pending, ok, reply):
+        result = CommandResult(pending.id, pending.command, ok, reply,
+                               (self.clock.now() - pending.sent_at) * 1000.0)
+        if ok:
+            self.acknowledged_count += 1
+            self.acknowledged.emit(result)
+        else:
+            self.failed_count += 1
+            self.failed.emit(result)
+        if pending.callback is not None:
+            pending.callback(result)
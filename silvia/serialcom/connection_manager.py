@@ -0,0 +1,161 @@
+"""
+Connection state machine over any SerialManager backend
+
+    DISCONNECTED -> OPENING -> WAITING_READY -> CONNECTED
+
+OPENING runs the backend's blocking open() (the real port) on a worker thread; backends
+without one (mock, replay) go straight on. The link counts as up on the firmware's READY line,
+printed at the end of setup() after a reset, or on a PONG to the PING probes sent while waiting,
+for a board that was already running and did not reset when the port opened. Failing to open,
+no READY within ready_timeout, or lost() on a connected link drops back to DISCONNECTED and
+schedules the next attempt with capped exponential backoff. For a backend with a port
+discovery (the real one), a board plugged in while waiting cuts the wait short.
+"""
+
+from PyQt6.QtCore import QObject, QThread, pyqtSignal
+from serialcom.sim_clock import QtClock
+
+DISCONNECTED = "DISCONNECTED"
+OPENING = "OPENING"
+WAITING_READY = "WAITING_READY"
+CONNECTED = "CONNECTED"
+
+class _OpenThread(QThread):
+    """Runs serial.open() off the GUI thread; done carries the exception, or None"""
+    done = pyqtSignal(object)
+
+    def __init__(self, serial):
+        super().__init__()
+        self.serial = serial
+
+    def run(self):
+        try:
+            self.serial.open()
+        except Exception as e:
+            self.done.emit(e)
+        else:
+            self.done.emit(None)
+
+class ConnectionManager(QObject):
+    stateChanged = pyqtSignal(str)
+    connected = pyqtSignal()
+    disconnected = pyqtSignal(str, float)  # reason, seconds until the next attempt
+
+    def __init__(self, serial, clock=None, ready_timeout=5.0, probe_interval=1.0,
+                 backoff_initial=1.0, backoff_max=30.0, backoff_factor=2.0, hotplug_interval=0.5):
+        super().__init__()
+        self.serial = serial
+        self.clock = clock or QtClock()
+        self.ready_timeout = ready_timeout
+        self.probe_interval = probe_interval
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.backoff_factor = backoff_factor
+        self.hotplug_interval = hotplug_interval
+        self.discovery = getattr(serial, 'discovery', None)
+        self.state = DISCONNECTED
+        self.attempts = 0  # failed attempts since the link was last up
+        self._open_thread = None
+        self._calls = []  # ready timeout, probes or the pending retry
+        self.serial.lines_received.connect(self._handle_lines)
+
+    def start(self):
+        """Connect, and keep reconnecting until stop()"""
+        if self.state == DISCONNECTED:
+            self._cancel_calls()
+            self._open()
+
+    def stop(self):
+        self._cancel_calls()
+        if self._open_thread is not None:
+            # Opening a port does not take long to fail; let it finish rather than abandon it
+            self._open_thread.wait()
+            self._open_thread = None
+        if self.state != DISCONNECTED:
+            self.serial.stop()
+        self._set_state(DISCONNECTED)
+
+    def lost(self, reason):
+        """The connected link stopped working; reconnect"""
+        if self.state == CONNECTED:
+            self._fail(reason)
+
+    def retry_delay(self):
+        """Backoff before the next attempt, given the failures so far"""
+        return min(self.backoff_max, self.backoff_initial * self.backoff_factor ** max(0, self.attempts - 1))
+
+    def _open(self):
+        self._set_state(OPENING)
+        if not hasattr(self.serial, 'open'):
+            self._opened(None)
+            return
+        thread = _OpenThread(self.serial)
+        thread.done.connect(lambda error: self._opened(error, thread))
+        self._open_thread = thread
+        thread.start()
+
+    def _opened(self, error, thread=None):
+        if thread is not self._open_thread or self.state != OPENING:
+            return  # an attempt abandoned by stop()
+        if thread is not None:
+            thread.wait()
+            self._open_thread = None
+        if error is not None:
+            self._fail(f"open failed: {error}")
+            return
+        # Waiting before start(), since a backend may print READY from inside it
+        self._set_state(WAITING_READY)
+        try:
+            self.serial.start()
+        except Exception as e:
+            self._fail(f"start failed: {e}")
+            return
+        if self.state != WAITING_READY:
+            return
+        self._calls = [self.clock.call_later(self.ready_timeout, lambda: self._fail("no READY from the firmware")),
+                       self.clock.call_every(self.probe_interval, self._probe)]
+        self._probe()
+
+    def _probe(self):
+        self.serial.send_command("PING")
+
+    def _handle_lines(self, lines):
+        if self.state != WAITING_READY:
+            return
+        if any(line.startswith("READY") or line.startswith("PONG") for line in lines):
+            self._cancel_calls()
+            self.attempts = 0
+            self._set_state(CONNECTED)
+            self.connected.emit()
+
+    def _fail(self, reason):
+        self._cancel_calls()
+        if self.state in (WAITING_READY, CONNECTED):
+            self.serial.stop()
+        self.attempts += 1
+        self._set_state(DISCONNECTED)
+        delay = self.retry_delay()
+        self._calls = [self.clock.call_later(delay, self._retry)]
+        if self.discovery is not None:
+            self.discovery.poll()
+            self._calls.append(self.clock.call_every(self.hotplug_interval, self._check_hotplug))
+        self.disconnected.emit(reason, delay)
+
+    def _check_hotplug(self):
+        if self.discovery.poll():
+            self._retry()
+
+    def _retry(self):
+        self._cancel_calls()
+        if self.state == DISCONNECTED:
+            self._open()
+
+    def _cancel_calls(self):
+        for call in self._calls:
+            call.cancel()
+        self._calls = []
+
+    def _set_state(self, state):
+        if state != self.state:
+            self.state = state
+            self.stateChanged.emit(state)
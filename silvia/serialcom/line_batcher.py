@@ -0,0 +1,29 @@
+from PyQt6.QtCore import QObject, pyqtSignal
+from serialcom.sim_clock import QtClock
+
+class LineBatcher(QObject):
+    """Collects lines and hands them on as one list once a size or time bound is hit"""
+    batch_ready = pyqtSignal(list)
+
+    def __init__(self, max_lines=32, max_latency_ms=20, clock=None):
+        super().__init__()
+        self.max_lines = max_lines
+        self.max_latency = max_latency_ms / 1000.0
+        self.clock = clock or QtClock()
+        self.pending = []
+        self._flush_call = None
+
+    def add(self, line):
+        self.pending.append(line)
+        if len(self.pending) >= self.max_lines:
+            self.flush()
+        elif self._flush_call is None:
+            self._flush_call = self.clock.call_later(self.max_latency, self.flush)
+
+    def flush(self):
+        if self._flush_call is not None:
+            self._flush_call.cancel()
+            self._flush_call = None
+        if self.pending:
+            batch, self.pending = self.pending, []
+            self.batch_ready.emit(batch)
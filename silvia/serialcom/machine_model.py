@@ -0,0 +1,123 @@
+"""
+Lumped physical model of the machine for the mock serial manager
+
+BoilerModel: one thermal mass (water plus boiler body) heated by the PWM-driven element,
+losing heat to the room and to the cold water the pump draws in, read through a lagging
+sensor. GroupModel: a vibratory pump whose flow falls with back pressure, a compliant
+headspace that has to fill before pressure builds, and a puck whose resistance drops as it
+erodes; what passes the puck lands in the cup on the scale.
+
+Control constants come from the firmware's silvia_lever_main/config.h so the mock's heater
+logic matches the firmware exactly; the defaults below are used if the file is not present.
+"""
+
+import math
+import os
+import re
+
+FIRMWARE_CONFIG = os.path.join(os.path.dirname(__file__), "..", "..", "silvia_lever_main", "config.h")
+
+# Same values as config.h at the time of writing
+FIRMWARE_DEFAULTS = {
+    'TEMP_HYSTERESIS_HIGH': 5.0,
+    'TEMP_HYSTERESIS_MED': 1.0,
+    'TEMP_HYSTERESIS_LOW': 0.5,
+    'HEATER_PWM_FULL': 255,
+    'HEATER_PWM_MED': 150,
+    'HEATER_PWM_LOW': 80,
+    'HOST_HEATER_TIMEOUT': 1000,
+    'MAX_STEAM_TEMP': 160.0,
+}
+
+_DEFINE = re.compile(r'^\s*#define\s+(\w+)\s+([-+]?\d+(?:\.\d*)?)\b', re.MULTILINE)
+
+def firmware_constants(path=FIRMWARE_CONFIG):
+    """Numeric #defines from the firmware config.h, over FIRMWARE_DEFAULTS"""
+    constants = dict(FIRMWARE_DEFAULTS)
+    try:
+        with open(path) as f:
+            text = f.read()
+    except OSError:
+        return constants
+    for name, value in _DEFINE.findall(text):
+        constants[name] = float(value) if '.' in value else int(value)
+    return constants
+
+WATER_HEAT_CAPACITY = 4.186  # J/(g·K); 1 ml of water taken as 1 g throughout
+
+class BoilerModel:
+    def __init__(self, temp=25.0, ambient=22.0, inlet_temp=20.0, heater_power=1100.0,
+                 thermal_mass=1700.0, loss_coefficient=0.9, sensor_lag=3.0):
+        self.temp = temp                        # °C, water/boiler body
+        self.sensor_temp = temp                 # °C, what the PT100 reports
+        self.ambient = ambient
+        self.inlet_temp = inlet_temp            # °C, refill water from the tank
+        self.heater_power = heater_power        # W at PWM 255
+        self.thermal_mass = thermal_mass        # J/K, ~300 ml water plus the boiler body
+        self.loss_coefficient = loss_coefficient  # W/K to the room
+        self.sensor_lag = sensor_lag            # s, first-order lag of probe and well
+
+    def step(self, dt, heater_pwm, water_draw=0.0):
+        """Advance dt seconds with the heater at heater_pwm (0-255), drawing water_draw ml/s"""
+        power = self.heater_power * heater_pwm / 255.0
+        losses = self.loss_coefficient * (self.temp - self.ambient)
+        refill = water_draw * WATER_HEAT_CAPACITY * (self.temp - self.inlet_temp)
+        self.temp += (power - losses - refill) / self.thermal_mass * dt
+        self.sensor_temp += (self.temp - self.sensor_temp) * (1.0 - math.exp(-dt / self.sensor_lag))
+        return self.sensor_temp
+
+class GroupModel:
+    def __init__(self, pump_max_flow=5.0, pump_max_pressure=15.0, headspace_volume=6.0,
+                 compliance=0.5, puck_resistance=5.5, puck_erosion=0.35, dose=18.0,
+                 puck_retention=2.0, flush_resistance=0.3):
+        self.pump_max_flow = pump_max_flow          # ml/s at zero back pressure and PWM 255
+        self.pump_max_pressure = pump_max_pressure  # bar where the pump stalls
+        self.headspace_volume = headspace_volume    # ml to fill above the puck before it sees pressure
+        self.compliance = compliance                # ml/bar, trapped air and hoses
+        self.puck_resistance = puck_resistance      # bar·s/ml for a fresh puck
+        self.puck_erosion = puck_erosion            # fraction of resistance lost by the end of a shot
+        self.dose = dose                            # g of coffee
+        self.puck_retention = puck_retention        # ml soaked up by the puck before anything drips
+        self.flush_resistance = flush_resistance    # bar·s/ml through an empty group
+
+        self.pressure = 0.0   # bar at the sensor, upstream of the puck
+        self.weight = 0.0     # g in the cup
+        self.pump_flow = 0.0  # ml/s drawn from the boiler
+        self.reset_puck()
+
+    def reset_puck(self):
+        self.filled = 0.0     # ml into headspace and puck so far
+        self.through = 0.0    # ml that have passed the puck
+
+    def tare(self):
+        self.weight = 0.0
+
+    def step(self, dt, pump_pwm, valve_open, puck=True):
+        """Advance dt seconds; puck=False is a flush through the empty group"""
+        # The headspace is stiff, so integrate in short substeps
+        substeps = max(1, math.ceil(dt / 0.02))
+        for _ in range(substeps):
+            self._step(dt / substeps, pump_pwm if valve_open else 0, puck)
+        return self.pressure
+
+    def _step(self, dt, pump_pwm, puck):
+        duty = pump_pwm / 255.0
+        self.pump_flow = max(0.0, self.pump_max_flow * duty * (1.0 - self.pressure / self.pump_max_pressure))
+
+        if not puck:
+            outflow = self.pressure / self.flush_resistance
+        elif self.filled < self.headspace_volume:
+            # Water first fills the headspace; no pressure until it is full
+            self.filled += self.pump_flow * dt
+            return
+        else:
+            # Resistance falls as the puck washes out, reaching puck_erosion at about 2.5:1
+            extraction = min(1.0, self.through / (2.5 * self.dose))
+            outflow = self.pressure / (self.puck_resistance * (1.0 - self.puck_erosion * extraction))
+
+        self.pressure = max(0.0, self.pressure + (self.pump_flow - outflow) / self.compliance * dt)
+
+        if puck:
+            soaked = min(outflow * dt, max(0.0, self.puck_retention - self.through))
+            self.through += outflow * dt
+            self.weight += outflow * dt - soaked
@@ -1,9 +1,14 @@
-from PyQt6.QtCore import QObject, pyqtSignal, QTimer
+from PyQt6.QtCore import QObject, pyqtSignal
+from serialcom.line_batcher import LineBatcher
+from serialcom.binary_protocol import StreamDecoder, encode_frame
+from serialcom.sim_clock import QtClock
+from serialcom.machine_model import BoilerModel, GroupModel, firmware_constants
 import random
-import time
 
 class SerialManager(QObject):
     line_received = pyqtSignal(str)
+    lines_received = pyqtSignal(list)
+    samples_received = pyqtSignal(list)
     
     # Mirror Arduino state enum
     STATE_IDLE = 0
@@ -13,10 +18,21 @@ class SerialManager(QObject):
     STATE_STEAMING = 4
     STATE_FLUSHING = 5
     
-    def __init__(self):
+    TELEMETRY_INTERVAL = 0.25  # Match Arduino TELEMETRY_INTERVAL
+    UPDATE_INTERVAL = 0.1      # System update loop
+    
+    def __init__(self, batch_max_lines=32, batch_max_latency_ms=20, clock=None, seed=None):
         super().__init__()
         self.connected = False
         
+        # Pass a VirtualClock and a seed for a deterministic simulation that tests can step
+        self.clock = clock or QtClock()
+        self.rng = random.Random(seed)
+        self._boot_time = self.clock.now()
+        
+        self.batcher = LineBatcher(batch_max_lines, batch_max_latency_ms, self.clock)
+        self.batcher.batch_ready.connect(self.lines_received.emit)
+        
         # Mirror Arduino SystemData struct
         self.state = self.STATE_IDLE
         self.brewTemp = 93.0
@@ -29,101 +45,158 @@ class SerialManager(QObject):
         self.heaterOn = False
         self.brewTimer = 0
         self.scalesTared = False
+        self.heaterPwm = 0
+        self.potPower = 255  # pump potentiometer setting, read as pumpPower while the pump runs
+        self.hostHeaterPwm = -1  # duty from SET_HEATER_PWM, -1 while the firmware steps are in charge
+        self.lastHostHeaterPwm = 0
+        
+        # Physics behind the sensor readings; heater control uses the firmware's own constants
+        self.firmware = firmware_constants()
+        self.boiler = BoilerModel(temp=self.currentTemp)
+        self.group = GroupModel()
         
-        # Timers
-        self.telemetry_timer = QTimer()
-        self.telemetry_timer.timeout.connect(self._send_telemetry)
+        # Binary telemetry mode ("PROTO BIN"); frames go through the real decoder end to end
+        self.binaryTelemetry = False
+        self.telemetrySeq = 0
+        self.decoder = StreamDecoder()
         
-        self.update_timer = QTimer()
-        self.update_timer.timeout.connect(self._update_system)
+        self.telemetry_call = None
+        self.update_call = None
+        self.replyTag = ""  # " #<id>" of the command being handled, echoed on its reply
+        
+    def millis(self):
+        """Arduino millis(): ms since this simulated board booted"""
+        return int((self.clock.now() - self._boot_time) * 1000)
         
     def start(self):
         self.connected = True
-        self.telemetry_timer.start(250)  # Match Arduino TELEMETRY_INTERVAL
-        self.update_timer.start(100)     # System update loop
-        self.line_received.emit("READY")
+        self.telemetry_call = self.clock.call_every(self.TELEMETRY_INTERVAL, self._send_telemetry)
+        self.update_call = self.clock.call_every(self.UPDATE_INTERVAL, self._update_system)
+        self._emit_line("READY")
         
     def stop(self):
         self.connected = False
-        self.telemetry_timer.stop()
-        self.update_timer.stop()
+        for call in (self.telemetry_call, self.update_call):
+            if call is not None:
+                call.cancel()
+        self.telemetry_call = self.update_call = None
+        self.batcher.flush()
+        
+    def _emit_line(self, line):
+        self.line_received.emit(line)
+        self.batcher.add(line)
         
     def send_command(self, command):
         if not self.connected:
             return
             
         cmd = command.strip()
+        tagAt = cmd.rfind(" #")
+        if tagAt >= 0:
+            self.replyTag = cmd[tagAt:]
+            cmd = cmd[:tagAt].strip()
+        else:
+            self.replyTag = ""
         
         # Mirror Arduino command processing exactly
         if cmd.startswith("SET_TEMP BREW "):
             temp = float(cmd[14:])
             if 60 <= temp <= 110:  # MIN_TEMP to MAX_BREW_TEMP
                 self.brewTemp = temp
-                self.line_received.emit("OK:BREW_TEMP_SET")
+                self._reply("OK:BREW_TEMP_SET")
             else:
-                self.line_received.emit("ERROR:BREW_TEMP_OUT_OF_RANGE")
+                self._reply("ERROR:BREW_TEMP_OUT_OF_RANGE")
                 
         elif cmd.startswith("SET_TEMP STEAM "):
             temp = float(cmd[15:])
             if 60 <= temp <= 150:  # MIN_TEMP to MAX_STEAM_TEMP
                 self.steamTemp = temp
-                self.line_received.emit("OK:STEAM_TEMP_SET")
+                self._reply("OK:STEAM_TEMP_SET")
             else:
-                self.line_received.emit("ERROR:STEAM_TEMP_OUT_OF_RANGE")
+                self._reply("ERROR:STEAM_TEMP_OUT_OF_RANGE")
                 
         elif cmd == "START_BREW":
             if self.state == self.STATE_IDLE:
                 self.state = self.STATE_HEATING_BREW
-                self.line_received.emit("OK:BREW_STARTED")
+                self._reply("OK:BREW_STARTED")
             else:
-                self.line_received.emit("ERROR:NOT_IDLE")
+                self._reply("ERROR:NOT_IDLE")
                 
         elif cmd == "START_STEAM":
             if self.state == self.STATE_IDLE:
                 self.state = self.STATE_HEATING_STEAM
-                self.line_received.emit("OK:STEAM_STARTED")
+                self._reply("OK:STEAM_STARTED")
             else:
-                self.line_received.emit("ERROR:NOT_IDLE")
+                self._reply("ERROR:NOT_IDLE")
                 
         elif cmd == "START_FLUSH":
             if self.state == self.STATE_IDLE:
                 self.state = self.STATE_FLUSHING
                 self.valveOpen = True
-                self.line_received.emit("OK:FLUSH_STARTED")
+                self._reply("OK:FLUSH_STARTED")
             else:
-                self.line_received.emit("ERROR:NOT_IDLE")
+                self._reply("ERROR:NOT_IDLE")
                 
         elif cmd in ["BEGIN_BREW", "BREW_NOW"]:
             if self.state == self.STATE_HEATING_BREW:
                 self.state = self.STATE_BREWING
-                self.brewTimer = int(time.time() * 1000)  # millis()
+                self.brewTimer = self.millis()
                 self.scalesTared = True
                 self.valveOpen = True
-                self.line_received.emit("OK:BREWING_STARTED")
+                self.group.reset_puck()
+                self.group.tare()
+                self._reply("OK:BREWING_STARTED")
             else:
-                self.line_received.emit("ERROR:INVALID_STATE_FOR_BREW_NOW")
+                self._reply("ERROR:INVALID_STATE_FOR_BREW_NOW")
                 
         elif cmd == "STOP":
             self._stop_current_operation()
-            self.line_received.emit("OK:STOPPED")
+            self._reply("OK:STOPPED")
             
         elif cmd == "TARE_SCALES":
             self.scalesTared = True
-            self.line_received.emit("OK:SCALES_TARED")
+            self.group.tare()
+            self._reply("OK:SCALES_TARED")
             
         elif cmd == "GET_STATUS":
             self._send_status()
             
         elif cmd == "PING":
-            self.line_received.emit("PONG")
+            self._reply("PONG")
             
         elif cmd == "ABORT":
             self._stop_current_operation()
-            self.line_received.emit("OK:ABORTED")
+            self._reply("OK:ABORTED")
+            
+        elif cmd.startswith("SET_HEATER_PWM "):
+            # Sent with every sample, so no reply unless it is refused
+            value = cmd[15:]
+            if value == "AUTO":
+                self.hostHeaterPwm = -1
+            elif value.isdigit() and 0 <= int(value) <= 255:
+                self.hostHeaterPwm = int(value)
+                self.lastHostHeaterPwm = self.millis()
+            else:
+                self._reply("ERROR:HEATER_PWM_OUT_OF_RANGE")
+                
+        elif cmd == "PROTO BIN":
+            self.binaryTelemetry = True
+            self._reply("OK:PROTO_BIN")
+            
+        elif cmd == "PROTO ASCII":
+            self.binaryTelemetry = False
+            self._reply("OK:PROTO_ASCII")
+            
+        elif cmd == "PROTO TAGS":
+            # Tags are echoed whenever a command carries one; this only tells the host it may
+            self._reply("OK:PROTO_TAGS")
             
         elif len(cmd) > 0:
-            self.line_received.emit("ERROR:UNKNOWN_COMMAND")
+            self._reply("ERROR:UNKNOWN_COMMAND")
             
+    def _reply(self, line):
+        self._emit_line(line + self.replyTag)
+        
     def _update_system(self):
         # Mirror Arduino updateSystemLogic()
         if self.state == self.STATE_HEATING_BREW:
@@ -146,55 +219,44 @@ class SerialManager(QObject):
         self._update_sensors()
         
     def _control_heater(self, targetTemp):
+        # Mirror Arduino controlHeater(), with the same config.h constants
+        fw = self.firmware
         if targetTemp == 0:
-            self.heaterOn = False
-            return
-            
-        tempDiff = targetTemp - self.currentTemp
-        if tempDiff > 5.0:  # TEMP_HYSTERESIS_HIGH
-            self.heaterOn = True
-            # Simulate heating
-            self.currentTemp += random.uniform(0.5, 2.0)
-        elif tempDiff > 1.0:  # TEMP_HYSTERESIS_MED
-            self.heaterOn = True
-            self.currentTemp += random.uniform(0.2, 1.0)
-        elif tempDiff > 0.5:  # TEMP_HYSTERESIS_LOW
-            self.heaterOn = True
-            self.currentTemp += random.uniform(0.1, 0.5)
+            self.heaterPwm = 0
+        elif self.hostHeaterPwm >= 0 and self.millis() - self.lastHostHeaterPwm < fw['HOST_HEATER_TIMEOUT']:
+            self.heaterPwm = self.hostHeaterPwm if self.currentTemp < fw['MAX_STEAM_TEMP'] else 0
         else:
-            self.heaterOn = False
-            
-        # Natural cooling
-        if not self.heaterOn and self.currentTemp > 25:
-            self.currentTemp -= random.uniform(0.1, 0.3)
-            
-        self.currentTemp = max(20, min(160, self.currentTemp))
+            tempDiff = targetTemp - self.currentTemp
+            if tempDiff > fw['TEMP_HYSTERESIS_HIGH']:
+                self.heaterPwm = fw['HEATER_PWM_FULL']
+            elif tempDiff > fw['TEMP_HYSTERESIS_MED']:
+                self.heaterPwm = fw['HEATER_PWM_MED']
+            elif tempDiff > fw['TEMP_HYSTERESIS_LOW']:
+                self.heaterPwm = fw['HEATER_PWM_LOW']
+            else:
+                self.heaterPwm = 0
+        self.heaterOn = self.heaterPwm > 0
         
     def _control_pump(self, enable):
         if enable and (self.state == self.STATE_BREWING or self.state == self.STATE_FLUSHING):
-            # Simulate potentiometer reading
-            self.pumpPower = random.randint(50, 255)
+            self.pumpPower = self.potPower
         else:
             self.pumpPower = 0
             
     def _update_sensors(self):
-        # Simulate pressure sensor
-        if self.state == self.STATE_BREWING and self.pumpPower > 0:
-            self.pressure = random.uniform(6, 12)
-        else:
-            self.pressure = random.uniform(0, 1)
-            
-        # Simulate weight sensor
-        if self.state == self.STATE_BREWING:
-            # Simulate coffee extraction
-            elapsed = (int(time.time() * 1000) - self.brewTimer) / 1000.0 if self.brewTimer > 0 else 0
-            self.weight = min(elapsed * 0.8 + random.uniform(-2, 2), 50)
-        else:
-            self.weight = random.uniform(-1, 1)
-            
+        # Step the models over one update tick, then read them through noisy sensors
+        dt = self.UPDATE_INTERVAL
+        self.group.step(dt, self.pumpPower, self.valveOpen, puck=self.state != self.STATE_FLUSHING)
+        self.boiler.step(dt, self.heaterPwm, water_draw=self.group.pump_flow)
+        
+        self.currentTemp = self.boiler.sensor_temp + self.rng.gauss(0, 0.05)
+        self.pressure = max(0.0, self.group.pressure + self.rng.gauss(0, 0.02))
+        self.weight = self.group.weight + self.rng.gauss(0, 0.05)
+        
     def _stop_current_operation(self):
         self.state = self.STATE_IDLE
         self.pumpPower = 0
+        self.heaterPwm = 0
         self.heaterOn = False
         self.valveOpen = False
         self.brewTimer = 0
@@ -203,15 +265,29 @@ class SerialManager(QObject):
         # Mirror Arduino sendTelemetry() format
         brew_time_sec = 0
         if self.state == self.STATE_BREWING and self.brewTimer > 0:
-            brew_time_sec = (int(time.time() * 1000) - self.brewTimer) // 1000
+            brew_time_sec = (self.millis() - self.brewTimer) // 1000
             
         pump_percent = int((self.pumpPower / 255.0) * 100)
         
-        data_msg = f"DATA:{self.state},{self.currentTemp:.1f},{self.pressure:.2f},{self.weight:.1f},{pump_percent},{1 if self.valveOpen else 0},{1 if self.heaterOn else 0},{brew_time_sec}"
-        self.line_received.emit(data_msg)
+        if self.binaryTelemetry:
+            self._send_binary_telemetry(pump_percent, brew_time_sec)
+            return
+        
+        data_msg = f"DATA:{self.state},{self.currentTemp:.1f},{self.pressure:.2f},{self.weight:.1f},{pump_percent},{1 if self.valveOpen else 0},{1 if self.heaterOn else 0},{brew_time_sec},{self.millis()}"
+        self._emit_line(data_msg)
+        
+    def _send_binary_telemetry(self, pump_percent, brew_time_sec):
+        # Mirror Arduino sendBinaryTelemetry(), then decode exactly as the real reader would
+        frame = encode_frame(self.telemetrySeq, self.millis(), self.state,
+                             self.currentTemp, self.pressure, self.weight, pump_percent,
+                             self.valveOpen, self.heaterOn, brew_time_sec)
+        self.telemetrySeq = (self.telemetrySeq + 1) & 0xFFFF
+        lines, samples = self.decoder.feed(frame)
+        if samples:
+            self.samples_received.emit(samples)
         
     def _send_status(self):
         # Mirror Arduino sendStatus() format
         pump_percent = int((self.pumpPower / 255.0) * 100)
         status_msg = f"STATUS:state={self.state},temp={self.currentTemp:.1f},brewTemp={self.brewTemp:.1f},steamTemp={self.steamTemp:.1f},pressure={self.pressure:.2f},weight={self.weight:.1f},pump={pump_percent},valve={1 if self.valveOpen else 0},heater={1 if self.heaterOn else 0}"
-        self.line_received.emit(status_msg)
\ No newline at end of file
+        self._reply(status_msg)
\ No newline at end of file
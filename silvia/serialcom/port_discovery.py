@@ -0,0 +1,89 @@
+"""
+Teensy port discovery with a cache, for the real serial backend
+
+serial.tools.list_ports.comports() walks sysfs for every tty on Linux, so it only runs when
+something may have changed: the links in /dev/serial/by-id (one per USB serial device, named
+after its vendor, product and serial number) are read instead, which costs one small directory
+listing. While they are unchanged, find() answers from the cache, keyed by VID/PID/serial
+number, and sticks to the board it found last. Where there is no by-id directory (no USB serial
+devices plugged in, other platforms, containers without udev) it rescans at most once every
+rescan_interval.
+
+poll() reports by-id entries added since the last call; ConnectionManager uses it to retry
+straight away when a board is plugged in rather than at the end of its backoff.
+"""
+
+import os
+import time
+
+BY_ID_DIR = "/dev/serial/by-id"
+TEENSY_VID = 0x16C0
+
+def is_teensy(port):
+    """Teensy by description, manufacturer or USB vendor id"""
+    return ('teensy' in str(port.description).lower() or 'teensy' in str(port.manufacturer).lower()
+            or port.vid == TEENSY_VID)
+
+class PortDiscovery:
+    def __init__(self, by_id_dir=BY_ID_DIR, rescan_interval=5.0, list_ports=None):
+        self.by_id_dir = by_id_dir
+        self.rescan_interval = rescan_interval
+        self._list_ports = list_ports
+        self.ports = {}  # (vid, pid, serial number) -> device path, Teensys from the last scan
+        self.preferred = None  # key of the board find() returned last
+        self._snapshot = None  # by-id links at the last scan
+        self._scanned_at = None
+        self._polled = None  # by-id names at the last poll()
+        self.scans = 0
+        self.hits = 0
+
+    def snapshot(self):
+        """frozenset of (name, link target) in the by-id directory, None if there is none"""
+        try:
+            with os.scandir(self.by_id_dir) as entries:
+                return frozenset((entry.name, os.readlink(entry.path)) for entry in entries if entry.is_symlink())
+        except OSError:
+            return None
+
+    def find(self):
+        """Device path of the Teensy, or None; rescans only if the by-id links changed"""
+        snapshot = self.snapshot()
+        stale = (self._scanned_at is None or snapshot != self._snapshot
+                 or (snapshot is None and time.monotonic() - self._scanned_at >= self.rescan_interval))
+        if not stale:
+            device = self.ports.get(self.preferred)
+            if device is None and not self.ports:
+                self.hits += 1
+                return None  # nothing plugged in has changed since the scan that found no Teensy
+            if device is not None and os.path.exists(device):
+                self.hits += 1
+                return device
+        self._scan(snapshot)
+        if self.preferred not in self.ports:
+            self.preferred = min(self.ports, key=self.ports.get, default=None)
+        return self.ports.get(self.preferred)
+
+    def invalidate(self):
+        """Forget the scan, so the next find() enumerates the ports again"""
+        self._scanned_at = None
+
+    def poll(self):
+        """by-id names that appeared since the last poll(); the first call only takes note"""
+        snapshot = self.snapshot()
+        names = {name for name, _ in snapshot} if snapshot else set()
+        added = sorted(names - self._polled) if self._polled is not None else []
+        self._polled = names
+        return added
+
+    def get_stats(self):
+        return {'scans': self.scans, 'hits': self.hits, 'ports': dict(self.ports)}
+
+    def _scan(self, snapshot):
+        if self._list_ports is None:
+            import serial.tools.list_ports
+            self._list_ports = serial.tools.list_ports.comports
+        self.ports = {(port.vid, port.pid, port.serial_number): port.device
+                      for port in self._list_ports() if is_teensy(port)}
+        self._snapshot = snapshot
+        self._scanned_at = time.monotonic()
+        self.scans += 1
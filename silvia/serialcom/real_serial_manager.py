@@ -1,60 +1,193 @@
 from PyQt6.QtCore import QObject, pyqtSignal, QThread
+import logging
+import queue
 import serial
 import serial.tools.list_ports
 import time
+from serialcom.binary_protocol import StreamDecoder
+from serialcom.port_discovery import PortDiscovery
+
+# DataLogger's logger, so serial errors land in the session log
+logger = logging.getLogger('silvia_coffee')
 
 class SerialReaderThread(QThread):
-    line_received = pyqtSignal(str)
+    lines_received = pyqtSignal(list)
+    samples_received = pyqtSignal(list)  # TelemetrySample batches decoded from binary frames
+    read_error = pyqtSignal(str)  # the port failed (e.g. the cable was pulled) and the thread has stopped
     
-    def __init__(self, serial_port):
+    def __init__(self, serial_port, mode="blocking", read_timeout=0.1, batch_max_lines=32, batch_max_latency_ms=20):
         super().__init__()
         self.serial_port = serial_port
+        self.mode = mode  # "blocking" (chunked reads) or "polling" (legacy in_waiting loop, ASCII only)
+        self.read_timeout = read_timeout
+        self.batch_max_lines = batch_max_lines
+        self.batch_max_latency = batch_max_latency_ms / 1000.0
+        self.decoder = StreamDecoder()
         self.running = False
         
     def run(self):
         self.running = True
+        if self.mode == "polling":
+            self._run_polling()
+        else:
+            self._run_blocking()
+            
+    def _run_blocking(self):
+        """Block on the port until bytes arrive, then split lines and binary frames ourselves"""
+        self.serial_port.timeout = self.read_timeout
+        pending = []
+        pending_samples = []
+        batch_started = 0.0
+        while self.running and self.serial_port.is_open:
+            try:
+                # Returns as soon as at least one byte is available, or after read_timeout
+                chunk = self.serial_port.read(self.serial_port.in_waiting or 1)
+                if chunk:
+                    lines, samples = self.decoder.feed(chunk)
+                    if (lines or samples) and not (pending or pending_samples):
+                        batch_started = time.monotonic()
+                    pending.extend(lines)
+                    pending_samples.extend(samples)
+                    
+                while len(pending) >= self.batch_max_lines:
+                    self.lines_received.emit(pending[:self.batch_max_lines])
+                    pending = pending[self.batch_max_lines:]
+                    batch_started = time.monotonic()
+                while len(pending_samples) >= self.batch_max_lines:
+                    self.samples_received.emit(pending_samples[:self.batch_max_lines])
+                    pending_samples = pending_samples[self.batch_max_lines:]
+                    batch_started = time.monotonic()
+                    
+                # Flush as soon as the port is drained, so a quiet link adds no batching delay
+                if (pending or pending_samples) and (not self.serial_port.in_waiting
+                                                     or time.monotonic() - batch_started >= self.batch_max_latency):
+                    if pending:
+                        self.lines_received.emit(pending)
+                        pending = []
+                    if pending_samples:
+                        self.samples_received.emit(pending_samples)
+                        pending_samples = []
+            except Exception as e:
+                self._fail(e)
+                break
+                    
+    def _run_polling(self):
         while self.running and self.serial_port.is_open:
             try:
                 if self.serial_port.in_waiting > 0:
                     line = self.serial_port.readline().decode('utf-8').strip()
                     if line:
-                        self.line_received.emit(line)
+                        self.lines_received.emit([line])
                 else:
                     time.sleep(0.01)  # Small delay to prevent busy waiting
             except Exception as e:
-                print(f"Serial read error: {e}")
+                self._fail(e)
                 break
                 
+    def _fail(self, error):
+        logger.error("Serial read error: %s", error)
+        self.running = False
+        self.read_error.emit(str(error))
+        
     def stop(self):
         self.running = False
+        # Wake a blocked read immediately instead of waiting for the timeout
+        if hasattr(self.serial_port, 'cancel_read'):
+            try:
+                self.serial_port.cancel_read()
+            except Exception:
+                pass
+        self.wait()
+
+class SerialWriterThread(QThread):
+    """Writes commands off the GUI thread, everything queued at the time going out in one write"""
+    
+    # Setpoints where only the newest queued value matters
+    COALESCE_PREFIXES = ("SET_HEATER_PWM ",)
+    
+    def __init__(self, serial_port):
+        super().__init__()
+        self.serial_port = serial_port
+        self.queue = queue.Queue()
+        self.writes = 0
+        self.commands_written = 0
+        self.commands_coalesced = 0
+        
+    def enqueue(self, command):
+        self.queue.put(command)
+        
+    def run(self):
+        stopping = False
+        while not stopping:
+            batch = [self.queue.get()]
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                # Stop once what was queued before it is written
+                stopping = True
+                batch = batch[:batch.index(None)]
+            batch = self._coalesce(batch)
+            if not batch:
+                continue
+            try:
+                self.serial_port.write(''.join(command + '\n' for command in batch).encode('utf-8'))
+                self.writes += 1
+                self.commands_written += len(batch)
+            except Exception as e:
+                logger.error("Serial write error: %s", e)
+                
+    def _coalesce(self, batch):
+        latest = {}
+        for i, command in enumerate(batch):
+            for prefix in self.COALESCE_PREFIXES:
+                if command.startswith(prefix):
+                    latest[prefix] = i
+        if not latest:
+            return batch
+        kept = [command for i, command in enumerate(batch)
+                if not any(command.startswith(prefix) and latest[prefix] != i for prefix in latest)]
+        self.commands_coalesced += len(batch) - len(kept)
+        return kept
+        
+    def stop(self):
+        self.queue.put(None)
         self.wait()
 
 class SerialManager(QObject):
     line_received = pyqtSignal(str)
+    lines_received = pyqtSignal(list)
+    samples_received = pyqtSignal(list)
+    read_error = pyqtSignal(str)  # the reader thread hit a port error and stopped
     
-    def __init__(self, port=None, baud_rate=115200):
+    def __init__(self, port=None, baud_rate=115200, read_mode="blocking", read_timeout=0.1,
+                 batch_max_lines=32, batch_max_latency_ms=20, discovery=None):
         super().__init__()
         self.port = port
         self.baud_rate = baud_rate
+        self.read_mode = read_mode
+        self.read_timeout = read_timeout
+        self.batch_max_lines = batch_max_lines
+        self.batch_max_latency_ms = batch_max_latency_ms
         self.serial_port = None
+        self._auto_port = False  # port came from find_teensy_port()
+        self.discovery = discovery or PortDiscovery()
         self.reader_thread = None
+        self.writer_thread = None
         
     def find_teensy_port(self):
-        """Auto-detect Teensy port"""
-        ports = serial.tools.list_ports.comports()
-        for port in ports:
-            # Look for Teensy in description or manufacturer
-            if 'teensy' in port.description.lower() or 'teensy' in str(port.manufacturer).lower():
-                return port.device
-            # Also check for common Arduino/Teensy VID:PID
-            if port.vid == 0x16C0:  # Teensy VID
-                return port.device
-        return None
+        """Auto-detect Teensy port, from the discovery cache unless the USB devices changed"""
+        return self.discovery.find()
         
-    def start(self, port=None):
+    def open(self, port=None):
+        """Open the port; blocks, but touches no Qt objects, so it can run on a worker thread"""
         if port:
             self.port = port
-        elif not self.port:
+        elif not self.port or self._auto_port:
+            # Found afresh on every open, as the board may come back under another name
+            self._auto_port = True
             self.port = self.find_teensy_port()
             
         if not self.port:
@@ -67,21 +200,43 @@ class SerialManager(QObject):
                 timeout=1,
                 write_timeout=1
             )
-            
-            # Wait for Arduino to reset
-            time.sleep(2)
-            
-            # Start reader thread
-            self.reader_thread = SerialReaderThread(self.serial_port)
-            self.reader_thread.line_received.connect(self.line_received.emit)
-            self.reader_thread.start()
-            
-            print(f"Connected to Teensy on {self.port}")
-            
         except Exception as e:
+            if self._auto_port:
+                self.discovery.invalidate()  # in case the cached path is no longer the board
             raise Exception(f"Failed to connect to {self.port}: {e}")
             
+    def start(self, port=None):
+        """Open the port unless open() already did, then start the reader and writer threads
+
+        Returns at once; the board may still be resetting, and announces itself with READY
+        (see ConnectionManager).
+        """
+        if port or not (self.serial_port and self.serial_port.is_open):
+            self.open(port)
+            
+        self.reader_thread = SerialReaderThread(self.serial_port, self.read_mode, self.read_timeout,
+                                                self.batch_max_lines, self.batch_max_latency_ms)
+        self.reader_thread.lines_received.connect(self._deliver_lines)
+        self.reader_thread.samples_received.connect(self.samples_received.emit)
+        self.reader_thread.read_error.connect(self.read_error.emit)
+        self.reader_thread.start()
+        self.writer_thread = SerialWriterThread(self.serial_port)
+        self.writer_thread.start()
+        
+        print(f"Connected to Teensy on {self.port}")
+            
+    def _deliver_lines(self, lines):
+        self.lines_received.emit(lines)
+        # Per-line signal only costs anything when someone still listens to it
+        if self.receivers(self.line_received) > 0:
+            for line in lines:
+                self.line_received.emit(line)
+                
     def stop(self):
+        if self.writer_thread:
+            self.writer_thread.stop()
+            self.writer_thread = None
+            
         if self.reader_thread:
             self.reader_thread.stop()
             self.reader_thread = None
@@ -90,12 +245,9 @@ class SerialManager(QObject):
             self.serial_port.close()
             
     def send_command(self, command):
-        if self.serial_port and self.serial_port.is_open:
-            try:
-                self.serial_port.write((command + '\n').encode('utf-8'))
-                self.serial_port.flush()
-            except Exception as e:
-                print(f"Serial write error: {e}")
+        # Never blocks the caller on the port; the writer thread batches and writes
+        if self.writer_thread and self.serial_port and self.serial_port.is_open:
+            self.writer_thread.enqueue(command)
                 
     def list_available_ports(self):
         """List all available serial ports"""
@@ -0,0 +1,152 @@
+"""
+Serial backend that plays back a recorded session instead of talking to hardware
+
+Accepts either a text log written by DataLogger (the device's lines are the "CMD_RECV: ..."
+entries) or a TelemetryRecorder .bin capture (records are turned back into DATA lines, so they
+go through the same parsing as live input). speed=1.0 keeps the original timing, other
+positive values scale it, and speed=0 plays as fast as possible.
+"""
+
+import os
+import re
+from datetime import datetime
+from PyQt6.QtCore import QObject, pyqtSignal
+from serialcom.command_channel import split_tag
+from serialcom.line_batcher import LineBatcher
+from serialcom.sim_clock import QtClock
+
+_LOG_ENTRY = re.compile(r'^(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d,\d{3}) - \w+ - CMD_RECV: (.*)$')
+
+def load_log(path):
+    """(seconds from start, line) for every device line in a DataLogger text log"""
+    events = []
+    start = None
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for entry in f:
+            match = _LOG_ENTRY.match(entry.rstrip('\n'))
+            if not match:
+                continue
+            stamp = datetime.strptime(match.group(1), "%Y-%m-%d %H:%M:%S,%f").timestamp()
+            if start is None:
+                start = stamp
+            events.append((stamp - start, match.group(2)))
+    return events
+
+def load_capture(path):
+    """(seconds from start, DATA line) for every record in a TelemetryRecorder .bin file"""
+    from telemetry_recorder import TelemetryReader
+    reader = TelemetryReader(path)
+    events = []
+    start = None
+    try:
+        for timestamp, temp, pressure, weight, state, pump, valve, heater in reader.records():
+            if start is None:
+                start = timestamp
+            millis = int((timestamp - start) * 1000)
+            events.append((timestamp - start,
+                           f"DATA:{state},{temp:.1f},{pressure:.2f},{weight:.1f},{pump},{valve},{heater},0,{millis}"))
+    finally:
+        reader.close()
+    return events
+
+def load_recording(path):
+    if os.path.splitext(path)[1] == ".bin":
+        return load_capture(path)
+    return load_log(path)
+
+class SerialManager(QObject):
+    line_received = pyqtSignal(str)
+    lines_received = pyqtSignal(list)
+    samples_received = pyqtSignal(list)
+    replay_finished = pyqtSignal()
+
+    FAST_CHUNK = 256  # lines emitted per event-loop turn at speed 0
+
+    def __init__(self, path, speed=1.0, loop=False, batch_max_lines=32, batch_max_latency_ms=20, clock=None):
+        super().__init__()
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+        self.connected = False
+
+        self.clock = clock or QtClock()
+        self.batcher = LineBatcher(batch_max_lines, batch_max_latency_ms, self.clock)
+        self.batcher.batch_ready.connect(self.lines_received.emit)
+
+        self.events = load_recording(path)
+        self.position = 0
+        self.lines_sent = 0
+        self.commands = []  # commands the app sent; only PING is answered during a replay
+        self._start_time = None
+        self._next_call = None
+
+    def start(self):
+        if not self.events:
+            raise Exception(f"No device lines found in {self.path}")
+        self.connected = True
+        self.position = 0
+        self._start_time = self.clock.now()
+        self._schedule_next()
+        return True
+
+    def stop(self):
+        self.connected = False
+        if self._next_call is not None:
+            self._next_call.cancel()
+            self._next_call = None
+        self.batcher.flush()
+
+    def send_command(self, command):
+        if not self.connected:
+            return
+        self.commands.append(command)
+        # Answer the connection watchdog so a replay does not read as a lost link
+        command, command_id = split_tag(command)
+        if command == "PING":
+            reply = "PONG" if command_id is None else f"PONG #{command_id}"
+            self.line_received.emit(reply)
+            self.batcher.add(reply)
+
+    @property
+    def finished(self):
+        return self.position >= len(self.events)
+
+    def _schedule_next(self):
+        if self.speed <= 0:
+            delay = 0
+        else:
+            due = self._start_time + self.events[self.position][0] / self.speed
+            delay = max(0.0, due - self.clock.now())
+        self._next_call = self.clock.call_later(delay, self._play)
+
+    def _play(self):
+        self._next_call = None
+        if not self.connected:
+            return
+
+        if self.speed <= 0:
+            end = min(self.position + self.FAST_CHUNK, len(self.events))
+        else:
+            # Everything whose recorded time has come, so a late timer catches up in one go
+            elapsed = (self.clock.now() - self._start_time) * self.speed
+            end = self.position
+            while end < len(self.events) and self.events[end][0] <= elapsed:
+                end += 1
+            end = max(end, self.position + 1)
+
+        for _, line in self.events[self.position:end]:
+            self.line_received.emit(line)
+            self.batcher.add(line)
+        self.lines_sent += end - self.position
+        self.position = end
+
+        if not self.finished:
+            self._schedule_next()
+            return
+        self.batcher.flush()
+        if self.loop:
+            self.position = 0
+            self._start_time = self.clock.now()
+            self._schedule_next()
+        else:
+            self.replay_finished.emit()
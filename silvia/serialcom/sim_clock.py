@@ -0,0 +1,112 @@
+"""
+Clocks for the mock serial manager
+
+QtClock schedules on QTimers against the real monotonic clock and is the default.
+VirtualClock only moves when advance() is called, running every callback that falls due in
+order, so tests can step a simulation deterministically and far faster than wall time:
+
+    clock = VirtualClock()
+    serial = SerialManager(clock=clock, seed=1)
+    serial.start()
+    clock.advance(3600)  # an hour of telemetry, in a few seconds
+"""
+
+import heapq
+import itertools
+import time
+from PyQt6.QtCore import Qt, QTimer
+
+class _QtCall:
+    def __init__(self, clock, timer):
+        self._clock = clock
+        self._timer = timer
+
+    def cancel(self):
+        self._timer.stop()
+        self._clock._calls.discard(self)
+
+class QtClock:
+    def __init__(self):
+        # Scheduled calls keep their QTimer alive until they fire or are cancelled
+        self._calls = set()
+
+    def now(self):
+        return time.monotonic()
+
+    def call_later(self, delay, callback):
+        call = None
+        def fire():
+            call.cancel()
+            callback()
+        call = self._schedule(delay, fire, single_shot=True)
+        return call
+
+    def call_every(self, interval, callback):
+        return self._schedule(interval, callback, single_shot=False)
+
+    def _schedule(self, interval, callback, single_shot):
+        timer = QTimer()
+        # The default coarse timers may fire up to 5% of the interval late, which would delay safety deadlines
+        timer.setTimerType(Qt.TimerType.PreciseTimer)
+        timer.setSingleShot(single_shot)
+        timer.timeout.connect(callback)
+        call = _QtCall(self, timer)
+        self._calls.add(call)
+        timer.start(int(interval * 1000))
+        return call
+
+class _VirtualCall:
+    def __init__(self, due, interval, callback):
+        self.due = due
+        self.interval = interval  # None for one-shot calls
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+class VirtualClock:
+    def __init__(self, start=0.0):
+        self._now = start
+        self._queue = []
+        self._order = itertools.count()  # keeps calls due at the same instant in scheduling order
+
+    def now(self):
+        return self._now
+
+    def call_later(self, delay, callback):
+        return self._push(_VirtualCall(self._now + delay, None, callback))
+
+    def call_every(self, interval, callback):
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        return self._push(_VirtualCall(self._now + interval, interval, callback))
+
+    def advance(self, seconds):
+        """Move time forward by seconds, running everything that falls due on the way"""
+        self.run_until(self._now + seconds)
+
+    def run_until(self, deadline, predicate=None):
+        """Run due callbacks up to deadline, stopping early once predicate() is true
+
+        Returns True if predicate was met, False if the deadline was reached first.
+        """
+        while self._queue and self._queue[0][0] <= deadline:
+            if predicate is not None and predicate():
+                return True
+            due, _, call = heapq.heappop(self._queue)
+            if call.cancelled:
+                continue
+            self._now = due
+            if call.interval is not None:
+                call.due = due + call.interval
+                self._push(call)
+            call.callback()
+        if predicate is not None and predicate():
+            return True
+        self._now = max(self._now, deadline)
+        return False
+
+    def _push(self, call):
+        heapq.heappush(self._queue, (call.due, next(self._order), call))
+        return call
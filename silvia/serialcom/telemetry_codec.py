@@ -0,0 +1,128 @@
+"""
+Parser for the firmware's DATA telemetry line:
+DATA:state,temp,pressure,weight,pump%,valve,heater,brewTime,millis
+
+Older firmware omits millis (and very old firmware brewTime); missing fields read as 0.
+
+The binary frame format in serialcom.binary_protocol decodes into the same TelemetrySample.
+"""
+
+from array import array
+from collections import namedtuple
+
+# Mirror Arduino SystemState enum order
+STATE_NAMES = ("IDLE", "HEATING_BREW", "HEATING_STEAM", "BREWING", "STEAMING", "FLUSHING")
+STATE_CODES = {name: code for code, name in enumerate(STATE_NAMES)}
+
+# Keyed by the raw field text so the state never needs an int() conversion. The "DATA:"-prefixed
+# keys let parse_many() look up the first field of a joined batch without slicing every line.
+_STATE_LOOKUP = {str(code): name for code, name in enumerate(STATE_NAMES)}
+_STATE_LOOKUP.update({f"DATA:{code}": name for code, name in enumerate(STATE_NAMES)})
+
+# millis is the firmware's own sample time (its uptime in ms when the sample was taken)
+TelemetrySample = namedtuple(
+    'TelemetrySample',
+    ['state', 'temp', 'pressure', 'weight', 'pump', 'valve', 'heater', 'brew_time', 'millis'])
+
+TelemetryColumns = namedtuple(
+    'TelemetryColumns',
+    ['state', 'temp', 'pressure', 'weight', 'pump', 'valve', 'heater', 'brew_time', 'millis'])
+
+
+# Skips the Python-level namedtuple __new__, which otherwise dominates the cost of a parse
+_new_sample = tuple.__new__
+
+
+def parse_line(line):
+    """Parse one DATA line into a TelemetrySample
+
+    Returns None for lines that are not telemetry, raises ValueError for malformed DATA lines.
+    """
+    if not line.startswith("DATA:"):
+        return None
+    fields = line[5:].split(',')
+    if len(fields) < 7:
+        raise ValueError(f"expected at least 7 fields, got {len(fields)}")
+    return _new_sample(TelemetrySample, (
+        _STATE_LOOKUP.get(fields[0], "UNKNOWN"),
+        float(fields[1]),
+        float(fields[2]),
+        float(fields[3]),
+        int(fields[4]),
+        fields[5] == '1',
+        fields[6] == '1',
+        int(fields[7]) if len(fields) > 7 else 0,
+        int(fields[8]) if len(fields) > 8 else 0))
+
+
+def parse_status(line):
+    """Parse the legacy space-separated "STATUS state temp pressure weight pump" line
+
+    Returns None for other lines (including the key=value STATUS: reply to GET_STATUS),
+    raises ValueError for malformed ones.
+    """
+    if not line.startswith("STATUS"):
+        return None
+    parts = line.split()
+    if len(parts) < 6:
+        return None
+    return TelemetrySample(parts[1], float(parts[2]), float(parts[3]), float(parts[4]), int(parts[5]),
+                           False, False, 0, 0)
+
+
+def parse_many(lines):
+    """Parse a batch of lines into column arrays, skipping non-telemetry and malformed lines
+
+    For whole captures (tests, recorded logs); the live path parses each line with parse_line(),
+    as every sample goes through the safety checks on its own.
+    """
+    data = [line for line in lines if line.startswith("DATA:")]
+    # One join and one split for the whole batch, then every column is a strided slice. That
+    # takes the same number of fields on every line: a total count alone would let a short line
+    # and a long one shift the columns between them
+    commas = {line.count(',') for line in data}
+    if commas == {8}:
+        flat = ",".join(data).split(',')
+        try:
+            return _columns(flat[0::9], flat[1::9], flat[2::9], flat[3::9],
+                            flat[4::9], flat[5::9], flat[6::9], flat[7::9],
+                            array('L', map(int, flat[8::9])))
+        except (ValueError, OverflowError):
+            pass
+    elif commas == {7}:
+        flat = ",".join(data).split(',')
+        try:
+            return _columns(flat[0::8], flat[1::8], flat[2::8], flat[3::8],
+                            flat[4::8], flat[5::8], flat[6::8], flat[7::8],
+                            array('L', [0]) * len(data))
+        except (ValueError, OverflowError):
+            pass
+
+    # Mixed field counts or a malformed line somewhere: fall back to parsing line by line
+    samples = []
+    for line in data:
+        try:
+            samples.append(parse_line(line))
+        except (ValueError, IndexError):
+            continue
+    if not samples:
+        return TelemetryColumns([], array('d'), array('d'), array('d'),
+                                array('B'), array('B'), array('B'), array('L'), array('L'))
+    state, temp, pressure, weight, pump, valve, heater, brew_time, millis = zip(*samples)
+    return TelemetryColumns(list(state), array('d', temp), array('d', pressure), array('d', weight),
+                            array('B', pump), array('B', valve), array('B', heater), array('L', brew_time),
+                            array('L', millis))
+
+
+def _columns(state, temp, pressure, weight, pump, valve, heater, brew_time, millis):
+    lookup = _STATE_LOOKUP.get
+    return TelemetryColumns(
+        [lookup(code, "UNKNOWN") for code in state],
+        array('d', map(float, temp)),
+        array('d', map(float, pressure)),
+        array('d', map(float, weight)),
+        array('B', map(int, pump)),
+        array('B', map('1'.__eq__, valve)),
+        array('B', map('1'.__eq__, heater)),
+        array('L', map(int, brew_time)),
+        millis)
@@ -0,0 +1,50 @@
+"""
+Per-phase startup timing, printed by run_silvia.py --profile-startup
+
+Each mark() closes a phase at the current time. report() prints the phases marked since the
+last report with their own duration and the time since the process started; the interpreter's
+own startup, before run_silvia.py ran, comes from /proc where there is one (to 10 ms or so).
+"""
+
+import os
+import sys
+import time
+
+def _process_age():
+    """Seconds since this process started, or None where /proc cannot tell"""
+    try:
+        with open("/proc/self/stat") as f:
+            # Field 22, counted after the parenthesised command name, which may contain spaces
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        return time.clock_gettime(time.CLOCK_BOOTTIME) - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+class StartupProfile:
+    def __init__(self, enabled=True, started=None):
+        self.enabled = enabled
+        self.started = time.perf_counter() if started is None else started  # when run_silvia.py began
+        age = _process_age()
+        # The process started before run_silvia.py did; the difference is the interpreter's startup
+        self.process_started = self.started if age is None else min(self.started, time.perf_counter() - age)
+        self.marks = []  # (phase, perf_counter when it ended)
+        self._reported = 0
+
+    def mark(self, phase):
+        if self.enabled:
+            self.marks.append((phase, time.perf_counter()))
+
+    def report(self):
+        if not self.enabled or self._reported == len(self.marks):
+            return
+        if self._reported == 0:
+            print(f"{'startup phase':<28}{'ms':>9}{'total ms':>10}")
+            if self.process_started < self.started:
+                print(f"{'interpreter':<28}{(self.started - self.process_started) * 1000:>9.1f}"
+                      f"{(self.started - self.process_started) * 1000:>10.1f}")
+        previous = self.marks[self._reported - 1][1] if self._reported else self.started
+        for phase, t in self.marks[self._reported:]:
+            print(f"{phase:<28}{(t - previous) * 1000:>9.1f}{(t - self.process_started) * 1000:>10.1f}")
+            previous = t
+        self._reported = len(self.marks)
+        sys.stdout.flush()  # the app runs on, so a piped report would otherwise sit in the buffer
@@ -0,0 +1,137 @@
+"""
+Compact binary store for telemetry samples
+
+Each run writes logs/telemetry_<timestamp>.bin, a flat array of fixed-width little-endian
+records (RECORD_FORMAT / RECORD_DTYPE), plus logs/telemetry_<timestamp>.json holding the
+start/stop record offsets of every brew, steam and flush session.
+
+    reader = TelemetryReader("logs/telemetry_20250801_112448.bin")
+    for session in reader.sessions:
+        shot = reader.as_numpy(session['start'], session['stop'])  # zero-copy memmap view
+"""
+
+import json
+import mmap
+import os
+import struct
+import time
+from datetime import datetime
+from PyQt6.QtCore import QObject
+from serialcom.telemetry_codec import STATE_CODES
+
+RECORD_FORMAT = '<dfffBBBB'
+RECORD = struct.Struct(RECORD_FORMAT)
+RECORD_SIZE = RECORD.size
+RECORD_FIELDS = ('timestamp', 'temp', 'pressure', 'weight', 'state', 'pump', 'valve', 'heater')
+
+# Same layout as RECORD_FORMAT, for numpy.memmap / numpy.frombuffer
+RECORD_DTYPE = [('timestamp', '<f8'), ('temp', '<f4'), ('pressure', '<f4'), ('weight', '<f4'),
+                ('state', 'u1'), ('pump', 'u1'), ('valve', 'u1'), ('heater', 'u1')]
+
+class TelemetryRecorder(QObject):
+    def __init__(self, log_dir="logs", flush_interval=5.0):
+        super().__init__()
+        os.makedirs(log_dir, exist_ok=True)
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.path = os.path.join(log_dir, f"telemetry_{timestamp}.bin")
+        self.index_path = os.path.splitext(self.path)[0] + ".json"
+
+        self.file = open(self.path, 'ab')
+        self.count = 0
+        self.sessions = []
+        self.current_session = None
+        self.flush_interval = flush_interval
+        self._last_flush = time.monotonic()
+        self._write_index()
+
+    def append(self, sample, timestamp=None):
+        self.file.write(RECORD.pack(
+            time.time() if timestamp is None else timestamp,
+            sample.temp,
+            sample.pressure,
+            sample.weight,
+            STATE_CODES.get(sample.state, 0xFF),
+            sample.pump,
+            1 if sample.valve else 0,
+            1 if sample.heater else 0))
+        self.count += 1
+
+        now = time.monotonic()
+        if now - self._last_flush >= self.flush_interval:
+            self._last_flush = now
+            self.file.flush()
+
+    def begin_session(self, kind):
+        """Mark the start of a brew/steam/flush session at the next record"""
+        if self.current_session is not None:
+            self.end_session()
+        self.current_session = {'kind': kind, 'start': self.count, 'stop': None, 'started_at': time.time()}
+        self.sessions.append(self.current_session)
+        self._write_index()
+
+    def end_session(self):
+        if self.current_session is None:
+            return
+        self.current_session['stop'] = self.count
+        self.current_session['stopped_at'] = time.time()
+        self.current_session = None
+        self.file.flush()
+        self._write_index()
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.end_session()
+        self.file.close()
+
+    def _write_index(self):
+        index = {
+            'record_format': RECORD_FORMAT,
+            'fields': RECORD_FIELDS,
+            'data_file': os.path.basename(self.path),
+            'sessions': self.sessions,
+        }
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f, indent=1)
+        os.replace(tmp_path, self.index_path)
+
+class TelemetryReader:
+    """Memory-mapped read access to a recorder .bin file and its session index"""
+
+    def __init__(self, path):
+        self.path = path
+        index_path = os.path.splitext(path)[0] + ".json"
+        if os.path.exists(index_path):
+            with open(index_path) as f:
+                self.sessions = json.load(f)['sessions']
+        else:
+            self.sessions = []
+
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        # Ignore a partially written trailing record
+        self.count = size // RECORD_SIZE
+
+    def __len__(self):
+        return self.count
+
+    def records(self, start=0, stop=None):
+        """Iterate record tuples in RECORD_FIELDS order without copying the file"""
+        stop = self.count if stop is None else min(stop, self.count)
+        view = memoryview(self._map)[start * RECORD_SIZE:stop * RECORD_SIZE]
+        return RECORD.iter_unpack(view)
+
+    def as_numpy(self, start=0, stop=None):
+        """Structured numpy array view over [start, stop); needs numpy"""
+        import numpy as np
+        stop = self.count if stop is None else min(stop, self.count)
+        return np.frombuffer(self._map, dtype=np.dtype(RECORD_DTYPE),
+                             count=stop - start, offset=start * RECORD_SIZE)
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
@@ -1,50 +1,73 @@
-from PyQt6.QtCore import QObject, pyqtSignal, QTimer
+from PyQt6.QtCore import QObject, pyqtSignal
+import time
+import config
+from pid_controller import PIDController
+from autotune import load_profile
 
 class TemperatureController(QObject):
     heaterStateChanged = pyqtSignal(bool)  # True = heating, False = off
+    heaterDutyChanged = pyqtSignal(int)  # 0-255 duty for SET_HEATER_PWM, once per sample while heating
     targetReached = pyqtSignal(str)  # "BREW" or "STEAM"
     
-    def __init__(self):
+    def __init__(self, profile_path=None):
         super().__init__()
         self.brew_target = 93.0
         self.steam_target = 130.0
         self.current_temp = 25.0
         self.mode = "IDLE"  # IDLE, BREW, STEAM
-        self.hysteresis = 2.0  # Temperature hysteresis in °C
+        self.target_tolerance = 0.5  # °C either side of the target that counts as reached
         self.heating = False
+        self.duty = 0
+        self._target_reported = False
         
-        # Control timer
-        self.control_timer = QTimer()
-        self.control_timer.timeout.connect(self._control_loop)
-        self.control_timer.start(1000)  # Run every second
+        # Stepped by each incoming sample rather than a timer, so it runs at the telemetry rate.
+        # Gains come from this machine's autotune profile when there is one.
+        gains = (config.HEATER_PID_KP, config.HEATER_PID_KI, config.HEATER_PID_KD)
+        self.feed_forward = config.HEATER_FEED_FORWARD
+        self.profile = load_profile(profile_path)
+        if self.profile:
+            gains = (self.profile['kp'], self.profile['ki'], self.profile['kd'])
+            self.feed_forward = self.profile.get('feed_forward', self.feed_forward)
+        self.pid = PIDController(*gains, output_min=0, output_max=255,
+                                 derivative_filter=config.HEATER_PID_DERIVATIVE_FILTER)
         
     def set_brew_target(self, temp):
         self.brew_target = max(60, min(110, temp))  # Safety limits
+        self._target_reported = False
         
     def set_steam_target(self, temp):
         self.steam_target = max(110, min(150, temp))  # Safety limits
+        self._target_reported = False
         
-    def update_temperature(self, temp):
+    def update_temperature(self, temp, timestamp=None):
+        """Feed a reading taken at timestamp (seconds, defaults to now) and step the PID"""
         self.current_temp = temp
+        if self.mode == "IDLE":
+            return
+            
+        target = self._target()
+        feed_forward = self.feed_forward * max(0.0, target - config.AMBIENT_TEMP)
+        t = time.monotonic() if timestamp is None else timestamp
+        self.duty = int(round(self.pid.update(target, temp, t, feed_forward)))
+        self._set_heater(self.duty > 0)
+        self.heaterDutyChanged.emit(self.duty)
+        
+        if not self._target_reported and abs(target - temp) <= self.target_tolerance:
+            self._target_reported = True
+            self.targetReached.emit(self.mode)
         
     def set_mode(self, mode):
         """Set control mode: IDLE, BREW, STEAM"""
+        if mode != self.mode:
+            self.pid.reset()
+            self._target_reported = False
         self.mode = mode
         if mode == "IDLE":
+            self.duty = 0
             self._set_heater(False)
             
-    def _control_loop(self):
-        if self.mode == "IDLE":
-            return
-            
-        target = self.brew_target if self.mode == "BREW" else self.steam_target
-        
-        # Simple thermostat with hysteresis
-        if not self.heating and self.current_temp < target - self.hysteresis:
-            self._set_heater(True)
-        elif self.heating and self.current_temp >= target:
-            self._set_heater(False)
-            self.targetReached.emit(self.mode)
+    def _target(self):
+        return self.brew_target if self.mode == "BREW" else self.steam_target
             
     def _set_heater(self, state):
         if self.heating != state:
@@ -54,8 +77,9 @@ class TemperatureController(QObject):
     def get_status(self):
         return {
             'current_temp': self.current_temp,
-            'target_temp': self.brew_target if self.mode == "BREW" else self.steam_target,
+            'target_temp': self._target(),
             'mode': self.mode,
             'heating': self.heating,
-            'temp_diff': abs(self.current_temp - (self.brew_target if self.mode == "BREW" else self.steam_target))
-        }
\ No newline at end of file
+            'duty': self.duty,
+            'temp_diff': abs(self.current_temp - self._target())
+        }
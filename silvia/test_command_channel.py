@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Command/reply correlation over the mock, and write coalescing in the real backend's writer
+"""
+
+from serialcom.command_channel import CommandChannel, split_tag
+from serialcom.mock_serial_manager import SerialManager
+from serialcom.real_serial_manager import SerialWriterThread
+from serialcom.sim_clock import VirtualClock
+
+def test_replies_are_matched_to_commands():
+    clock = VirtualClock()
+    serial = SerialManager(clock=clock, seed=1)
+    channel = CommandChannel(serial, clock, timeout=1.0)
+    lines = []
+    serial.lines_received.connect(lambda batch: lines.extend(channel.match(line) for line in batch))
+    serial.start()
+    channel.negotiate()
+    clock.advance(0.05)
+    assert channel.tagged
+
+    results = []
+    channel.send("SET_TEMP BREW 94", results.append)
+    channel.send("SET_TEMP STEAM 200", results.append)
+    channel.send("PING", results.append)
+    clock.advance(0.05)
+
+    assert [(r.command, r.ok, r.reply) for r in results] == [
+        ("SET_TEMP BREW 94", True, "OK:BREW_TEMP_SET"),
+        ("SET_TEMP STEAM 200", False, "ERROR:STEAM_TEMP_OUT_OF_RANGE"),
+        ("PING", True, "PONG"),
+    ]
+    # The rest of the app sees the replies without their tags
+    assert "OK:BREW_TEMP_SET" in lines and "PONG" in lines
+    assert channel.get_stats() == {'sent': 4, 'acknowledged': 3, 'failed': 1, 'in_flight': 0}
+
+    # SET_HEATER_PWM is only answered when refused: expecting a reply ends in a timeout
+    failed = []
+    channel.failed.connect(failed.append)
+    channel.send("SET_HEATER_PWM 40")
+    clock.advance(0.9)
+    assert failed == []
+    clock.advance(0.2)
+    assert [(r.command, r.reply) for r in failed] == [("SET_HEATER_PWM 40", "timeout")]
+    assert 1000 <= failed[0].rtt_ms < 1100
+
+    # Fire-and-forget commands go untagged and are never tracked
+    assert channel.send("SET_HEATER_PWM 40", expect_reply=False) is None
+    channel.send("STOP")
+    channel.reset(reason="reconnect")
+    assert failed[-1].reply == "reconnect" and not channel.pending and not channel.tagged
+    serial.stop()
+
+class _UntaggedFirmware(SerialManager):
+    """The mock as firmware from before tagging, which matches commands exactly"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.sent = []
+
+    def send_command(self, command):
+        self.sent.append(command)
+        if " #" in command or command == "PROTO TAGS":
+            self.replyTag = ""
+            self._reply("ERROR:UNKNOWN_COMMAND")
+        else:
+            super().send_command(command)
+
+def test_untagged_firmware_gets_plain_commands():
+    clock = VirtualClock()
+    serial = _UntaggedFirmware(clock=clock, seed=1)
+    channel = CommandChannel(serial, clock, timeout=1.0)
+    serial.lines_received.connect(lambda batch: [channel.match(line) for line in batch])
+    serial.start()
+    channel.negotiate()
+    clock.advance(0.05)
+    assert not channel.tagged
+
+    # Replies come back in order, and are matched in order
+    results = []
+    channel.send("SET_TEMP BREW 94", results.append)
+    channel.send("SET_TEMP STEAM 200", results.append)
+    channel.send("PING", results.append)
+    clock.advance(0.05)
+    assert serial.sent == ["PROTO TAGS", "SET_TEMP BREW 94", "SET_TEMP STEAM 200", "PING"]
+    assert [(r.command, r.ok, r.reply) for r in results] == [
+        ("SET_TEMP BREW 94", True, "OK:BREW_TEMP_SET"),
+        ("SET_TEMP STEAM 200", False, "ERROR:STEAM_TEMP_OUT_OF_RANGE"),
+        ("PING", True, "PONG"),
+    ]
+    assert not channel.pending
+    serial.stop()
+
+def test_split_tag():
+    assert split_tag("OK:STOPPED #17") == ("OK:STOPPED", 17)
+    assert split_tag("OK:STOPPED") == ("OK:STOPPED", None)
+    assert split_tag("ERROR:PT100_FAULT:#4") == ("ERROR:PT100_FAULT:#4", None)
+
+class _Port:
+    is_open = True
+
+    def __init__(self):
+        self.writes = []
+
+    def write(self, data):
+        self.writes.append(data)
+
+def test_writer_coalesces_queued_commands():
+    port = _Port()
+    writer = SerialWriterThread(port)
+    # Queued before the thread runs, so they are all pending together
+    for command in ("SET_TEMP BREW 93 #1", "SET_HEATER_PWM 10", "SET_TEMP STEAM 130 #2",
+                    "SET_HEATER_PWM 20", "SET_HEATER_PWM 30"):
+        writer.enqueue(command)
+    writer.start()
+    writer.stop()
+
+    assert port.writes == [b"SET_TEMP BREW 93 #1\nSET_TEMP STEAM 130 #2\nSET_HEATER_PWM 30\n"]
+    assert (writer.writes, writer.commands_written, writer.commands_coalesced) == (1, 3, 2)
+
+if __name__ == "__main__":
+    test_replies_are_matched_to_commands()
+    test_untagged_firmware_gets_plain_commands()
+    test_split_tag()
+    test_writer_coalesces_queued_commands()
+    print("All tests passed")
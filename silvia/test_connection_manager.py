@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Connection state machine: READY handshake, PING probe for a board that did not reset, capped
+backoff, and the real backend opening off the calling thread (over a pty)
+"""
+
+import os
+import sys
+import time
+from PyQt6.QtCore import QCoreApplication
+from serialcom.connection_manager import ConnectionManager, CONNECTED, DISCONNECTED, OPENING, WAITING_READY
+from serialcom.mock_serial_manager import SerialManager
+from serialcom.sim_clock import VirtualClock
+
+class _FlakyBoard(SerialManager):
+    """Mock that cannot be started the first `failures` times"""
+    def __init__(self, failures, **kwargs):
+        super().__init__(**kwargs)
+        self.failures = failures
+
+    def start(self):
+        if self.failures:
+            self.failures -= 1
+            raise Exception("port busy")
+        super().start()
+
+class _RunningBoard(SerialManager):
+    """Mock that was already running, so it prints no READY and only answers PING"""
+    def _emit_line(self, line):
+        if line != "READY":
+            super()._emit_line(line)
+
+class _SilentBoard(SerialManager):
+    def send_command(self, command):
+        pass
+
+    def _emit_line(self, line):
+        pass
+
+def watch(connection):
+    events = []
+    connection.stateChanged.connect(events.append)
+    connection.disconnected.connect(lambda reason, retry_in: events.append((reason, retry_in)))
+    return events
+
+def test_backoff_until_ready():
+    clock = VirtualClock()
+    board = _FlakyBoard(3, clock=clock, seed=1)
+    connection = ConnectionManager(board, clock, backoff_initial=1.0, backoff_max=30.0)
+    events = watch(connection)
+    connection.start()
+    clock.advance(10)
+    retries = [event[1] for event in events if isinstance(event, tuple)]
+    assert retries == [1.0, 2.0, 4.0]
+    assert events[-3:] == [OPENING, WAITING_READY, CONNECTED] and connection.attempts == 0
+
+    # A link lost later starts over from the shortest delay
+    connection.lost("no PONG")
+    assert events[-2:] == [DISCONNECTED, ("no PONG", 1.0)]
+    clock.advance(1.1)
+    assert connection.state == CONNECTED
+    connection.stop()
+    assert connection.state == DISCONNECTED
+
+def test_probe_and_ready_timeout():
+    clock = VirtualClock()
+    connection = ConnectionManager(_RunningBoard(clock=clock, seed=1), clock)
+    connection.start()
+    clock.advance(0.1)
+    assert connection.state == CONNECTED  # on the PONG to the first probe
+    connection.stop()
+
+    connection = ConnectionManager(_SilentBoard(clock=clock, seed=1), clock, ready_timeout=5.0,
+                                   backoff_initial=1.0, backoff_max=8.0)
+    events = watch(connection)
+    connection.start()
+    clock.advance(200)
+    retries = [event[1] for event in events if isinstance(event, tuple)]
+    assert retries[:5] == [1.0, 2.0, 4.0, 8.0, 8.0] and set(retries[5:]) == {8.0}
+    assert events[1] == WAITING_READY and events[3] == ("no READY from the firmware", 1.0)
+    connection.stop()
+
+def test_real_backend_opens_off_the_calling_thread():
+    from serialcom.real_serial_manager import SerialManager as RealSerialManager
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    master, slave = os.openpty()
+    board = RealSerialManager(port=os.ttyname(slave))
+    connection = ConnectionManager(board, ready_timeout=2.0)
+    started = time.monotonic()
+    connection.start()
+    returned = time.monotonic() - started
+    assert connection.state == OPENING
+    print(f"start() returned in {returned * 1000:.1f} ms")
+    assert returned < 0.1
+
+    def pump(until, seconds):
+        end = time.monotonic() + seconds
+        while not until() and time.monotonic() < end:
+            app.processEvents()
+            time.sleep(0.005)
+
+    pump(lambda: connection.state == WAITING_READY, 2)
+    assert connection.state == WAITING_READY
+    os.write(master, b"READY\n")
+    pump(lambda: connection.state == CONNECTED, 2)
+    assert connection.state == CONNECTED
+    assert b"PING\n" in os.read(master, 1024)
+
+    # Pulling the cable ends the reader with an error, which drops the link at once
+    board.read_error.connect(lambda error: connection.lost(f"read error: {error}"))
+    errors = []
+    board.read_error.connect(errors.append)
+    pulled = time.monotonic()
+    os.close(slave)
+    os.close(master)
+    pump(lambda: connection.state == DISCONNECTED, 2)
+    assert connection.state == DISCONNECTED and errors
+    print(f"link dropped {(time.monotonic() - pulled) * 1000:.1f} ms after the pty closed: {errors[0]}")
+    assert time.monotonic() - pulled < 1.0
+    connection.stop()
+
+if __name__ == "__main__":
+    test_backoff_until_ready()
+    test_probe_and_ready_timeout()
+    test_real_backend_opens_off_the_calling_thread()
+    print("All tests passed")
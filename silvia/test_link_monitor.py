@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Link health from PING round trips, over the mock on a virtual clock
+"""
+
+from link_monitor import LinkMonitor
+from serialcom.sim_clock import VirtualClock
+
+def test_percentiles_and_degraded_rtt():
+    link = LinkMonitor(window=20, degraded_rtt_ms=250.0, lost_after=3)
+    health = []
+    link.healthChanged.connect(health.append)
+    for rtt in range(1, 21):
+        link.record_pong(float(rtt))
+    assert (link.rttP50Ms, link.rttP95Ms, link.rttMaxMs) == (10.0, 19.0, 20.0)
+    assert link.histogram()['5'] == 5 and link.histogram()['20'] == 10 and link.histogram()['inf'] == 0
+
+    # One slow pong in twenty is the p95; two pushes it over the threshold
+    link.record_pong(400.0)
+    assert link.health == "ok"
+    link.record_pong(600.0)
+    assert link.health == "degraded" and link.histogram()['inf'] == 0 and link.histogram()['1000'] == 1
+    assert health == ["degraded"]
+
+def test_missed_pongs_through_the_backend():
+    # CoffeeController's own PING watchdog and handlers over the mock, on a VirtualClock
+    import os
+    import tempfile
+    import config
+    from qml_backend import CoffeeController
+    from serialcom.connection_manager import CONNECTED, DISCONNECTED
+
+    saved = (config.USE_MOCK_SERIAL, config.SERIAL_REPLAY_FILE, config.MOCK_SEED)
+    config.USE_MOCK_SERIAL, config.SERIAL_REPLAY_FILE, config.MOCK_SEED = True, None, 1
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as work_dir:
+        os.chdir(work_dir)  # the session log and recording go to logs/ under the working directory
+        try:
+            clock = VirtualClock()
+            controller = CoffeeController(clock=clock)
+            controller.start()
+            clock.advance(1)
+            assert controller.connection.state == CONNECTED
+            link = controller.link
+            health, status = [], []
+            link.healthChanged.connect(health.append)
+            controller.connectionStatusChanged.connect(status.append)
+
+            clock.advance(5 * config.LINK_PING_INTERVAL)
+            assert link.pongs == 5 and link.health == "ok"
+            assert 0 < link.rttMaxMs < config.LINK_DEGRADED_RTT_MS
+
+            # The firmware stops answering PINGs but keeps sending telemetry: degraded on the
+            # first missed pong without announcing the link again, lost on the third
+            serial = controller.serial
+            send_command = serial.send_command
+            serial.send_command = lambda command: None if command.startswith("PING") else send_command(command)
+            clock.advance(config.LINK_PING_INTERVAL - clock.now() % config.LINK_PING_INTERVAL)  # to the next PING
+            for expected in ("degraded", "degraded", "lost"):
+                clock.advance(config.LINK_PING_INTERVAL)
+                assert link.health == expected
+            assert health == ["degraded", "lost"] and link.missed == 3
+            assert controller.connection.state == DISCONNECTED and status == [False]
+
+            # Answering again: the retry brings the link back up with a clean slate
+            serial.send_command = send_command
+            clock.advance(config.CONNECT_BACKOFF_INITIAL)
+            assert controller.connection.state == CONNECTED and status == [False, True]
+            assert health[-1] == "ok" and link.missed_streak == 0
+            clock.advance(config.LINK_PING_INTERVAL)
+            assert link.pongs == 6
+            controller._shutdown()
+        finally:
+            os.chdir(cwd)
+            config.USE_MOCK_SERIAL, config.SERIAL_REPLAY_FILE, config.MOCK_SEED = saved
+
+if __name__ == "__main__":
+    test_percentiles_and_degraded_rtt()
+    test_missed_pongs_through_the_backend()
+    print("All tests passed")
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Port discovery cache and hotplug, on a stand-in /dev/serial/by-id and comports()
+"""
+
+import os
+import tempfile
+from collections import namedtuple
+from serialcom.connection_manager import ConnectionManager, CONNECTED
+from serialcom.mock_serial_manager import SerialManager
+from serialcom.port_discovery import PortDiscovery
+from serialcom.sim_clock import VirtualClock
+
+Port = namedtuple('Port', 'device description manufacturer vid pid serial_number')
+TEENSY = "usb-Teensyduino_USB_Serial_1234567-if00"
+
+class _Ports:
+    """comports() stand-in listing a Teensy for each Teensy link in the by-id dir"""
+    def __init__(self, by_id_dir):
+        self.by_id_dir = by_id_dir
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        ports = [Port("/dev/ttyS0", "n/a", None, None, None, None)]
+        for name in os.listdir(self.by_id_dir) if os.path.isdir(self.by_id_dir) else []:
+            device = os.path.realpath(os.path.join(self.by_id_dir, name))
+            ports.append(Port(device, "USB Serial", "Teensyduino", 0x16C0, 0x0483, name.split("_")[-1][:-5]))
+        return ports
+
+def plug(work_dir, by_id_dir, tty, name=TEENSY):
+    device = os.path.join(work_dir, tty)
+    open(device, "w").close()
+    os.makedirs(by_id_dir, exist_ok=True)
+    link = os.path.join(by_id_dir, name)
+    if os.path.lexists(link):
+        os.remove(link)
+    os.symlink(device, link)
+    return device
+
+def test_cache_and_replug():
+    with tempfile.TemporaryDirectory() as work_dir:
+        by_id_dir = os.path.join(work_dir, "by-id")
+        ports = _Ports(by_id_dir)
+        discovery = PortDiscovery(by_id_dir, rescan_interval=3600, list_ports=ports)
+
+        acm0 = plug(work_dir, by_id_dir, "ttyACM0")
+        assert [discovery.find() for _ in range(5)] == [acm0] * 5
+        assert ports.calls == 1 and discovery.hits == 4
+        assert discovery.get_stats()['ports'] == {(0x16C0, 0x0483, "1234567"): acm0}
+
+        # Unplugged and back under another tty: the by-id link moves, so one rescan finds it
+        os.remove(os.path.join(by_id_dir, TEENSY))
+        assert discovery.find() is None and discovery.find() is None
+        assert ports.calls == 2
+        acm1 = plug(work_dir, by_id_dir, "ttyACM1")
+        assert discovery.find() == acm1 and discovery.find() == acm1
+        assert ports.calls == 3
+
+        # A second board does not take over from the one in use
+        plug(work_dir, by_id_dir, "ttyACM2", "usb-Teensyduino_USB_Serial_0000001-if00")
+        assert discovery.find() == acm1 and ports.calls == 4
+
+def test_rescan_interval_without_by_id():
+    with tempfile.TemporaryDirectory() as work_dir:
+        ports = _Ports(os.path.join(work_dir, "missing"))
+        discovery = PortDiscovery(os.path.join(work_dir, "missing"), rescan_interval=3600, list_ports=ports)
+        assert discovery.find() is None and discovery.find() is None
+        assert ports.calls == 1
+        discovery.invalidate()
+        discovery.find()
+        assert ports.calls == 2
+
+class _UnpluggedBoard(SerialManager):
+    """Mock that only starts once its by-id link exists"""
+    def __init__(self, discovery, **kwargs):
+        super().__init__(**kwargs)
+        self.discovery = discovery
+
+    def start(self):
+        if self.discovery.find() is None:
+            raise Exception("No Teensy port found")
+        super().start()
+
+def test_plugging_in_cuts_the_backoff_short():
+    with tempfile.TemporaryDirectory() as work_dir:
+        by_id_dir = os.path.join(work_dir, "by-id")
+        discovery = PortDiscovery(by_id_dir, list_ports=_Ports(by_id_dir))
+        clock = VirtualClock()
+        connection = ConnectionManager(_UnpluggedBoard(discovery, clock=clock, seed=1), clock,
+                                       backoff_initial=30.0, hotplug_interval=0.5)
+        connection.start()
+        clock.advance(10)
+        assert connection.state != CONNECTED and connection.attempts == 1
+
+        plug(work_dir, by_id_dir, "ttyACM0")
+        clock.advance(1)
+        assert connection.state == CONNECTED
+        connection.stop()
+
+if __name__ == "__main__":
+    test_cache_and_replug()
+    test_rescan_interval_without_by_id()
+    test_plugging_in_cuts_the_backoff_short()
+    print("All tests passed")
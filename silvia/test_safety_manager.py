@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Reaction-time and latching tests for the deadline-based SafetyManager
+"""
+
+import sys
+import time
+from PyQt6.QtCore import QCoreApplication
+from safety_manager import SafetyManager, COMM_TIMEOUT
+from trend_estimator import TrendEstimator
+from serialcom.machine_model import BoilerModel, GroupModel
+from serialcom.mock_serial_manager import SerialManager
+from serialcom.sim_clock import QtClock, VirtualClock
+from serialcom.telemetry_codec import parse_line
+
+def watch(safety, clock):
+    """(clock time, reason) for every emergency stop"""
+    trips = []
+    safety.emergencyStop.connect(lambda reason: trips.append((clock.now(), reason)))
+    return trips
+
+def test_comm_timeout_reaction_and_latch():
+    clock = VirtualClock()
+    safety = SafetyManager(clock)
+    trips = watch(safety, clock)
+
+    # Telemetry at 4 Hz for a minute keeps the deadline moving
+    for _ in range(240):
+        clock.advance(0.25)
+        safety.update_data_timestamp()
+    assert trips == []
+
+    last_data = clock.now()
+    clock.run_until(last_data + 60, predicate=lambda: trips)
+    reaction = trips[0][0] - (last_data + safety.comm_timeout)
+    print(f"comm timeout reaction: {reaction * 1000:.1f} ms late (1 s polling: up to 1000 ms)")
+    assert 0 <= reaction < 0.001
+
+    # Latched: one stop however long the link stays down
+    clock.advance(60)
+    assert len(trips) == 1
+    assert COMM_TIMEOUT in safety.tripped
+
+    # Data coming back clears the latch, so a second outage trips again
+    safety.update_data_timestamp()
+    assert COMM_TIMEOUT not in safety.tripped
+    clock.advance(safety.comm_timeout + 1)
+    assert len(trips) == 2
+
+def test_brew_and_steam_deadlines():
+    clock = VirtualClock()
+    safety = SafetyManager(clock)
+    safety.comm_timeout = 1e9
+    safety.update_data_timestamp()
+    trips = watch(safety, clock)
+
+    safety.start_brew_timer()
+    clock.advance(safety.max_brew_time - 0.1)
+    assert trips == []
+    clock.advance(0.2)
+    assert [reason for _, reason in trips] == ["Brew timeout - maximum brew time exceeded"]
+    assert trips[0][0] == safety.max_brew_time
+
+    # A stopped timer never fires
+    safety.start_steam_timer()
+    clock.advance(10)
+    safety.stop_steam_timer()
+    clock.advance(safety.max_steam_time)
+    assert len(trips) == 1
+
+def test_temperature_trips_and_warnings_are_deduplicated():
+    safety = SafetyManager(VirtualClock())
+    stops, warnings = [], []
+    safety.emergencyStop.connect(stops.append)
+    safety.warningIssued.connect(warnings.append)
+
+    for temp in (150.5, 151.0, 155.0, 165.0, 166.0, 170.0):
+        safety.check_temperature(temp)
+    assert len(warnings) == 1
+    assert len(stops) == 1
+    assert not safety.check_temperature(171.0)  # still refused while latched
+
+    # Cooling below the warning band re-enables both
+    assert safety.check_temperature(140.0)
+    safety.check_temperature(152.0)
+    safety.check_temperature(165.0)
+    assert len(warnings) == 2
+    assert len(stops) == 2
+
+def test_trend_estimator_matches_full_fit():
+    import random
+    rng = random.Random(5)
+    trend = TrendEstimator(window=12)
+    points = []
+    for i in range(1000):
+        t, value = 1000.0 + i * 0.25, 90 + 0.3 * i * 0.25 + rng.gauss(0, 0.2)
+        trend.add(t, value)
+        points.append((t, value))
+
+    # Plain least squares over the same window
+    window = points[-12:]
+    mean_t = sum(t for t, _ in window) / 12
+    mean_v = sum(v for _, v in window) / 12
+    slope = (sum((t - mean_t) * (v - mean_v) for t, v in window)
+             / sum((t - mean_t) ** 2 for t, _ in window))
+    assert abs(trend.slope() - slope) < 1e-9
+    assert abs(trend.projected(2.0) - (mean_v + slope * (window[-1][0] + 2.0 - mean_t))) < 1e-9
+
+    # Time going backwards starts a fresh trend
+    trend.add(0.0, 20.0)
+    assert len(trend) == 1 and trend.slope() is None
+
+def test_runaway_heater_trips_before_the_limit():
+    # Heater stuck on full from just under steam temperature, seen through the lagging probe
+    clock = VirtualClock()
+    safety = SafetyManager(clock)
+    trips = watch(safety, clock)
+    boiler = BoilerModel(temp=140.0)
+    crossed = None
+    while crossed is None:
+        clock.advance(0.25)
+        safety.update_data_timestamp()
+        reading = boiler.step(0.25, heater_pwm=255)
+        safety.check_temperature(round(reading, 1))
+        if reading > safety.max_temp:
+            crossed = clock.now()
+
+    assert len(trips) == 1 and trips[0][1].startswith("OVERHEAT PREDICTED")
+    lead = crossed - trips[0][0]
+    print(f"runaway heater: predicted trip {lead:.2f} s before the probe reached {safety.max_temp}°C")
+    assert lead >= 1.5
+
+def test_choked_puck_warns_without_stopping_the_shot():
+    # Far too fine a grind: pressure climbs to the pump's stall pressure, which is a bad shot
+    # but no hazard, so it is warned on as it heads over the limit and never trips
+    clock = VirtualClock()
+    safety = SafetyManager(clock)
+    stops, warnings = [], []
+    safety.emergencyStop.connect(stops.append)
+    safety.warningIssued.connect(lambda message: warnings.append((clock.now(), message)))
+    group = GroupModel(puck_resistance=200.0, headspace_volume=0.0)
+    peak = 0.0
+    for _ in range(120):  # 30 s
+        clock.advance(0.25)
+        pressure = round(group.step(0.25, 255, True), 2)
+        peak = max(peak, pressure)
+        safety.update_data_timestamp()
+        safety.check_pressure(pressure)
+
+    assert stops == [] and not safety.tripped
+    assert peak > safety.pressure_warn_limit
+    assert [message.split(':')[0] for _, message in warnings] == ["Pressure rising fast", "High pressure warning"]
+    assert warnings[1][0] - warnings[0][0] >= 0.25
+
+def test_no_false_alarms_through_steam_and_a_shot():
+    clock = VirtualClock()
+    serial = SerialManager(clock=clock, seed=11)
+    safety = SafetyManager(clock)
+    stops, warnings = [], []
+    safety.emergencyStop.connect(stops.append)
+    safety.warningIssued.connect(warnings.append)
+
+    def handle(lines):
+        safety.update_data_timestamp()
+        for line in lines:
+            sample = parse_line(line)
+            if sample is not None:
+                safety.check_pressure(sample.pressure, sample.millis / 1000.0)
+                safety.check_temperature(sample.temp, sample.millis / 1000.0)
+    serial.lines_received.connect(handle)
+    serial.start()
+
+    serial.send_command("START_STEAM")
+    clock.advance(300)
+    serial.send_command("STOP")
+    serial.send_command("START_BREW")
+    clock.advance(120)
+    serial.send_command("BEGIN_BREW")
+    clock.advance(30)
+    serial.stop()
+    assert stops == [] and warnings == []
+
+def test_comm_timeout_on_qt_timers():
+    # Same deadline on real QTimers: the stop lands within a few ms of falling due
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    clock = QtClock()
+    safety = SafetyManager(clock)
+    safety.comm_timeout = 0.2
+    trips = watch(safety, clock)
+
+    end = clock.now() + 0.3
+    while clock.now() < end:
+        safety.update_data_timestamp()
+        app.processEvents()
+        time.sleep(0.01)
+    last_data = safety.last_data_time
+
+    while not trips and clock.now() < last_data + 2:
+        app.processEvents()
+        time.sleep(0.001)
+    safety.stop()
+    assert trips
+    reaction = trips[0][0] - (last_data + safety.comm_timeout)
+    print(f"comm timeout reaction on QTimers: {reaction * 1000:.1f} ms late")
+    assert 0 <= reaction < 0.1
+
+if __name__ == "__main__":
+    test_comm_timeout_reaction_and_latch()
+    test_brew_and_steam_deadlines()
+    test_temperature_trips_and_warnings_are_deduplicated()
+    test_trend_estimator_matches_full_fit()
+    test_runaway_heater_trips_before_the_limit()
+    test_choked_puck_warns_without_stopping_the_shot()
+    test_no_false_alarms_through_steam_and_a_shot()
+    test_comm_timeout_on_qt_timers()
+    print("All tests passed")
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Tests for the DATA telemetry codec and binary telemetry framing
+"""
+
+import sys
+from serialcom.telemetry_codec import parse_line, parse_many, parse_status
+from serialcom.binary_protocol import StreamDecoder, encode_frame, FRAME_SIZE
+from serialcom.mock_serial_manager import SerialManager
+from serialcom.sim_clock import VirtualClock
+
+def test_parse_line():
+    sample = parse_line("DATA:3,93.5,9.12,18.4,80,1,0,12")
+    assert sample.state == "BREWING"
+    assert sample.temp == 93.5
+    assert sample.pressure == 9.12
+    assert sample.weight == 18.4
+    assert sample.pump == 80
+    assert sample.valve and not sample.heater
+    assert sample.brew_time == 12
+    assert sample.millis == 0
+    assert parse_line("DATA:3,93.5,9.12,18.4,80,1,0,12,61250").millis == 61250
+
+    # Older firmware without brewTime, unknown state code, non-telemetry lines
+    assert parse_line("DATA:9,25.0,0.00,0.0,0,0,0").state == "UNKNOWN"
+    assert parse_line("DATA:9,25.0,0.00,0.0,0,0,0").brew_time == 0
+    assert parse_line("OK:BREW_TEMP_SET") is None
+
+    # Legacy space-separated STATUS line
+    status = parse_status("STATUS BREWING 93.2 8.75 20.1 80")
+    assert (status.state, status.temp, status.pressure, status.weight, status.pump) == ("BREWING", 93.2, 8.75, 20.1, 80)
+    assert parse_status("STATUS:state=0,temp=25.0") is None
+
+    try:
+        parse_line("DATA:3,93.5")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("short DATA line should raise ValueError")
+
+def test_parse_many():
+    lines = [
+        "DATA:0,25.0,0.10,0.2,0,0,0,0",
+        "PONG",
+        "DATA:3,93.0,9.00,18.5,80,1,1,12",
+    ]
+    columns = parse_many(lines)
+    assert columns.state == ["IDLE", "BREWING"]
+    assert list(columns.temp) == [25.0, 93.0]
+    assert list(columns.valve) == [0, 1]
+    assert list(columns.brew_time) == [0, 12]
+
+    # A malformed line drops out without losing the rest of the batch
+    columns = parse_many(lines + ["DATA:3,oops,9.00,18.5,80,1,1,13", "DATA:1,90.0,0.00,0.0,0,0,1"])
+    assert columns.state == ["IDLE", "BREWING", "HEATING_BREW"]
+    assert list(columns.brew_time) == [0, 12, 0]
+
+    assert parse_many([]).state == []
+
+    # Current firmware appends its millis timestamp
+    columns = parse_many(["DATA:3,93.0,9.00,18.5,80,1,1,12,5000", "DATA:3,93.1,9.10,19.0,80,1,1,12,5250"])
+    assert list(columns.millis) == [5000, 5250]
+    assert list(columns.weight) == [18.5, 19.0]
+    assert list(parse_many(lines).millis) == [0, 0]
+
+    # A line run on into the next with a truncated one after it: 18 fields in all, as for two
+    # good lines, and every shifted column would still convert
+    columns = parse_many(["DATA:3,93.0,9.00,18.5,80,1,1,12,5000,0,1.0,2.0,3.0,4", "DATA:1,1,2,3"])
+    assert columns.state == ["BREWING"]
+    assert list(columns.temp) == [93.0] and list(columns.millis) == [5000]
+
+def test_binary_frame_round_trip():
+    frame = encode_frame(7, 123456, 3, 93.5, 9.12, 18.4, 80, True, False, 12)
+    assert len(frame) == FRAME_SIZE
+
+    decoder = StreamDecoder()
+    lines, samples = decoder.feed(frame)
+    assert lines == []
+    sample = samples[0]
+    assert (sample.state, sample.temp, sample.pressure, sample.weight) == ("BREWING", 93.5, 9.12, 18.4)
+    assert (sample.pump, sample.valve, sample.heater, sample.brew_time, sample.millis) == (80, True, False, 12, 123456)
+
+def test_binary_stream_demux():
+    frames = [encode_frame(seq, seq * 250, 0, 25.0, 0.1, 0.0, 0, False, False, 0) for seq in range(4)]
+    corrupt = bytearray(frames[2])
+    corrupt[8] ^= 0xFF
+    stream = b"OK:PROTO_BIN\r\n" + frames[0] + b"PONG\r\n" + frames[1] + bytes(corrupt) + frames[3]
+
+    # Feed in awkward chunk sizes so frames and lines straddle reads
+    decoder = StreamDecoder()
+    lines, samples = [], []
+    for i in range(0, len(stream), 5):
+        got_lines, got_samples = decoder.feed(stream[i:i + 5])
+        lines += got_lines
+        samples += got_samples
+
+    assert lines == ["OK:PROTO_BIN", "PONG"]
+    assert [s.millis for s in samples] == [0, 250, 750]
+    assert decoder.crc_errors == 1
+    assert decoder.dropped_frames == 1
+
+def test_mock_binary_mode():
+    # On a VirtualClock, so nothing runs but the telemetry the test sends by hand
+    serial = SerialManager(clock=VirtualClock())
+    lines, samples = [], []
+    serial.line_received.connect(lines.append)
+    serial.samples_received.connect(samples.extend)
+    serial.start()
+
+    serial.send_command("PROTO BIN")
+    serial._send_telemetry()
+    assert lines[-1] == "OK:PROTO_BIN"
+    assert len(samples) == 1 and samples[0].state == "IDLE"
+
+    serial.send_command("PROTO ASCII")
+    serial._send_telemetry()
+    assert lines[-1].startswith("DATA:")
+    serial.stop()
+
+if __name__ == "__main__":
+    test_parse_line()
+    test_parse_many()
+    test_binary_frame_round_trip()
+    test_binary_stream_demux()
+    test_mock_binary_mode()
+    print("All telemetry codec tests passed")
+    sys.exit(0)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+PID heater control: the controller on its own, and closed loop on the simulated boiler
+"""
+
+import os
+import tempfile
+from pid_controller import PIDController
+from autotune import RelayAutotuner, run_mock, save_profile, load_profile
+from serialcom.mock_serial_manager import SerialManager
+from serialcom.sim_clock import VirtualClock
+from telemetry_recorder import TelemetryRecorder
+from benchmarks.heater_control import run_heatup
+
+def test_pid_anti_windup_and_setpoint_change():
+    pid = PIDController(kp=10, ki=1.0, kd=0)
+    # A minute pinned at full output far below the setpoint must not wind the integral up
+    for i in range(240):
+        assert pid.update(93.0, 25.0, i * 0.25) == 255
+    assert pid.integral <= 255
+    # Once at the setpoint the output comes straight off the limit instead of unwinding for minutes
+    assert pid.update(93.0, 93.5, 60.25) < 255
+
+    # Derivative acts on the measurement, so a setpoint step does not spike the output
+    pid = PIDController(kp=1, ki=0, kd=100, output_min=-1000, output_max=1000)
+    pid.update(93.0, 93.0, 0.0)
+    assert pid.update(130.0, 93.0, 0.25) == 37.0
+
+def test_pid_on_simulated_boiler():
+    pid = run_heatup("pid", heatup=300, seed=4)
+    steps = run_heatup("firmware", heatup=300, seed=4)
+    print(f"pid: {pid}\nfirmware steps: {steps}")
+    assert pid['overshoot'] < 1.0
+    assert pid['settle_time'] is not None and pid['settle_time'] < 150
+    assert pid['steady_error'] < 0.1
+    # The fixed steps are still creeping up on the target at this point
+    assert steps['settle_time'] is None or steps['settle_time'] > pid['settle_time']
+    assert pid['shot_droop'] <= steps['shot_droop']
+
+def test_relay_autotune_on_simulated_boiler():
+    with tempfile.TemporaryDirectory() as work_dir:
+        profile, error = run_mock(setpoint=93.0, cycles=5, seed=2, log_dir=work_dir)
+        assert error is None
+        print(f"autotune: {profile}")
+        assert profile['cycles'] == 5
+        # The boiler's thermal mass and probe lag put the oscillation at around half a minute
+        assert 20 < profile['ultimate_period'] < 60
+        # Holding duty over the cycles: 0.9 W/K of losses at 1100 W full scale is ~0.21 PWM/°C
+        assert 0.15 < profile['feed_forward'] < 0.25
+
+        # The recording is kept as an AUTOTUNE session alongside the other telemetry
+        assert any(name.endswith(".json") and "AUTOTUNE" in open(os.path.join(work_dir, name)).read()
+                   for name in os.listdir(work_dir))
+
+        path = os.path.join(work_dir, "heater_profile.json")
+        save_profile(profile, path)
+        assert load_profile(path) == profile
+        tuned = run_heatup("pid", heatup=300, seed=4, profile_path=path)
+        print(f"autotuned pid: {tuned}")
+        assert tuned['overshoot'] < 1.5
+        assert tuned['settle_time'] is not None and tuned['settle_time'] < 200
+
+def test_relay_autotune_abort():
+    with tempfile.TemporaryDirectory() as work_dir:
+        clock = VirtualClock()
+        serial = SerialManager(clock=clock, seed=2)
+        recorder = TelemetryRecorder(work_dir)
+        tuner = RelayAutotuner(serial, recorder, clock)
+        failures = []
+        tuner.failed.connect(failures.append)
+        serial.start()
+        assert not tuner.running
+        tuner.start()
+        clock.advance(10)
+        assert tuner.running
+
+        tuner.abort("Connection lost: cable pulled")
+        assert not tuner.running and failures == ["Connection lost: cable pulled"]
+        # Later samples no longer drive the heater or report again
+        clock.advance(10)
+        assert failures == ["Connection lost: cable pulled"]
+        serial.stop()
+        recorder.close()
+
+if __name__ == "__main__":
+    test_pid_anti_windup_and_setpoint_change()
+    test_pid_on_simulated_boiler()
+    test_relay_autotune_on_simulated_boiler()
+    test_relay_autotune_abort()
+    print("All tests passed")
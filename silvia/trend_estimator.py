@@ -0,0 +1,72 @@
+from collections import deque
+
+class TrendEstimator:
+    """Least-squares trend line over the last `window` (time, value) samples
+
+    The regression sums are updated as samples enter and leave the window, so each sample
+    costs O(1). Every `window` samples the sums are rebuilt around the oldest sample's time,
+    which keeps the numbers small and sheds accumulated rounding at O(1) amortised cost.
+    """
+
+    def __init__(self, window=12, min_samples=4):
+        self.window = window
+        self.min_samples = min_samples  # fewer than this and there is no trend yet
+        self.reset()
+
+    def reset(self):
+        self._samples = deque()
+        self._origin = None
+        self._sx = self._sy = self._sxx = self._sxy = 0.0
+        self._since_rebuild = 0
+
+    def __len__(self):
+        return len(self._samples)
+
+    def add(self, t, value):
+        if self._samples and t < self._samples[-1][0]:
+            # Time went backwards (device reboot or reconnect): the old samples say nothing now
+            self.reset()
+        if self._origin is None:
+            self._origin = t
+
+        self._samples.append((t, value))
+        self._accumulate(t - self._origin, value, 1)
+        if len(self._samples) > self.window:
+            old_t, old_value = self._samples.popleft()
+            self._accumulate(old_t - self._origin, old_value, -1)
+
+        self._since_rebuild += 1
+        if self._since_rebuild >= self.window:
+            self._rebuild()
+
+    def slope(self):
+        """Rate of change in units per second, or None without enough spread in time"""
+        n = len(self._samples)
+        if n < self.min_samples:
+            return None
+        denominator = n * self._sxx - self._sx * self._sx
+        if denominator <= 1e-12:
+            return None
+        return (n * self._sxy - self._sx * self._sy) / denominator
+
+    def projected(self, horizon):
+        """Value of the trend line `horizon` seconds after the newest sample, or None"""
+        slope = self.slope()
+        if slope is None:
+            return None
+        n = len(self._samples)
+        x = self._samples[-1][0] - self._origin + horizon
+        return self._sy / n + slope * (x - self._sx / n)
+
+    def _accumulate(self, x, y, sign):
+        self._sx += sign * x
+        self._sy += sign * y
+        self._sxx += sign * x * x
+        self._sxy += sign * x * y
+
+    def _rebuild(self):
+        self._since_rebuild = 0
+        self._origin = self._samples[0][0]
+        self._sx = self._sy = self._sxx = self._sxy = 0.0
+        for t, value in self._samples:
+            self._accumulate(t - self._origin, value, 1)
@@ -55,6 +55,7 @@
 #define HEATER_PWM_FULL 255     // Full power PWM value
 #define HEATER_PWM_MED 150      // Medium power PWM value
 #define HEATER_PWM_LOW 80       // Low power PWM value
+#define HOST_HEATER_TIMEOUT 1000  // ms a SET_HEATER_PWM duty holds before falling back to the steps above
 
 // Timing Constants (milliseconds)
 #define TEMP_READ_INTERVAL 500      // Temperature reading interval
@@ -64,6 +65,8 @@
 
 // Serial Communication
 #define SERIAL_BAUD 115200      // Serial communication baud rate
+#define TELEMETRY_SYNC_0 0xAA   // Binary telemetry frame sync bytes
+#define TELEMETRY_SYNC_1 0x55
 
 // Safety Limits
 #define MAX_BREW_TEMP 100.0     // Maximum allowed brew temperature
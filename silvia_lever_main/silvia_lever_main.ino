@@ -45,9 +45,34 @@ unsigned long lastPressureRead = 0;
 unsigned long lastScaleRead = 0;
 unsigned long lastSerialSend = 0;
 
+// " #<id>" a command was tagged with, echoed on its reply so the host can match the two
+String replyTag = "";
+
+// Heater duty set by the host controller ("SET_HEATER_PWM"); -1 while the built-in steps are in charge
+int hostHeaterPwm = -1;
+unsigned long lastHostHeaterPwm = 0;
+
 // Calibrated pressure sensor zero voltage
 float calibratedVZero = V_ZERO;
 
+// Binary telemetry framing (enabled with "PROTO BIN", see serialcom/binary_protocol.py)
+bool binaryTelemetry = false;
+uint16_t telemetrySeq = 0;
+
+struct __attribute__((packed)) TelemetryFrame {
+  uint8_t sync[2];      // TELEMETRY_SYNC_0, TELEMETRY_SYNC_1
+  uint16_t seq;         // Wraps at 65536, gaps mean dropped frames
+  uint32_t millis;      // Sample time
+  uint8_t state;        // SystemState
+  int16_t temp;         // 0.1 degC
+  uint16_t pressure;    // 0.01 bar
+  int16_t weight;       // 0.1 g
+  uint8_t pump;         // Percent
+  uint8_t flags;        // Bit 0 valve open, bit 1 heater on
+  uint16_t brewTime;    // Seconds
+  uint16_t crc;         // CRC-16/CCITT-FALSE over seq..brewTime
+};
+
 
 
 void setup() {
@@ -114,48 +139,56 @@ void processSerialCommands() {
   if (Serial.available()) {
     String cmd = Serial.readStringUntil('\n');
     cmd.trim();
+    int tagAt = cmd.lastIndexOf(" #");
+    if (tagAt >= 0) {
+      replyTag = cmd.substring(tagAt);
+      cmd = cmd.substring(0, tagAt);
+      cmd.trim();
+    } else {
+      replyTag = "";
+    }
     
     if (cmd.startsWith("SET_TEMP BREW ")) {
       float temp = cmd.substring(14).toFloat();
       if (temp >= MIN_TEMP && temp <= MAX_BREW_TEMP) {
         sys.brewTemp = temp;
-        Serial.println("OK:BREW_TEMP_SET");
+        reply("OK:BREW_TEMP_SET");
       } else {
-        Serial.println("ERROR:BREW_TEMP_OUT_OF_RANGE");
+        reply("ERROR:BREW_TEMP_OUT_OF_RANGE");
       }
     }
     else if (cmd.startsWith("SET_TEMP STEAM ")) {
       float temp = cmd.substring(15).toFloat();
       if (temp >= MIN_TEMP && temp <= MAX_STEAM_TEMP) {
         sys.steamTemp = temp;
-        Serial.println("OK:STEAM_TEMP_SET");
+        reply("OK:STEAM_TEMP_SET");
       } else {
-        Serial.println("ERROR:STEAM_TEMP_OUT_OF_RANGE");
+        reply("ERROR:STEAM_TEMP_OUT_OF_RANGE");
       }
     }
     else if (cmd == "START_BREW") {
       if (sys.state == STATE_IDLE) {
         sys.state = STATE_HEATING_BREW;
-        Serial.println("OK:BREW_STARTED");
+        reply("OK:BREW_STARTED");
       } else {
-        Serial.println("ERROR:NOT_IDLE");
+        reply("ERROR:NOT_IDLE");
       }
     }
     else if (cmd == "START_STEAM") {
       if (sys.state == STATE_IDLE) {
         sys.state = STATE_HEATING_STEAM;
-        Serial.println("OK:STEAM_STARTED");
+        reply("OK:STEAM_STARTED");
       } else {
-        Serial.println("ERROR:NOT_IDLE");
+        reply("ERROR:NOT_IDLE");
       }
     }
     else if (cmd == "START_FLUSH") {
       if (sys.state == STATE_IDLE) {
         sys.state = STATE_FLUSHING;
         setValve(true);
-        Serial.println("OK:FLUSH_STARTED");
+        reply("OK:FLUSH_STARTED");
       } else {
-        Serial.println("ERROR:NOT_IDLE");
+        reply("ERROR:NOT_IDLE");
       }
     }
     else if (cmd == "BEGIN_BREW" || cmd == "BREW_NOW") {
@@ -164,35 +197,67 @@ void processSerialCommands() {
         sys.brewTimer = millis();
         tareScales();
         setValve(true);
-        Serial.println("OK:BREWING_STARTED");
+        reply("OK:BREWING_STARTED");
       } else {
-        Serial.println("ERROR:INVALID_STATE_FOR_BREW_NOW");
+        reply("ERROR:INVALID_STATE_FOR_BREW_NOW");
       }
     }
     else if (cmd == "STOP") {
       stopCurrentOperation();
-      Serial.println("OK:STOPPED");
+      reply("OK:STOPPED");
     }
     else if (cmd == "TARE_SCALES") {
       tareScales();
-      Serial.println("OK:SCALES_TARED");
+      reply("OK:SCALES_TARED");
     }
     else if (cmd == "GET_STATUS") {
       sendStatus();
     }
     else if (cmd == "PING") {
-      Serial.println("PONG");
+      reply("PONG");
     }
     else if (cmd == "ABORT") {
       stopCurrentOperation();
-      Serial.println("OK:ABORTED");
+      reply("OK:ABORTED");
+    }
+    else if (cmd.startsWith("SET_HEATER_PWM ")) {
+      // Sent with every sample, so no reply unless it is refused
+      String value = cmd.substring(15);
+      if (value == "AUTO") {
+        hostHeaterPwm = -1;
+      } else {
+        int pwm = value.toInt();
+        if (pwm >= 0 && pwm <= 255 && (pwm > 0 || value == "0")) {
+          hostHeaterPwm = pwm;
+          lastHostHeaterPwm = millis();
+        } else {
+          reply("ERROR:HEATER_PWM_OUT_OF_RANGE");
+        }
+      }
+    }
+    else if (cmd == "PROTO BIN") {
+      binaryTelemetry = true;
+      reply("OK:PROTO_BIN");
+    }
+    else if (cmd == "PROTO ASCII") {
+      binaryTelemetry = false;
+      reply("OK:PROTO_ASCII");
+    }
+    else if (cmd == "PROTO TAGS") {
+      // Tags are echoed whenever a command carries one; this only tells the host it may
+      reply("OK:PROTO_TAGS");
     }
     else if (cmd.length() > 0) {
-      Serial.println("ERROR:UNKNOWN_COMMAND");
+      reply("ERROR:UNKNOWN_COMMAND");
     }
   }
 }
 
+void reply(const char* message) {
+  Serial.print(message);
+  Serial.println(replyTag);
+}
+
 void updateSensors() {
   unsigned long now = millis();
   
@@ -273,7 +338,10 @@ void controlHeater(float targetTemp) {
   float tempDiff = targetTemp - sys.currentTemp;
   int pwmValue = 0;
   
-  if (tempDiff > TEMP_HYSTERESIS_HIGH) {
+  if (hostHeaterPwm >= 0 && millis() - lastHostHeaterPwm < HOST_HEATER_TIMEOUT) {
+    // Host PID in charge; never past the hard limit whatever it asks for
+    pwmValue = sys.currentTemp < MAX_STEAM_TEMP ? hostHeaterPwm : 0;
+  } else if (tempDiff > TEMP_HYSTERESIS_HIGH) {
     pwmValue = HEATER_PWM_FULL;
   } else if (tempDiff > TEMP_HYSTERESIS_MED) {
     pwmValue = HEATER_PWM_MED;
@@ -324,26 +392,60 @@ float mapPressure(float voltage) {
 void sendTelemetry() {
   unsigned long now = millis();
   if (now - lastSerialSend >= TELEMETRY_INTERVAL) {
-    Serial.print("DATA:");
-    Serial.print(sys.state); Serial.print(",");
-    Serial.print(sys.currentTemp, 1); Serial.print(",");
-    Serial.print(sys.pressure, 2); Serial.print(",");
-    Serial.print(sys.weight, 1); Serial.print(",");
-    Serial.print(map(sys.pumpPower, 0, 255, 0, 100)); Serial.print(",");
-    Serial.print(sys.valveOpen ? 1 : 0); Serial.print(",");
-    Serial.print(sys.heaterOn ? 1 : 0); Serial.print(",");
-    
+    unsigned long brewSeconds = 0;
     if (sys.state == STATE_BREWING && sys.brewTimer > 0) {
-      Serial.print((now - sys.brewTimer) / 1000);
+      brewSeconds = (now - sys.brewTimer) / 1000;
+    }
+    
+    if (binaryTelemetry) {
+      sendBinaryTelemetry(now, brewSeconds);
     } else {
-      Serial.print(0);
+      Serial.print("DATA:");
+      Serial.print(sys.state); Serial.print(",");
+      Serial.print(sys.currentTemp, 1); Serial.print(",");
+      Serial.print(sys.pressure, 2); Serial.print(",");
+      Serial.print(sys.weight, 1); Serial.print(",");
+      Serial.print(map(sys.pumpPower, 0, 255, 0, 100)); Serial.print(",");
+      Serial.print(sys.valveOpen ? 1 : 0); Serial.print(",");
+      Serial.print(sys.heaterOn ? 1 : 0); Serial.print(",");
+      Serial.print(brewSeconds); Serial.print(",");
+      Serial.print(now);
+      Serial.println();
     }
-    Serial.println();
     
     lastSerialSend = now;
   }
 }
 
+void sendBinaryTelemetry(unsigned long now, unsigned long brewSeconds) {
+  TelemetryFrame frame;
+  frame.sync[0] = TELEMETRY_SYNC_0;
+  frame.sync[1] = TELEMETRY_SYNC_1;
+  frame.seq = telemetrySeq++;
+  frame.millis = now;
+  frame.state = sys.state;
+  frame.temp = (int16_t)lroundf(sys.currentTemp * 10.0);
+  frame.pressure = (uint16_t)lroundf(sys.pressure * 100.0);
+  frame.weight = (int16_t)lroundf(sys.weight * 10.0);
+  frame.pump = map(sys.pumpPower, 0, 255, 0, 100);
+  frame.flags = (sys.valveOpen ? 0x01 : 0) | (sys.heaterOn ? 0x02 : 0);
+  frame.brewTime = brewSeconds;
+  frame.crc = crc16((const uint8_t*)&frame.seq, offsetof(TelemetryFrame, crc) - offsetof(TelemetryFrame, seq));
+  Serial.write((const uint8_t*)&frame, sizeof(frame));
+}
+
+uint16_t crc16(const uint8_t* data, size_t length) {
+  // CRC-16/CCITT-FALSE: poly 0x1021, init 0xFFFF
+  uint16_t crc = 0xFFFF;
+  for (size_t i = 0; i < length; i++) {
+    crc ^= (uint16_t)data[i] << 8;
+    for (uint8_t bit = 0; bit < 8; bit++) {
+      crc = (crc & 0x8000) ? (crc << 1) ^ 0x1021 : crc << 1;
+    }
+  }
+  return crc;
+}
+
 void sendStatus() {
   Serial.print("STATUS:");
   Serial.print("state="); Serial.print(sys.state); Serial.print(",");
@@ -355,5 +457,5 @@ void sendStatus() {
   Serial.print("pump="); Serial.print(map(sys.pumpPower, 0, 255, 0, 100)); Serial.print(",");
   Serial.print("valve="); Serial.print(sys.valveOpen ? 1 : 0); Serial.print(",");
   Serial.print("heater="); Serial.print(sys.heaterOn ? 1 : 0);
-  Serial.println();
+  Serial.println(replyTag);
 }
\ No newline at end of file